@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""Measure UnetSocket performance and write the results as JSON.
+
+The benchmarks run against two nodes: either the offline LocalUnetStack
+stand-in (the default), or the simulator nodes started by tests/sim.sh on
+ports 1101 and 1102. They measure:
+
+    - send: datagrams/sec and send() latency for each send mode
+      (NON_BLOCKING, SEMI_BLOCKING, BLOCKING, reliable) and payload size
+    - receive: receive() throughput with the socket bound and unbound
+    - construct: UnetSocket construction time, eager and lazy
+    - param_read: parameter read latency, with and without a parameter mirror
+    - import: time to import unetpy in a fresh interpreter
+
+Usage:
+    python benchmarks/run_benchmarks.py [--target local|sim] [--encoding list|base64] [--output results.json]
+    python benchmarks/run_benchmarks.py --compare baseline.json
+
+Results from different releases can be compared with --compare, which
+prints the change in rate and p99 latency for each benchmark.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import platform
+import os
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+# Add src to path for imports
+SRC_PATH = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(SRC_PATH))
+
+from unetpy import LocalUnetStack, Protocol, Services, UnetSocket
+
+SIM_HOST = "localhost"
+SIM_PORTS = (1101, 1102)
+
+SEND_MODES = {
+    "NON_BLOCKING": (UnetSocket.NON_BLOCKING, False),
+    "SEMI_BLOCKING": (UnetSocket.SEMI_BLOCKING, False),
+    "BLOCKING": (UnetSocket.BLOCKING, False),
+    "reliable": (UnetSocket.SEMI_BLOCKING, True),
+}
+
+
+def percentile(samples: list[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of the samples, or None if there are none."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(name: str, params: dict[str, Any], samples: list[float], elapsed: float, **extra: Any) -> dict[str, Any]:
+    """Build a result record from per-operation latencies (in seconds)."""
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return None if value is None else round(value * 1000, 4)
+
+    return {
+        "name": name,
+        "params": params,
+        "count": len(samples),
+        "elapsed": round(elapsed, 6),
+        "rate": round(len(samples) / elapsed, 2) if elapsed > 0 else None,
+        "p50_ms": ms(percentile(samples, 0.5)),
+        "p99_ms": ms(percentile(samples, 0.99)),
+        "mean_ms": ms(sum(samples) / len(samples)) if samples else None,
+        **extra,
+    }
+
+
+def timed(n: int, op: Callable[[int], Any]) -> tuple[list[float], float]:
+    """Call op(i) n times, returning the latency of each call and the total time."""
+    samples = []
+    t0 = time.perf_counter()
+    for i in range(n):
+        t1 = time.perf_counter()
+        op(i)
+        samples.append(time.perf_counter() - t1)
+    return samples, time.perf_counter() - t0
+
+
+def drain(sock: UnetSocket, idle: int = 200) -> int:
+    """Discard queued datagrams until none arrives for ``idle`` ms."""
+    n = 0
+    while sock.receive(idle) is not None:
+        n += 1
+    return n
+
+
+def bench_send(tx: UnetSocket, rx: UnetSocket, to: int, mode: str, size: int, n: int, settle: float) -> dict[str, Any]:
+    """Send n datagrams of the given size and count how many arrive."""
+    sendMode, reliable = SEND_MODES[mode]
+    tx.setSendMode(sendMode)
+    tx.setReliability(reliable)
+    payload = [i % 256 for i in range(size)]
+    ok = 0
+
+    def send(i: int) -> None:
+        nonlocal ok
+        ok += bool(tx.send(payload, to, Protocol.USER))
+
+    samples, elapsed = timed(n, send)
+    received = 0
+    deadline = time.perf_counter() + settle
+    while received < n and time.perf_counter() < deadline:
+        if rx.receive(100) is not None:
+            received += 1
+    tx.setSendMode(UnetSocket.SEMI_BLOCKING)
+    tx.setReliability(None)
+    return summarize("send", {"mode": mode, "size": size}, samples, elapsed, succeeded=ok, received=received)
+
+
+def bench_receive(tx: UnetSocket, rx: UnetSocket, to: int, bound: bool, n: int, settle: float) -> dict[str, Any]:
+    """Queue datagrams for two protocols, then time receive() draining them."""
+    if bound:
+        rx.bind(Protocol.USER)
+    else:
+        rx.unbind()
+    tx.setSendMode(UnetSocket.NON_BLOCKING)
+    for i in range(n):
+        tx.send([i % 256], to, Protocol.USER)
+        tx.send([i % 256], to, Protocol.USER + 1)
+    tx.setSendMode(UnetSocket.SEMI_BLOCKING)
+    time.sleep(settle)
+    expected = n if bound else 2 * n
+    samples: list[float] = []
+    t0 = time.perf_counter()
+    for _ in range(expected):
+        t1 = time.perf_counter()
+        if rx.receive(UnetSocket.NON_BLOCKING) is None:
+            break
+        samples.append(time.perf_counter() - t1)
+    elapsed = time.perf_counter() - t0
+    drain(rx, 100)
+    rx.bind(Protocol.USER)
+    return summarize("receive", {"bound": bound}, samples, elapsed, expected=expected)
+
+
+def bench_construct(host: str, port: int, n: int, lazy: bool) -> dict[str, Any]:
+    """Time UnetSocket construction (closing the sockets is not timed)."""
+    sockets = []
+    samples, elapsed = timed(n, lambda i: sockets.append(UnetSocket(host, port, lazy=lazy)))
+    for sock in sockets:
+        sock.close()
+    return summarize("construct", {"lazy": lazy}, samples, elapsed)
+
+
+def bench_param_read(sock: UnetSocket, n: int, mirrored: bool) -> dict[str, Any]:
+    """Time reading a datagram agent parameter, directly or from a parameter mirror."""
+    phy = sock.agentForService(Services.PHYSICAL)
+    if phy is None:
+        raise RuntimeError("No PHYSICAL service provider found")
+    source: Any = sock.params(phy) if mirrored else phy
+    samples, elapsed = timed(n, lambda i: source.MTU)
+    return summarize("param_read", {"agent": phy.name, "param": "MTU", "mirrored": mirrored}, samples, elapsed)
+
+
+def bench_import(n: int) -> dict[str, Any]:
+    """Time ``import unetpy`` in n fresh interpreters (startup itself is not timed)."""
+    code = "import time; t = time.perf_counter(); import unetpy; print(time.perf_counter() - t)"
+    env = dict(os.environ, PYTHONPATH=str(SRC_PATH))
+    samples = []
+    t0 = time.perf_counter()
+    for _ in range(n):
+        out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout))
+    return summarize("import", {}, samples, time.perf_counter() - t0)
+
+
+def run(hostA: str, portA: int, hostB: str, portB: int, count: int, sizes: list[int], settle: float,
+        encoding: str = UnetSocket.LIST_ENCODING) -> list[dict[str, Any]]:
+    """Run all benchmarks between two nodes, sending payloads in the given wire encoding."""
+    results = []
+
+    def report(result: dict[str, Any]) -> None:
+        results.append(result)
+        print(f"{result['name']:<11} {json.dumps(result['params']):<40} "
+              f"{result['rate'] or 0:>10.1f}/s  p50 {result['p50_ms'] or 0:>8.3f} ms  p99 {result['p99_ms'] or 0:>8.3f} ms")
+
+    with UnetSocket(hostA, portA) as tx, UnetSocket(hostB, portB) as rx:
+        to = rx.getLocalAddress()
+        tx.setPayloadEncoding(encoding)
+        rx.bind(Protocol.USER)
+        drain(rx)
+        for mode in SEND_MODES:
+            for size in sizes:
+                report(bench_send(tx, rx, to, mode, size, count, settle))
+                drain(rx, 100)
+        for bound in (True, False):
+            report(bench_receive(tx, rx, to, bound, count, settle))
+        for mirrored in (False, True):
+            report(bench_param_read(tx, count, mirrored))
+    for lazy in (False, True):
+        report(bench_construct(hostA, portA, max(1, count // 10), lazy))
+    report(bench_import(max(1, count // 50)))
+    return results
+
+
+def compare(old: dict[str, Any], new: dict[str, Any]) -> None:
+    """Print the change in rate and p99 latency between two result files."""
+
+    def key(result: dict[str, Any]) -> str:
+        return result["name"] + " " + json.dumps(result["params"], sort_keys=True)
+
+    baseline = {key(r): r for r in old.get("results", [])}
+    print(f"\nCompared to {old.get('meta', {}).get('version', 'unknown')} ({old.get('meta', {}).get('timestamp', '')}):")
+    for result in new.get("results", []):
+        before = baseline.get(key(result))
+        if before is None:
+            print(f"{key(result):<52} (new)")
+            continue
+        changes = []
+        for field, label in (("rate", "rate"), ("p99_ms", "p99")):
+            if before.get(field) and result.get(field) is not None:
+                changes.append(f"{label} {100 * (result[field] - before[field]) / before[field]:+7.1f}%")
+        print(f"{key(result):<52} " + "  ".join(changes))
+
+
+def main() -> None:
+    """Parse arguments, run the benchmarks and write the results."""
+    parser = argparse.ArgumentParser(description="UnetSocket benchmarks")
+    parser.add_argument("--target", choices=("local", "sim"), default="local",
+                        help="run against LocalUnetStack (default) or the simulator on ports 1101/1102")
+    parser.add_argument("--count", type=int, default=None,
+                        help="operations per benchmark (default: 500 for local, 20 for sim)")
+    parser.add_argument("--sizes", default="1,16,64", help="comma-separated payload sizes in bytes (default: 1,16,64)")
+    parser.add_argument("--encoding", choices=(UnetSocket.LIST_ENCODING, UnetSocket.BASE64_ENCODING),
+                        default=UnetSocket.LIST_ENCODING, help="wire encoding of datagram payloads (default: list)")
+    parser.add_argument("--latency", type=float, default=0.0, help="one-way datagram latency of the local stack in seconds")
+    parser.add_argument("--output", default="benchmark-results.json", help="JSON file to write the results to")
+    parser.add_argument("--compare", default=None, help="JSON results file to compare with")
+    args = parser.parse_args()
+
+    count = args.count or (500 if args.target == "local" else 20)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    settle = 2.0 + 2 * args.latency if args.target == "local" else 30.0
+
+    try:
+        from importlib.metadata import version
+        unetpyVersion = version("unetpy")
+    except Exception:
+        # not installed, so take the version of the source tree being benchmarked
+        match = re.search(r'^version = "([^"]+)"', (SRC_PATH.parent / "pyproject.toml").read_text(), re.MULTILINE)
+        unetpyVersion = match.group(1) if match else "unknown"
+    meta = {
+        "version": unetpyVersion,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "target": args.target,
+        "count": count,
+        "sizes": sizes,
+        "latency": args.latency,
+        "encoding": args.encoding,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+    if args.target == "local":
+        with LocalUnetStack(latency=args.latency) as stack:
+            portA = stack.addNode("A", 232)
+            portB = stack.addNode("B", 31)
+            results = run("localhost", portA, "localhost", portB, count, sizes, settle, args.encoding)
+    else:
+        results = run(SIM_HOST, SIM_PORTS[0], SIM_HOST, SIM_PORTS[1], count, sizes, settle, args.encoding)
+
+    output = {"meta": meta, "results": results}
+    Path(args.output).write_text(json.dumps(output, indent=2) + "\n")
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text()), output)
+
+
+if __name__ == "__main__":
+    main()
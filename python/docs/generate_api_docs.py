@@ -9,6 +9,11 @@ Usage:
 
 The script will create/update the following files:
     - docs/api/unetsocket.md
+    - docs/api/asyncsocket.md
+    - docs/api/selector.md
+    - docs/api/metrics.md
+    - docs/api/params.md
+    - docs/api/localstack.md
     - docs/api/constants.md
     - docs/api/messages.md
     - docs/api/utilities.md
@@ -25,7 +30,7 @@ from typing import Any
 SRC_PATH = Path(__file__).parent.parent / "src"
 sys.path.insert(0, str(SRC_PATH))
 
-from unetpy import socket, constants, messages, unetutils
+from unetpy import socket, asyncsocket, selector, metrics, params, localstack, constants, messages, unetutils
 
 
 def get_module_docstring(module) -> str:
@@ -148,20 +153,20 @@ def format_docstring_as_markdown(docstring: str) -> str:
     return "\n".join(result)
 
 
-def generate_unetsocket_docs() -> str:
-    """Generate documentation for UnetSocket."""
-    cls_info = get_class_info(socket.UnetSocket)
+def generate_socket_docs(cls, intro: list[str]) -> str:
+    """Generate documentation for a socket class."""
+    cls_info = get_class_info(cls)
+    name = cls_info["name"]
 
     lines = [
-        "# UnetSocket",
+        f"# {name}",
         "",
-        "The `UnetSocket` class provides a high-level socket-like interface for",
-        "communicating with UnetStack nodes.",
+        *intro,
         "",
         "## Import",
         "",
         "```python",
-        "from unetpy import UnetSocket",
+        f"from unetpy import {name}",
         "```",
         "",
         "## Class Documentation",
@@ -179,7 +184,7 @@ def generate_unetsocket_docs() -> str:
         if method["name"] == "__init__":
             lines.extend([
                 f"```python",
-                f"UnetSocket{method['signature']}",
+                f"{name}{method['signature']}",
                 "```",
                 "",
                 format_docstring_as_markdown(method["docstring"]),
@@ -212,6 +217,85 @@ def generate_unetsocket_docs() -> str:
     return "\n".join(lines)
 
 
+def generate_unetsocket_docs() -> str:
+    """Generate documentation for UnetSocket."""
+    return generate_socket_docs(socket.UnetSocket, [
+        "The `UnetSocket` class provides a high-level socket-like interface for",
+        "communicating with UnetStack nodes.",
+    ])
+
+
+def generate_asyncsocket_docs() -> str:
+    """Generate documentation for AsyncUnetSocket."""
+    return generate_socket_docs(asyncsocket.AsyncUnetSocket, [
+        "The `AsyncUnetSocket` class provides the `UnetSocket` interface for",
+        "asyncio applications, with awaitable send, receive and parameter access.",
+    ])
+
+
+def generate_selector_docs() -> str:
+    """Generate documentation for UnetSelector and select()."""
+    doc = generate_socket_docs(selector.UnetSelector, [
+        "The `UnetSelector` class and `select()` function wait for incoming",
+        "datagrams on many `UnetSocket` instances from a single thread.",
+    ])
+    func_info = get_function_info(selector.select)
+    lines = [
+        doc,
+        "## select",
+        "",
+        "```python",
+        f"select{func_info['signature']}",
+        "```",
+        "",
+        format_docstring_as_markdown(func_info["docstring"]),
+        "",
+        "---",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def generate_metrics_docs() -> str:
+    """Generate documentation for SocketMetrics."""
+    return generate_socket_docs(metrics.SocketMetrics, [
+        "The `SocketMetrics` class holds the opt-in counters and latency histograms",
+        "collected by `UnetSocket.enableMetrics()`.",
+    ])
+
+
+def generate_params_docs() -> str:
+    """Generate documentation for ParamMirror, getParamsAll() and setParamsAll()."""
+    lines = [generate_socket_docs(params.ParamMirror, [
+        "The `ParamMirror` class holds the local copy of an agent's parameters",
+        "returned by `UnetSocket.params()`. The `getParamsAll()` and `setParamsAll()`",
+        "functions read and set parameters on many nodes concurrently.",
+    ])]
+    for func in (params.getParamsAll, params.setParamsAll):
+        func_info = get_function_info(func)
+        lines += [
+            f"## {func.__name__}",
+            "",
+            "```python",
+            f"{func.__name__}{func_info['signature']}",
+            "```",
+            "",
+            format_docstring_as_markdown(func_info["docstring"]),
+            "",
+            "---",
+            "",
+        ]
+    return "\n".join(lines)
+
+
+def generate_localstack_docs() -> str:
+    """Generate documentation for LocalUnetStack."""
+    return generate_socket_docs(localstack.LocalUnetStack, [
+        "The `LocalUnetStack` class runs offline stand-ins for UnetStack nodes, to",
+        "test and benchmark sockets without Java or a UnetStack simulator.",
+    ])
+
+
 def generate_constants_docs() -> str:
     """Generate documentation for constants."""
     lines = [
@@ -388,6 +472,11 @@ def main():
     # Generate each doc file
     docs = {
         "unetsocket.md": generate_unetsocket_docs,
+        "asyncsocket.md": generate_asyncsocket_docs,
+        "selector.md": generate_selector_docs,
+        "metrics.md": generate_metrics_docs,
+        "params.md": generate_params_docs,
+        "localstack.md": generate_localstack_docs,
         "constants.md": generate_constants_docs,
         "messages.md": generate_messages_docs,
         "utilities.md": generate_utilities_docs,
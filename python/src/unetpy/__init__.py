@@ -1,19 +1,53 @@
 """Python interface to UnetStack modems."""
 
+import importlib
+
 import fjagepy
 from fjagepy import *
-from . import constants, messages, socket, unetutils
+from . import constants, messages, metrics, params, selector, socket, unetutils
 from .constants import *
-from .messages import *
 from .socket import *
+from .selector import *
+from .metrics import *
+from .params import *
 from .unetutils import *
 
+# Message classes, and the asyncio and multiprocessing based modules, are
+# only loaded when first used, to keep `import unetpy` fast.
+_LAZY_MODULES = ("asyncsocket", "localstack")
+_LAZY_NAMES = {
+    "AsyncUnetSocket": "asyncsocket",
+    "LocalUnetStack": "localstack",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_MODULES:
+        return importlib.import_module(f".{name}", __name__)
+    if name in _LAZY_NAMES:
+        value = getattr(importlib.import_module(f".{_LAZY_NAMES[name]}", __name__), name)
+    elif name in messages.__all__:
+        value = getattr(messages, name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
 
-# Re-export fjagepy, UnetStack messages/constants, socket wrapper, and utilities.
+# Re-export fjagepy, UnetStack messages/constants, socket wrappers, metrics, parameter mirrors, local stack stand-in, and utilities.
 __all__ = list(dict.fromkeys(
     list(getattr(fjagepy, "__all__", []))
     + list(getattr(messages, "__all__", []))
     + list(getattr(constants, "__all__", []))
     + list(getattr(socket, "__all__", []))
+    + ["AsyncUnetSocket"]
+    + list(getattr(selector, "__all__", []))
+    + list(getattr(metrics, "__all__", []))
+    + list(getattr(params, "__all__", []))
+    + ["LocalUnetStack"]
     + list(getattr(unetutils, "__all__", []))
 ))
@@ -0,0 +1,706 @@
+"""asyncio UnetSocket wrapper built on fjagepy."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Iterable, Optional, Sequence, Union
+
+from fjagepy import AgentID, Gateway, Message, ParameterReq, Performative
+from .constants import Services, Topics
+from .messages import (
+    AbnormalTerminationNtf,
+    AddressResolutionReq,
+    DatagramNtf,
+    ParamChangeNtf,
+)
+from .socket import (
+    _MAX_QUEUE_SIZE,
+    _MISSING,
+    _AddressCache,
+    _DatagramQueues,
+    _Dispatcher,
+    _ServiceCache,
+    _UnetSocketBase,
+    _find_agents,
+)
+
+__all__ = ["AsyncUnetSocket"]
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class AsyncUnetSocket(_UnetSocketBase):
+    """asyncio socket interface for UnetStack communication.
+
+    AsyncUnetSocket offers the same configuration API as UnetSocket (bind(),
+    connect(), setTtl(), setPriority(), ...), but send(), receive(), host() and
+    parameter access are coroutines. Incoming messages are pulled off the
+    gateway by a single background thread and handed to the event loop, so
+    any number of outstanding requests can be awaited concurrently without
+    tying up a thread per caller.
+
+    The socket connects when it is awaited or entered as an async context
+    manager, and is bound to the running event loop at that point.
+
+    Example:
+        Basic usage with async context manager::
+
+            from unetpy import AsyncUnetSocket, Protocol
+
+            async with AsyncUnetSocket("localhost", 1100) as sock:
+                sock.bind(Protocol.USER)
+                await sock.send([1, 2, 3], to=31, protocol=Protocol.USER)
+
+                ntf = await sock.receive(5000)
+                if ntf:
+                    print(f"Received: {ntf.data}")
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int = 1100
+    ) -> None:
+        """Create a new AsyncUnetSocket for the specified host.
+
+        The connection is opened when the socket is awaited (or entered with
+        ``async with``), not by the constructor.
+
+        Args:
+            hostname: Hostname or IP address of the UnetStack node.
+            port: TCP port number (default: 1100).
+
+        Example:
+            >>> sock = await AsyncUnetSocket("localhost", 1100)
+            >>> await sock.getLocalAddress()
+            232
+            >>> await sock.close()
+        """
+        super().__init__()
+        self.gw = None
+        self._hostname = hostname
+        self._port = port
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dispatcher: Optional[_Dispatcher] = None
+        self._replies: dict[str, asyncio.Queue] = {}
+        self._datagrams = _DatagramQueues()
+        self._services = _ServiceCache()
+        self._hosts = _AddressCache(self.HOST_CACHE_SIZE, self.HOST_CACHE_TTL, self.HOST_CACHE_NEGATIVE_TTL)
+        self._waiters: list[asyncio.Future] = []
+        # datagrams received before the local address is known, see open()
+        self._resolved = False
+        self._early: deque[Message] = deque(maxlen=_MAX_QUEUE_SIZE)
+
+    def __await__(self):
+        return self.open().__await__()
+
+    async def __aenter__(self) -> "AsyncUnetSocket":
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def open(self) -> "AsyncUnetSocket":
+        """Connect to the UnetStack node and set up subscriptions.
+
+        Opening an already open socket has no effect.
+
+        Returns:
+            The socket itself.
+        """
+        if self.gw is not None:
+            return self
+        self._loop = asyncio.get_running_loop()
+        self._resolved = False
+        gw = await self._loop.run_in_executor(None, Gateway, self._hostname, self._port)
+        self.gw = gw
+        self._dispatcher = _Dispatcher(gw)
+        self._dispatcher.addHandler(lambda msg: isinstance(msg, DatagramNtf), self._post(self._on_datagram))
+        self._dispatcher.addHandler(lambda msg: isinstance(msg, ParamChangeNtf), self._post(self._handle_param_change))
+        lifecycle = gw.topic(Topics.LIFECYCLE)
+        self._dispatcher.addHandler(
+            lambda msg: isinstance(msg, AbnormalTerminationNtf) or msg.recipient == lifecycle, self._on_lifecycle)
+        self._dispatcher.start()
+        # agents that terminate invalidate the cached service directory
+        gw.subscribe(lifecycle)
+
+        # for new UnetStack versions (6.0.0 and later)
+        gw.subscribe(gw.topic(Topics.DATAGRAM))
+        # for compatibility with older UnetStack versions (before 5.2.0)
+        for agent in await self.agentsForService(Services.DATAGRAM) or []:
+            gw.subscribe(gw.topic(agent))
+
+        nodeinfo = await self.agentForService(Services.NODE_INFO)
+
+        # subscribe to paramchange notifications for onParamChange callbacks
+        gw.subscribe(gw.topic(Topics.PARAMCHANGE))
+        if nodeinfo is not None:
+            gw.subscribe(gw.topic(nodeinfo))
+            self.onParamChange("node", "address", self._update_local_address)
+            address = await self.getParam(nodeinfo, "address")
+            if address is not None:
+                self.localAddress = address
+        self._resolved = True
+        early = list(self._early)
+        self._early.clear()
+        for ntf in early:
+            self._on_datagram(ntf)
+        return self
+
+    async def close(self) -> None:
+        """Close the socket and release all resources.
+
+        Pending send(), receive() and request() calls return as if they had
+        failed or timed out.
+        """
+        if self.gw is None:
+            return
+        gw, dispatcher = self.gw, self._dispatcher
+        self.gw = None
+        self._dispatcher = None
+        self._early.clear()
+        for replies in self._replies.values():
+            replies.put_nowait(None)
+        self._wake_receivers()
+        if self._loop is not None:
+            await self._loop.run_in_executor(None, self._shutdown, gw, dispatcher)
+
+    def isClosed(self) -> bool:
+        """Check if the socket is closed (or has not been opened yet).
+
+        Returns:
+            True if the socket is not connected, False otherwise.
+        """
+        return self.gw is None
+
+    async def getLocalAddress(self) -> int:
+        """Get the local node address.
+
+        The address read when the socket was opened, and kept up to date by
+        parameter change notifications, is returned without a request to the
+        node. The node is only asked if the address is not known yet.
+
+        Returns:
+            Local node address, or -1 on error.
+        """
+        if self.gw is None:
+            return -1
+        if self.localAddress is not None and self.localAddress >= 0:
+            return self.localAddress
+        nodeinfo = await self.agentForService(Services.NODE_INFO)
+        if nodeinfo is None:
+            logger.error("No NODE_INFO service provider found.")
+            return -1
+        address = await self.getParam(nodeinfo, "address")
+        if address is not None:
+            return address
+        logger.error("Unable to retrieve local node address.")
+        return -1
+
+    async def send(
+        self,
+        data: Union[bytes, bytearray, memoryview, Sequence[int], Message, str],
+        to: Optional[int] = None,
+        protocol: Optional[int] = None,
+    ) -> bool:
+        """Transmit a datagram to the specified destination.
+
+        Behaves like UnetSocket.send(), including the send mode semantics, but
+        awaits the AGREE and any completion notification instead of blocking.
+
+        Args:
+            data: Data to transmit. Can be bytes, bytearray, memoryview, list of
+                integers, any buffer of bytes, a string (encoded as UTF-8), or a
+                DatagramReq message.
+            to: Destination node address. Uses default if not specified.
+            protocol: Protocol number. Uses default if not specified.
+
+        Returns:
+            True on success, False on failure.
+
+        Example:
+            >>> await sock.send([1, 2, 3], to=31, protocol=Protocol.USER)
+            True
+        """
+        if self.gw is None:
+            logger.error("Cannot send datagram: socket is closed.")
+            return False
+
+        req = self._build_datagram_request(data, to, protocol)
+        if req is None:
+            return False
+
+        if req.recipient is None:
+            provider = await self._resolve_provider()
+            if provider is None:
+                logger.error("No datagram service provider found. Not sending datagram.")
+                return False
+            logger.debug(f"Using {provider} as datagram service provider.")
+            req.recipient = provider
+
+        if self.sendMode == self.NON_BLOCKING:
+            if self._dispatcher is not None:
+                self._drain_replies(self._dispatcher, req)
+            try:
+                self.gw.send(req)
+            except Exception:
+                logger.error("Failed to send datagram", exc_info=True)
+                return False
+            return True
+
+        reliable = bool(getattr(req, "reliability", False))
+        replies = self._expect(req)
+        try:
+            self.gw.send(req)
+            rsp = await self._next_reply(replies, self.REQUEST_TIMEOUT)
+            logger.debug(f"Received response for datagram send request: {rsp}")
+            if rsp is None or rsp.perf != Performative.AGREE:
+                return False
+            if self.sendMode == self.SEMI_BLOCKING and not reliable:
+                return True
+            deadline = time.monotonic() + self.DELIVERY_TIMEOUT / 1000
+            while True:
+                timeout = self.BLOCKING
+                if self.DELIVERY_TIMEOUT >= 0:
+                    timeout = max(0, int((deadline - time.monotonic()) * 1000))
+                ntf = await self._next_reply(replies, timeout)
+                logger.debug(f"Received send notification: {ntf}")
+                if ntf is None:
+                    return False
+                outcome = self._send_outcome(ntf, reliable)
+                if outcome is not None:
+                    return outcome
+        except Exception:
+            logger.error("Failed to send datagram", exc_info=True)
+            return False
+        finally:
+            self._forget(req)
+
+    async def receive(self, timeout: Optional[int] = None) -> Optional[DatagramNtf]: # type: ignore
+        """Receive a datagram sent to the local node.
+
+        Matching rules are the same as UnetSocket.receive(). A blocking receive
+        can be abandoned by cancelling the awaiting task.
+
+        Args:
+            timeout: Override timeout in milliseconds. Uses socket timeout if None.
+
+        Returns:
+            DatagramNtf or RxFrameNtf on success, None on timeout or if closed.
+
+        Example:
+            >>> sock.bind(Protocol.USER)
+            >>> ntf = await sock.receive(5000)
+        """
+        if self.gw is None or self._loop is None:
+            return None
+        effective_timeout = self._effective_timeout(timeout)
+        deadline = None
+        if effective_timeout != self.BLOCKING:
+            deadline = self._loop.time() + effective_timeout / 1000
+        while self.gw is not None:
+            ntf = self._next_datagram()
+            if ntf is not None:
+                return ntf
+            remaining = None if deadline is None else deadline - self._loop.time()
+            if remaining is not None and remaining <= 0:
+                return None
+            waiter = self._loop.create_future()
+            self._waiters.append(waiter)
+            try:
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        return None
+
+    async def receiveMany(self, n: int, timeout: Optional[int] = None) -> list[Message]:
+        """Receive up to n datagrams sent to the local node in one call.
+
+        Awaits only the first matching datagram, then drains up to n-1 further
+        matching datagrams that are already queued.
+
+        Args:
+            n: Maximum number of datagrams to return.
+            timeout: Override timeout in milliseconds for the first datagram.
+                Uses socket timeout if None.
+
+        Returns:
+            List of DatagramNtf or RxFrameNtf in arrival order, empty on timeout
+            or if closed.
+        """
+        if n <= 0:
+            return []
+        ntf = await self.receive(timeout)
+        if ntf is None:
+            return []
+        batch = [ntf]
+        while len(batch) < n:
+            ntf = self._next_datagram()
+            if ntf is None:
+                break
+            batch.append(ntf)
+        return batch
+
+    async def datagrams(
+        self,
+        timeout: Optional[int] = None,
+        source: Optional[int] = None,
+        protocol: Optional[int] = None,
+        minRssi: Optional[float] = None,
+        maxBuffer: Optional[int] = None,
+        dropPolicy: str = _UnetSocketBase.DROP_OLDEST,
+    ) -> AsyncIterator[Message]:
+        """Iterate asynchronously over datagrams sent to the local node.
+
+        The ``async for`` counterpart of UnetSocket.datagrams(), with the same
+        filters and buffer policy.
+
+        Args:
+            timeout: Stop iterating if no datagram arrives for this many
+                milliseconds. Iterates until the socket is closed if None.
+            source: Only yield datagrams from this node address.
+            protocol: Only yield datagrams with this protocol number.
+            minRssi: Only yield datagrams with at least this ``rssi``.
+            maxBuffer: Maximum number of buffered datagrams.
+            dropPolicy: DROP_OLDEST (default) or DROP_NEWEST.
+
+        Yields:
+            DatagramNtf or RxFrameNtf instances in arrival order.
+
+        Example:
+            >>> async for ntf in sock.datagrams(timeout=5000, protocol=Protocol.USER):
+            ...     print(ntf.data)
+        """
+        if not self._check_stream_args(maxBuffer, dropPolicy):
+            return
+        wait = self.BLOCKING if timeout is None else timeout
+        accept = self._stream_filter(source, protocol, minRssi)
+        buffer: deque = deque()
+        while self.gw is not None:
+            batch = await self.receiveMany(_MAX_QUEUE_SIZE, self.NON_BLOCKING if buffer else wait)
+            if not batch and not buffer:
+                return
+            self._buffer_stream(buffer, batch, accept, maxBuffer, dropPolicy)
+            if buffer:
+                yield buffer.popleft()
+
+    async def request(self, msg: Message, timeout: Optional[int] = None) -> Optional[Message]:
+        """Send a request and await the response.
+
+        Args:
+            msg: Request message. The recipient must be set.
+            timeout: Timeout in milliseconds (default: REQUEST_TIMEOUT).
+
+        Returns:
+            Response message, or None on timeout or if closed.
+        """
+        if self.gw is None:
+            return None
+        replies = self._expect(msg)
+        try:
+            self.gw.send(msg)
+            return await self._next_reply(replies, self.REQUEST_TIMEOUT if timeout is None else timeout)
+        finally:
+            self._forget(msg)
+
+    def getGateway(self) -> Optional[Gateway]:
+        """Get the underlying fjåge Gateway for low-level access.
+
+        Returns:
+            The Gateway instance, or None if socket is closed.
+        """
+        return self.gw
+
+    async def agentForService(self, svc) -> Optional[AgentID]:
+        """Get an agent providing the specified service.
+
+        fjagepy directory lookups are blocking, so they run on the event
+        loop's default executor. Lookups are cached, and the cache is
+        cleared when an agent terminates (see Topics.LIFECYCLE).
+
+        Args:
+            svc: Service identifier (from Services class).
+
+        Returns:
+            AgentID if found, None otherwise.
+        """
+        if self.gw is None or self._loop is None:
+            return None
+        return await self._lookup(svc, False)
+
+    async def agentsForService(self, svc) -> Optional[list[AgentID]]:
+        """Get all agents providing the specified service.
+
+        Args:
+            svc: Service identifier (from Services class).
+
+        Returns:
+            List of AgentID instances, or None if socket is closed.
+        """
+        if self.gw is None or self._loop is None:
+            return None
+        return await self._lookup(svc, True)
+
+    def agent(self, name: str) -> Optional[AgentID]:
+        """Get an agent by name.
+
+        Args:
+            name: Agent name.
+
+        Returns:
+            AgentID if the socket is open, None otherwise.
+        """
+        if self.gw is None:
+            return None
+        return self.gw.agent(name)
+
+    async def host(self, nodeName: str) -> Optional[int]:
+        """Resolve a node name to its address.
+
+        Resolved names are cached for HOST_CACHE_TTL seconds, and names that
+        the node could not resolve for HOST_CACHE_NEGATIVE_TTL seconds.
+
+        Args:
+            nodeName: Name of the node to resolve.
+
+        Returns:
+            Node address as integer, or None if unable to resolve.
+
+        Example:
+            >>> await sock.host("B")
+            31
+        """
+        if self.gw is None:
+            logger.error("Cannot resolve host: socket is closed.")
+            return None
+        address = self._hosts.get(nodeName)
+        if address is not _MISSING:
+            return address
+
+        arp = await self.agentForService(Services.ADDRESS_RESOLUTION)
+        if arp is None:
+            logger.error("No ADDRESS_RESOLUTION service provider found.")
+            return None
+
+        req = AddressResolutionReq()
+        req.name = nodeName
+        req.recipient = arp
+        rsp = await self.request(req, self.REQUEST_TIMEOUT)
+        if rsp is None:
+            logger.error(f"Address resolution request timed out for node '{nodeName}'")
+            return None
+        # a node that cannot resolve the name refuses the request
+        address = getattr(rsp, "address", None)
+        self._hosts.put(nodeName, address)
+        return address
+
+    async def hosts(self, nodeNames: Iterable[str]) -> list[Optional[int]]:
+        """Resolve several node names to their addresses concurrently.
+
+        Args:
+            nodeNames: Names of the nodes to resolve.
+
+        Returns:
+            List with the address of each node in order, or None for nodes
+            that could not be resolved.
+
+        Example:
+            >>> await sock.hosts(["A", "B", "C"])
+            [232, 31, None]
+        """
+        names = list(nodeNames)
+        unique = list(dict.fromkeys(names))
+        resolved = dict(zip(unique, await asyncio.gather(*[self.host(name) for name in unique])))
+        return [resolved[name] for name in names]
+
+    def hostName(self, address: int) -> Optional[str]:
+        """Get the name of a node from its address.
+
+        Only names resolved by host() or hosts() are known, so no request is
+        sent to the node.
+
+        Args:
+            address: Node address.
+
+        Returns:
+            Node name, or None if no cached resolution has that address.
+        """
+        return self._hosts.name(address)
+
+    async def getParam(self, agentId: Union[AgentID, str], param: str, index: int = -1) -> Any:
+        """Read a parameter of an agent.
+
+        Args:
+            agentId: AgentID or name of the agent.
+            param: Parameter name.
+            index: Index for indexed parameters (default: -1, not indexed).
+
+        Returns:
+            Parameter value, or None if unavailable.
+
+        Example:
+            >>> await sock.getParam("phy", "MTU")
+        """
+        return await self._parameter_request(agentId, ParameterReq(index=index).get(param))
+
+    async def setParam(self, agentId: Union[AgentID, str], param: str, value: Any, index: int = -1) -> Any:
+        """Set a parameter of an agent.
+
+        Args:
+            agentId: AgentID or name of the agent.
+            param: Parameter name.
+            value: New parameter value.
+            index: Index for indexed parameters (default: -1, not indexed).
+
+        Returns:
+            Value reported back by the agent, or None on failure.
+
+        Example:
+            >>> await sock.setParam("phy", "powerLevel", -10)
+        """
+        return await self._parameter_request(agentId, ParameterReq(index=index).set(param, value))
+
+    async def getParams(self, agentId: Union[AgentID, str], params: Iterable[str], index: int = -1) -> Optional[dict[str, Any]]:
+        """Read several parameters of an agent in a single request.
+
+        Args:
+            agentId: AgentID or name of the agent.
+            params: Parameter names.
+            index: Index for indexed parameters (default: -1, not indexed).
+
+        Returns:
+            Dictionary of parameter names to values, leaving out parameters
+            the agent does not have, or None if the request failed.
+
+        Example:
+            >>> await sock.getParams("phy", ["MTU", "busy"])
+        """
+        names = list(params)
+        agent = self.agent(agentId) if isinstance(agentId, str) else agentId
+        if agent is None:
+            return None
+        if not names:
+            return {}
+        return self._param_values(await self.request(self._param_request(agent, names, None, index), self.REQUEST_TIMEOUT))
+
+    async def setParams(self, agentId: Union[AgentID, str], values: dict[str, Any], index: int = -1) -> Optional[dict[str, Any]]:
+        """Set several parameters of an agent in a single request.
+
+        Args:
+            agentId: AgentID or name of the agent.
+            values: Dictionary of parameter names to new values.
+            index: Index for indexed parameters (default: -1, not indexed).
+
+        Returns:
+            Dictionary of the values reported back by the agent, leaving out
+            parameters the agent does not have, or None if the request failed.
+
+        Example:
+            >>> await sock.setParams("phy", {"powerLevel": -10}, index=1)
+        """
+        agent = self.agent(agentId) if isinstance(agentId, str) else agentId
+        if agent is None:
+            return None
+        if not values:
+            return {}
+        return self._param_values(await self.request(self._param_request(agent, (), values, index), self.REQUEST_TIMEOUT))
+
+## Internal helper methods
+
+    def _update_local_address(self, new_address: int) -> None:
+        logger.debug(f"Local address changed to {new_address}")
+        self.localAddress = new_address
+        self._datagrams.retain(new_address)
+        # the cached address of this node's name is no longer valid
+        self._hosts.clear()
+
+    async def _parameter_request(self, agentId: Union[AgentID, str], req: ParameterReq) -> Any:
+        agent = self.agent(agentId) if isinstance(agentId, str) else agentId
+        if agent is None:
+            return None
+        req.recipient = agent
+        rsp = await self.request(req, self.REQUEST_TIMEOUT)
+        if rsp is None or 'param' not in rsp.__dict__ or 'value' not in rsp.__dict__:
+            return None
+        return rsp.__dict__.get('value', None)
+
+    async def _resolve_provider(self) -> Optional[AgentID]:
+        if self.gw is None:
+            return None
+        if self.provider is not None:
+            return self.provider
+        # not latched: the lookups are cached until the provider terminates
+        for service in self._PROVIDER_SERVICES:
+            agent = await self.agentForService(service)
+            if agent is not None:
+                return agent
+        return None
+
+    async def _lookup(self, svc: Any, many: bool) -> Any:
+        value = self._services.get(svc, many)
+        if value is _MISSING and self.gw is not None and self._loop is not None:
+            generation = self._services.generation
+            value = await self._loop.run_in_executor(None, _find_agents, self.gw, svc, many)
+            self._services.put(svc, many, value, generation)
+        return None if value is _MISSING else value
+
+    def _on_lifecycle(self, ntf: Message) -> None:
+        # runs on the dispatcher thread; the cache has its own lock
+        logger.debug(f"Agent lifecycle change, clearing service cache: {ntf}")
+        self._services.invalidate()
+
+    def _post(self, callback: Callable[[Any], None]) -> Callable[[Any], None]:
+        # dispatcher handlers run on the dispatcher thread, so hop onto the loop
+        def _handler(msg: Optional[Message]) -> None:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(callback, msg)
+        return _handler
+
+    def _expect(self, req: Message) -> asyncio.Queue:
+        replies: asyncio.Queue = asyncio.Queue()
+        self._replies[req.msgID] = replies
+        if self._dispatcher is not None:
+            self._dispatcher.expect(req, self._post(replies.put_nowait))
+        return replies
+
+    def _forget(self, req: Message) -> None:
+        self._replies.pop(req.msgID, None)
+        if self._dispatcher is not None:
+            self._dispatcher.forget(req)
+
+    async def _next_reply(self, replies: asyncio.Queue, timeout: int) -> Optional[Message]:
+        if timeout < 0:
+            return await replies.get()
+        try:
+            return await asyncio.wait_for(replies.get(), timeout / 1000)
+        except asyncio.TimeoutError:
+            return None
+
+    def _on_datagram(self, ntf: Message) -> None:
+        if not self._resolved:
+            # the local address is not known yet, see open()
+            self._early.append(ntf)
+            return
+        if self._datagrams.put(ntf, self.localAddress):
+            self._wake_receivers()
+
+    def _next_datagram(self) -> Optional[Message]:
+        return self._datagrams.pop(self.localAddress, self.localProtocol)
+
+    def _wake_receivers(self) -> None:
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    @staticmethod
+    def _shutdown(gw: Gateway, dispatcher: Optional[_Dispatcher]) -> None:
+        if dispatcher is not None:
+            dispatcher.stop()
+        gw.close()
@@ -0,0 +1,582 @@
+"""Offline in-process stand-in for UnetStack nodes.
+
+LocalUnetStack runs a small fjåge JSON protocol server for each node in a
+local background process, so that UnetSocket and
+AsyncUnetSocket can be exercised and benchmarked without Java, a network or
+a UnetStack download. It emulates only what the sockets depend on: the
+node information, datagram (physical and link), address resolution and
+parameter change behaviour of a UnetStack node.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import multiprocessing
+import random
+import socket
+import socketserver
+import time
+import uuid
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from threading import Condition, Lock, RLock, Thread
+from typing import Any, Callable, Optional
+
+from .constants import Services, Topics
+
+__all__ = ["LocalUnetStack"]
+
+logger = logging.getLogger(__name__)
+
+_AGENT_FOR_SERVICE = "agentForService"
+_AGENTS_FOR_SERVICE = "agentsForService"
+_AGENTS = "agents"
+_CONTAINS_AGENT = "containsAgent"
+_SERVICES = "services"
+_SEND = "send"
+_WANTS_MESSAGES_FOR = "wantsMessagesFor"
+
+# Delay (in seconds) before answering a directory request (agentForService()
+# and the like). fjagepy's Gateway registers a reply channel, sends the request
+# and then looks the channel up again to wait on it, but the channel is removed
+# once the reply is handled, so a reply handled before that lookup fails the
+# request with KeyError. Over a real network the reply always takes longer than
+# that; a local stand-in answering at once loses the race now and then. unetpy
+# keeps hold of its reply channels and does not depend on the delay, and all
+# other messages are sent without delay.
+_DIRECTORY_REPLY_DELAY = 0.0005
+
+
+class LocalUnetStack:
+    """Offline stand-in for a network of UnetStack nodes.
+
+    Each node added with addNode() listens on its own local TCP port and
+    speaks the fjåge JSON protocol, so a regular UnetSocket (or Gateway)
+    connects to it exactly as it would to a real node. The nodes are served
+    by a separate Python process, so they do not compete with the client
+    for the interpreter lock. Every node exposes the following agents:
+
+    - ``node``: NODE_INFO, with ``address`` and ``nodeName`` parameters.
+    - ``phy``: PHYSICAL and DATAGRAM, with an ``MTU`` parameter.
+    - ``uwlink``: LINK and DATAGRAM, with an ``MTU`` parameter.
+    - ``arp``: ADDRESS_RESOLUTION for the names of all nodes in the stack.
+    - ``shell``: SHELL.
+
+    Datagram requests are agreed (or refused at random, see ``agreeRate``),
+    followed by a DatagramTransmissionNtf for unreliable datagrams. Each
+    destination node receives a DatagramNtf on the DATAGRAM topic after
+    ``latency`` seconds unless it is lost at random (see ``loss``), and the
+    sender of a reliable datagram receives a DatagramDeliveryNtf or
+    DatagramFailureNtf accordingly. Parameter changes are published as
+    ParamChangeNtf on the PARAMCHANGE topic.
+
+    Args:
+        latency: One-way datagram latency in seconds (default: 0).
+        loss: Probability of losing each datagram at each destination,
+            between 0 and 1 (default: 0).
+        agreeRate: Probability of agreeing to each datagram request,
+            between 0 and 1 (default: 1).
+        seed: Optional seed for the random loss and refusals.
+
+    Example:
+        >>> with LocalUnetStack(latency=0.01) as stack:
+        ...     stack.addNode("A", 232, 1101)
+        ...     stack.addNode("B", 31, 1102)
+        ...     with UnetSocket("localhost", 1101) as sock:
+        ...         sock.send([1, 2, 3], to=31, protocol=Protocol.USER)
+        1101
+        1102
+        True
+    """
+
+    def __init__(self, latency: float = 0.0, loss: float = 0.0, agreeRate: float = 1.0, seed: Optional[int] = None) -> None:
+        if latency < 0:
+            raise ValueError("latency must be non-negative")
+        if not 0 <= loss <= 1:
+            raise ValueError("loss must be between 0 and 1")
+        if not 0 <= agreeRate <= 1:
+            raise ValueError("agreeRate must be between 0 and 1")
+        self.latency = latency
+        self.loss = loss
+        self.agreeRate = agreeRate
+        self.seed = seed
+        self._lock = Lock()
+        self._nodes: dict[str, tuple[int, int, str]] = {}
+        self._ports: dict[str, int] = {}
+        self._process: Optional[BaseProcess] = None
+        self._conn: Optional[Connection] = None
+
+    def __enter__(self) -> "LocalUnetStack":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    def addNode(self, name: str, address: int, port: int = 0, host: str = "127.0.0.1") -> int:
+        """Add a node to the stack.
+
+        The node starts serving immediately if the stack is running, or
+        when start() is called otherwise.
+
+        Args:
+            name: Node name, as returned by the ``nodeName`` parameter and
+                resolved by address resolution.
+            address: Node address.
+            port: TCP port to listen on (default: 0, any free port).
+            host: Interface to listen on (default: ``127.0.0.1``).
+
+        Returns:
+            TCP port the node listens on. If ``port`` is 0 and the stack is
+            not running yet, this is 0; use getPort() after start().
+
+        Raises:
+            ValueError: If a node with the same name already exists.
+            OSError: If the port cannot be bound.
+        """
+        with self._lock:
+            if name in self._nodes:
+                raise ValueError(f"Node '{name}' already exists")
+            if self._conn is not None:
+                self._ports[name] = self._call("add", name, address, port, host)
+            self._nodes[name] = (address, port, host)
+            return self._ports.get(name, port)
+
+    def getPort(self, name: str) -> Optional[int]:
+        """Get the TCP port of a node.
+
+        Args:
+            name: Node name.
+
+        Returns:
+            TCP port of the node, or None if there is no such node or the
+            stack is not running.
+        """
+        return self._ports.get(name)
+
+    def getNodes(self) -> list[str]:
+        """Get the names of the nodes in the stack.
+
+        Returns:
+            List of node names, in the order they were added.
+        """
+        return list(self._nodes)
+
+    def isRunning(self) -> bool:
+        """Check if the stack is running.
+
+        Returns:
+            True if the stack is serving its nodes, False otherwise.
+        """
+        return self._process is not None and self._process.is_alive()
+
+    def start(self) -> None:
+        """Start serving all nodes. Has no effect if already started.
+
+        Raises:
+            OSError: If a node port cannot be bound.
+        """
+        with self._lock:
+            if self._conn is not None:
+                return
+            ctx = multiprocessing.get_context("spawn")
+            conn, child = ctx.Pipe()
+            process = ctx.Process(target=_serve, args=(child, self.latency, self.loss, self.agreeRate, self.seed),
+                                  name="unetpy-localstack", daemon=True)
+            process.start()
+            child.close()
+            self._process, self._conn = process, conn
+            try:
+                for name, (address, port, host) in self._nodes.items():
+                    self._ports[name] = self._call("add", name, address, port, host)
+            except BaseException:
+                self._shutdown()
+                raise
+
+    def stop(self) -> None:
+        """Stop serving and disconnect all clients.
+
+        Pending (delayed) notifications are discarded. The nodes are kept,
+        and serve again (with fresh parameters) if the stack is restarted.
+        Has no effect if not started.
+        """
+        with self._lock:
+            self._shutdown()
+
+    ## Internal helper methods
+
+    def _call(self, *cmd: Any) -> Any:
+        assert self._conn is not None
+        self._conn.send(cmd)
+        result = self._conn.recv()
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    def _shutdown(self) -> None:
+        process, conn = self._process, self._conn
+        self._process, self._conn = None, None
+        self._ports.clear()
+        if conn is not None:
+            try:
+                conn.send(("stop",))
+                conn.recv()
+            except (EOFError, OSError):
+                pass
+            conn.close()
+        if process is not None:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+
+def _serve(conn: Connection, latency: float, loss: float, agreeRate: float, seed: Optional[int]) -> None:
+    """Serve a LocalUnetStack's nodes, taking commands from ``conn``."""
+    network = _Network(latency, loss, agreeRate, seed)
+    try:
+        while True:
+            try:
+                cmd, *args = conn.recv()
+            except EOFError:
+                return
+            if cmd == "stop":
+                break
+            try:
+                conn.send(network.addNode(*args))
+            except Exception as e:
+                conn.send(e)
+    finally:
+        network.stop()
+    conn.send(None)
+
+
+class _Network:
+    """Nodes of a LocalUnetStack, served by the stack's process."""
+
+    MTU = 64
+    """MTU (in bytes) reported by the datagram agents."""
+
+    def __init__(self, latency: float, loss: float, agreeRate: float, seed: Optional[int]) -> None:
+        self.latency = latency
+        self.loss = loss
+        self.agreeRate = agreeRate
+        self.lock = RLock()
+        self.nodes: dict[str, _Node] = {}
+        self._random = random.Random(seed)
+        self._scheduler = _Scheduler()
+
+    def addNode(self, name: str, address: int, port: int, host: str) -> int:
+        with self.lock:
+            node = _Node(self, name, address, host, port)
+            self.nodes[name] = node
+            node.start()
+            return node.port
+
+    def stop(self) -> None:
+        for node in list(self.nodes.values()):
+            node.stop()
+        self.nodes.clear()
+        self._scheduler.stop()
+
+    def send(self, client: "_Client", data: bytes, delay: float = 0.0) -> None:
+        # written by the scheduler thread, so that writes to a client are not interleaved
+        self._scheduler.at(time.monotonic() + delay, lambda: client.write(data))
+
+    def later(self, fn: Callable[[], None]) -> None:
+        if self.latency <= 0:
+            fn()
+        else:
+            self._scheduler.at(time.monotonic() + self.latency, fn)
+
+    def chance(self, p: float) -> bool:
+        if p <= 0:
+            return False
+        if p >= 1:
+            return True
+        with self.lock:
+            return self._random.random() < p
+
+    def resolve(self, name: Any) -> Optional[int]:
+        node = self.nodes.get(name)
+        return node.address if node is not None else None
+
+    def deliver(self, src: "_Node", to: int, protocol: int, data: Any) -> bool:
+        delivered = False
+        for node in list(self.nodes.values()):
+            if node is src or (to != 0 and node.address != to) or self.chance(self.loss):
+                continue
+            node.publish(Topics.DATAGRAM.value, node.message("org.arl.unet.DatagramNtf", "phy", "#" + Topics.DATAGRAM.value, **{
+                "from": src.address,
+                "to": to,
+                "protocol": protocol,
+                "data": data,
+            }))
+            delivered = True
+        return delivered
+
+
+class _Agent:
+    """Emulated agent with its services and parameters."""
+
+    def __init__(self, services: list[str], params: dict[str, Any], paramClass: str) -> None:
+        self.services = services
+        self.params = params
+        self.paramClass = paramClass
+
+    def qualify(self, param: str) -> str:
+        return f"{self.paramClass}.{param}"
+
+
+class _Node:
+    """Emulated UnetStack node served over a local TCP port."""
+
+    def __init__(self, network: _Network, name: str, address: int, host: str, port: int) -> None:
+        self.network = network
+        self.name = name
+        self.address = address
+        self.clients: list[_Client] = []
+        self.agents = {
+            "node": _Agent([Services.NODE_INFO], {"address": address, "nodeName": name, "heading": 0.0}, "org.arl.unet.nodeinfo.NodeInfoParam"),
+            "phy": _Agent([Services.PHYSICAL, Services.DATAGRAM], {"MTU": network.MTU}, "org.arl.unet.DatagramParam"),
+            "uwlink": _Agent([Services.LINK, Services.DATAGRAM], {"MTU": network.MTU}, "org.arl.unet.DatagramParam"),
+            "arp": _Agent([Services.ADDRESS_RESOLUTION], {}, "org.arl.unet.addr.AddressResolutionParam"),
+            "shell": _Agent([Services.SHELL], {}, "org.arl.fjage.shell.ShellParam"),
+        }
+        self.server = _Server((host, port), _Client)
+        self.server.node = self
+        self.port = self.server.server_address[1]
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> None:
+        self._thread = Thread(target=self.server.serve_forever, args=(0.1,), name=f"unetpy-localstack-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+        self.server.server_close()
+        for client in list(self.clients):
+            client.close()
+
+    def message(self, clazz: str, sender: str, recipient: str, perf: str = "INFORM", **data: Any) -> dict[str, Any]:
+        return {"clazz": clazz, "data": {"msgID": str(uuid.uuid4()), "perf": perf, "sender": sender, "recipient": recipient, **data}}
+
+    def reply(self, req: dict[str, Any], clazz: str, perf: str = "INFORM", **data: Any) -> dict[str, Any]:
+        d = req["data"]
+        return self.message(clazz, d.get("recipient", ""), d.get("sender", ""), perf, inReplyTo=d.get("msgID"), **data)
+
+    def route(self, msg: dict[str, Any]) -> None:
+        """Route a message to the clients that want it, or to a local agent."""
+        recipient = msg["data"].get("recipient", "")
+        if recipient.startswith("#"):
+            self.publish(recipient[1:], msg)
+            return
+        for client in list(self.clients):
+            if recipient in client.wants:
+                client.push({"action": _SEND, "message": msg, "relay": False})
+                return
+        agent = self.agents.get(recipient)
+        if agent is not None:
+            self.handle(recipient, agent, msg)
+
+    def publish(self, topic: str, msg: dict[str, Any]) -> None:
+        for client in list(self.clients):
+            if "#" + topic in client.wants:
+                client.push({"action": _SEND, "message": msg, "relay": False})
+
+    def handle(self, name: str, agent: _Agent, msg: dict[str, Any]) -> None:
+        clazz = msg.get("clazz", "")
+        d = msg["data"]
+        if clazz.endswith(".ParameterReq"):
+            self.route(self._parameters(name, agent, msg))
+        elif clazz.endswith(".AddressResolutionReq") and name == "arp":
+            address = self.network.resolve(d.get("name"))
+            if address is None:
+                self.route(self.reply(msg, "org.arl.fjage.Message", "REFUSE"))
+            else:
+                self.route(self.reply(msg, "org.arl.unet.addr.AddressResolutionRsp", name=d.get("name"), address=address))
+        elif clazz.endswith(".DatagramReq") and name in ("phy", "uwlink"):
+            self._datagram(msg)
+        elif d.get("perf") == "REQUEST":
+            self.route(self.reply(msg, "org.arl.fjage.Message", "NOT_UNDERSTOOD"))
+
+    def services(self, service: str) -> list[str]:
+        return [name for name, agent in self.agents.items() if service in agent.services]
+
+    ## Internal helper methods
+
+    def _parameters(self, name: str, agent: _Agent, msg: dict[str, Any]) -> dict[str, Any]:
+        d = msg["data"]
+        requests = []
+        if d.get("param") is not None:
+            requests.append({"param": d["param"], "value": d.get("value")})
+        requests += d.get("requests") or []
+        if not requests:
+            values = {agent.qualify(p): v for p, v in agent.params.items()}
+            if not values:
+                return self.reply(msg, "org.arl.fjage.param.ParameterRsp", index=d.get("index", -1), values={})
+            first = next(iter(values))
+            return self.reply(msg, "org.arl.fjage.param.ParameterRsp", param=first, value=values.pop(first), values=values, index=d.get("index", -1))
+        out: dict[str, Any] = {}
+        changed: dict[str, Any] = {}
+        with self.network.lock:
+            for r in requests:
+                p = str(r.get("param", "")).split(".")[-1]
+                if p not in agent.params:
+                    continue
+                if r.get("value") is not None:
+                    agent.params[p] = r["value"]
+                    changed[agent.qualify(p)] = r["value"]
+                out[agent.qualify(p)] = agent.params[p]
+            if name == "node":
+                self.address = agent.params["address"]
+        if not out:
+            return self.reply(msg, "org.arl.fjage.Message", "REFUSE")
+        if changed:
+            self.publish(Topics.PARAMCHANGE.value, self.message(
+                "org.arl.unet.ParamChangeNtf", name, "#" + Topics.PARAMCHANGE.value, paramValues=changed))
+        first = next(iter(out))
+        return self.reply(msg, "org.arl.fjage.param.ParameterRsp", param=first, value=out.pop(first), values=out, index=d.get("index", -1))
+
+    def _datagram(self, msg: dict[str, Any]) -> None:
+        network = self.network
+        d = msg["data"]
+        if not network.chance(network.agreeRate):
+            self.route(self.reply(msg, "org.arl.fjage.Message", "REFUSE"))
+            return
+        self.route(self.reply(msg, "org.arl.fjage.Message", "AGREE"))
+        reliable = bool(d.get("reliability"))
+        if not reliable:
+            self.route(self.reply(msg, "org.arl.unet.DatagramTransmissionNtf"))
+        to = d.get("to") or 0
+
+        def arrive() -> None:
+            hit = network.deliver(self, to, d.get("protocol") or 0, d.get("data"))
+            if reliable:
+                self.route(self.reply(msg, "org.arl.unet.DatagramDeliveryNtf" if hit else "org.arl.unet.DatagramFailureNtf", to=to))
+
+        network.later(arrive)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    node: _Node
+
+
+class _Client(socketserver.StreamRequestHandler):
+    """A gateway connected to a node."""
+
+    server: _Server
+
+    def setup(self) -> None:
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.node = self.server.node
+        self.wants: set[str] = set()
+        self.node.clients.append(self)
+
+    def finish(self) -> None:
+        if self in self.node.clients:
+            self.node.clients.remove(self)
+        super().finish()
+
+    def handle(self) -> None:
+        try:
+            for line in self.rfile:
+                try:
+                    self._receive(json.loads(line))
+                except (OSError, ValueError) as e:
+                    logger.debug(f"Dropping connection: {e}")
+                    return
+                except Exception:
+                    logger.exception("Error handling message")
+        except OSError as e:
+            # the gateway went away, e.g. closed with a reset
+            logger.debug(f"Connection closed: {e}")
+
+    def push(self, obj: dict[str, Any], delay: float = 0.0) -> None:
+        self.node.network.send(self, (json.dumps(obj) + "\n").encode(), delay)
+
+    def write(self, data: bytes) -> None:
+        try:
+            self.wfile.write(data)
+        except (OSError, ValueError):
+            pass
+
+    def close(self) -> None:
+        try:
+            self.connection.close()
+        except OSError:
+            pass
+
+    ## Internal helper methods
+
+    def _receive(self, obj: dict[str, Any]) -> None:
+        action = obj.get("action")
+        if action is None:
+            return
+        if action == _WANTS_MESSAGES_FOR:
+            self.wants = set(obj.get("agentIDs") or [])
+            return
+        if action == _SEND:
+            self.node.route(obj["message"])
+            return
+        rsp: dict[str, Any] = {"id": obj.get("id"), "inResponseTo": action}
+        if action == _AGENT_FOR_SERVICE:
+            agents = self.node.services(obj.get("service", ""))
+            if agents:
+                rsp["agentID"] = agents[0]
+        elif action == _AGENTS_FOR_SERVICE:
+            rsp["agentIDs"] = self.node.services(obj.get("service", ""))
+        elif action == _AGENTS:
+            rsp["agentIDs"] = list(self.node.agents)
+        elif action == _CONTAINS_AGENT:
+            rsp["answer"] = obj.get("agentID") in self.node.agents
+        elif action == _SERVICES:
+            rsp["services"] = sorted({s for agent in self.node.agents.values() for s in agent.services})
+        else:
+            return
+        self.push(rsp, _DIRECTORY_REPLY_DELAY)
+
+
+class _Scheduler:
+    """Single thread running delayed callbacks in deadline order."""
+
+    def __init__(self) -> None:
+        self._cond = Condition()
+        self._heap: list[tuple[float, int, Callable[[], None]]] = []
+        self._seq = 0
+        self._stopped = False
+        self._thread = Thread(target=self._run, name="unetpy-localstack-scheduler", daemon=True)
+        self._thread.start()
+
+    def at(self, deadline: float, fn: Callable[[], None]) -> None:
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._heap, (deadline, self._seq, fn))
+            self._cond.notify()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._heap.clear()
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopped and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                if self._stopped:
+                    return
+                _, _, fn = heapq.heappop(self._heap)
+            try:
+                fn()
+            except Exception:
+                logger.exception("Error running delayed notification")
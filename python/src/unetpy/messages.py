@@ -7,121 +7,183 @@ UnetStack class hierarchy.
 Messages follow the UnetStack inheritance hierarchy. For example,
 `RxFrameNtf` extends `DatagramNtf`, so `isinstance(rx, DatagramNtf)`
 returns `True` for `RxFrameNtf` instances.
+
+Message classes are created the first time they are used, so importing
+unetpy does not pay for the ones an application never needs. Messages
+received by a UnetSocket are always inflated to their class.
+
+The payload of a `DatagramNtf` (or `RxFrameNtf`) is also available as
+`bytes` through its read-only `dataBytes` attribute, for example to parse
+it with `struct` or through a `memoryview` without converting the list of
+ints in `data` by hand.
 """
 
 from __future__ import annotations
 
-from fjagepy import MessageClass
-
-# unet
-TestReportNtf = MessageClass("org.arl.unet.TestReportNtf")
-AbnormalTerminationNtf = MessageClass("org.arl.unet.AbnormalTerminationNtf")
-CapabilityListRsp = MessageClass("org.arl.unet.CapabilityListRsp")
-CapabilityReq = MessageClass("org.arl.unet.CapabilityReq")
-ClearReq = MessageClass("org.arl.unet.ClearReq")
-DatagramCancelReq = MessageClass("org.arl.unet.DatagramCancelReq")
-DatagramDeliveryNtf = MessageClass("org.arl.unet.DatagramDeliveryNtf")
-DatagramFailureNtf = MessageClass("org.arl.unet.DatagramFailureNtf")
-DatagramNtf = MessageClass("org.arl.unet.DatagramNtf")
-DatagramProgressNtf = MessageClass("org.arl.unet.DatagramProgressNtf")
-DatagramReq = MessageClass("org.arl.unet.DatagramReq")
-ParamChangeNtf = MessageClass("org.arl.unet.ParamChangeNtf")
-RefuseRsp = MessageClass("org.arl.unet.RefuseRsp")
-FailureNtf = MessageClass("org.arl.unet.FailureNtf")
-DatagramTransmissionNtf = MessageClass("org.arl.unet.DatagramTransmissionNtf")
-
-#remote
-
-
-
-
-# net
-DatagramTraceReq = MessageClass("org.arl.unet.net.DatagramTraceReq")
-RouteDiscoveryReq = MessageClass("org.arl.unet.net.RouteDiscoveryReq")
-RouteTraceReq = MessageClass("org.arl.unet.net.RouteTraceReq")
-RouteDiscoveryNtf = MessageClass("org.arl.unet.net.RouteDiscoveryNtf")
-RouteTraceNtf = MessageClass("org.arl.unet.net.RouteTraceNtf")
-
-# phy
-FecDecodeReq = MessageClass("org.arl.unet.phy.FecDecodeReq")
-RxJanusFrameNtf = MessageClass("org.arl.unet.phy.RxJanusFrameNtf")
-TxJanusFrameReq = MessageClass("org.arl.unet.phy.TxJanusFrameReq")
-BadFrameNtf = MessageClass("org.arl.unet.phy.BadFrameNtf")
-BadRangeNtf = MessageClass("org.arl.unet.phy.BadRangeNtf")
-BeaconReq = MessageClass("org.arl.unet.phy.BeaconReq")
-ClearSyncReq = MessageClass("org.arl.unet.phy.ClearSyncReq")
-CollisionNtf = MessageClass("org.arl.unet.phy.CollisionNtf")
-RxFrameNtf = MessageClass("org.arl.unet.phy.RxFrameNtf", DatagramNtf)
-RxFrameStartNtf = MessageClass("org.arl.unet.phy.RxFrameStartNtf")
-SyncInfoReq = MessageClass("org.arl.unet.phy.SyncInfoReq")
-SyncInfoRsp = MessageClass("org.arl.unet.phy.SyncInfoRsp")
-TxFrameNtf = MessageClass("org.arl.unet.phy.TxFrameNtf", DatagramTransmissionNtf)
-TxFrameReq = MessageClass("org.arl.unet.phy.TxFrameReq", DatagramReq)
-TxFrameStartNtf = MessageClass("org.arl.unet.phy.TxFrameStartNtf")
-TxRawFrameReq = MessageClass("org.arl.unet.phy.TxRawFrameReq")
-
-# addr
-AddressAllocReq = MessageClass("org.arl.unet.addr.AddressAllocReq")
-AddressAllocRsp = MessageClass("org.arl.unet.addr.AddressAllocRsp")
-AddressResolutionReq = MessageClass("org.arl.unet.addr.AddressResolutionReq")
-AddressResolutionRsp = MessageClass("org.arl.unet.addr.AddressResolutionRsp")
-
-# bb
-BasebandSignal = MessageClass("org.arl.unet.bb.BasebandSignal")
-RecordBasebandSignalReq = MessageClass("org.arl.unet.bb.RecordBasebandSignalReq")
-RxBasebandSignalNtf = MessageClass("org.arl.unet.bb.RxBasebandSignalNtf", BasebandSignal)
-TxBasebandSignalReq = MessageClass("org.arl.unet.bb.TxBasebandSignalReq", BasebandSignal)
-
-# link
-LinkStatusNtf = MessageClass("org.arl.unet.link.LinkStatusNtf")
-
-# localization
-RangeNtf = MessageClass("org.arl.unet.localization.RangeNtf")
-RangeReq = MessageClass("org.arl.unet.localization.RangeReq")
-RespondReq = MessageClass("org.arl.unet.localization.RespondReq")
-InterrogationNtf = MessageClass("org.arl.unet.localization.InterrogationNtf")
-
-# mac
-ReservationAcceptReq = MessageClass("org.arl.unet.mac.ReservationAcceptReq")
-ReservationCancelReq = MessageClass("org.arl.unet.mac.ReservationCancelReq")
-ReservationReq = MessageClass("org.arl.unet.mac.ReservationReq")
-ReservationRsp = MessageClass("org.arl.unet.mac.ReservationRsp")
-ReservationStatusNtf = MessageClass("org.arl.unet.mac.ReservationStatusNtf")
-RxAckNtf = MessageClass("org.arl.unet.mac.RxAckNtf")
-TxAckReq = MessageClass("org.arl.unet.mac.TxAckReq")
-
-# remote
-RemoteFileGetReq = MessageClass("org.arl.unet.remote.RemoteFileGetReq")
-RemoteFileNtf = MessageClass("org.arl.unet.remote.RemoteFileNtf")
-RemoteFilePutReq = MessageClass("org.arl.unet.remote.RemoteFilePutReq")
-RemoteFailureNtf = MessageClass("org.arl.unet.remote.RemoteFailureNtf", DatagramFailureNtf)
-RemoteSuccessNtf = MessageClass("org.arl.unet.remote.RemoteSuccessNtf", DatagramDeliveryNtf)
-RemoteMessageReq = MessageClass("org.arl.unet.remote.RemoteMessageReq", DatagramReq)
-RemoteMessageNtf = MessageClass("org.arl.unet.remote.RemoteMessageNtf", DatagramNtf)
-RemoteTextNtf = MessageClass("org.arl.unet.remote.RemoteTextNtf", RemoteMessageNtf)
-RemoteTextReq = MessageClass("org.arl.unet.remote.RemoteTextReq", RemoteMessageReq)
-RemoteExecReq = MessageClass("org.arl.unet.remote.RemoteExecReq", RemoteMessageReq)
-
-# scheduler
-AddScheduledSleepReq = MessageClass("org.arl.unet.scheduler.AddScheduledSleepReq")
-GetSleepScheduleReq = MessageClass("org.arl.unet.scheduler.GetSleepScheduleReq")
-RemoveScheduledSleepReq = MessageClass("org.arl.unet.scheduler.RemoveScheduledSleepReq")
-SleepScheduleRsp = MessageClass("org.arl.unet.scheduler.SleepScheduleRsp")
-WakeFromSleepNtf = MessageClass("org.arl.unet.scheduler.WakeFromSleepNtf")
-
-# state
-ClearStateReq = MessageClass("org.arl.unet.state.ClearStateReq")
-SaveStateReq = MessageClass("org.arl.unet.state.SaveStateReq")
-
-
-# Build __all__ dynamically from module globals (message classes only)
-# Message class names follow naming conventions: end with Req, Rsp, Ntf, or are BasebandSignal
-_MESSAGE_SUFFIXES = ("Req", "Rsp", "Ntf")
-_MESSAGE_SPECIAL = ("BasebandSignal",)
-
-__all__ = [
-    name for name, obj in list(globals().items())
-    if not name.startswith("_")
-    and isinstance(obj, type)
-    and (name.endswith(_MESSAGE_SUFFIXES) or name in _MESSAGE_SPECIAL)
-]
+from array import array
+from threading import RLock
+from typing import Any, Optional
+
+from fjagepy import Message, MessageClass
+
+# Message classes by name: (fully qualified UnetStack class name, parent message class)
+_MESSAGE_CLASSES: dict[str, tuple[str, Optional[str]]] = {
+    # unet
+    "TestReportNtf": ("org.arl.unet.TestReportNtf", None),
+    "AbnormalTerminationNtf": ("org.arl.unet.AbnormalTerminationNtf", None),
+    "CapabilityListRsp": ("org.arl.unet.CapabilityListRsp", None),
+    "CapabilityReq": ("org.arl.unet.CapabilityReq", None),
+    "ClearReq": ("org.arl.unet.ClearReq", None),
+    "DatagramCancelReq": ("org.arl.unet.DatagramCancelReq", None),
+    "DatagramDeliveryNtf": ("org.arl.unet.DatagramDeliveryNtf", None),
+    "DatagramFailureNtf": ("org.arl.unet.DatagramFailureNtf", None),
+    "DatagramNtf": ("org.arl.unet.DatagramNtf", None),
+    "DatagramProgressNtf": ("org.arl.unet.DatagramProgressNtf", None),
+    "DatagramReq": ("org.arl.unet.DatagramReq", None),
+    "ParamChangeNtf": ("org.arl.unet.ParamChangeNtf", None),
+    "RefuseRsp": ("org.arl.unet.RefuseRsp", None),
+    "FailureNtf": ("org.arl.unet.FailureNtf", None),
+    "DatagramTransmissionNtf": ("org.arl.unet.DatagramTransmissionNtf", None),
+    # net
+    "DatagramTraceReq": ("org.arl.unet.net.DatagramTraceReq", None),
+    "RouteDiscoveryReq": ("org.arl.unet.net.RouteDiscoveryReq", None),
+    "RouteTraceReq": ("org.arl.unet.net.RouteTraceReq", None),
+    "RouteDiscoveryNtf": ("org.arl.unet.net.RouteDiscoveryNtf", None),
+    "RouteTraceNtf": ("org.arl.unet.net.RouteTraceNtf", None),
+    # phy
+    "FecDecodeReq": ("org.arl.unet.phy.FecDecodeReq", None),
+    "RxJanusFrameNtf": ("org.arl.unet.phy.RxJanusFrameNtf", None),
+    "TxJanusFrameReq": ("org.arl.unet.phy.TxJanusFrameReq", None),
+    "BadFrameNtf": ("org.arl.unet.phy.BadFrameNtf", None),
+    "BadRangeNtf": ("org.arl.unet.phy.BadRangeNtf", None),
+    "BeaconReq": ("org.arl.unet.phy.BeaconReq", None),
+    "ClearSyncReq": ("org.arl.unet.phy.ClearSyncReq", None),
+    "CollisionNtf": ("org.arl.unet.phy.CollisionNtf", None),
+    "RxFrameNtf": ("org.arl.unet.phy.RxFrameNtf", "DatagramNtf"),
+    "RxFrameStartNtf": ("org.arl.unet.phy.RxFrameStartNtf", None),
+    "SyncInfoReq": ("org.arl.unet.phy.SyncInfoReq", None),
+    "SyncInfoRsp": ("org.arl.unet.phy.SyncInfoRsp", None),
+    "TxFrameNtf": ("org.arl.unet.phy.TxFrameNtf", "DatagramTransmissionNtf"),
+    "TxFrameReq": ("org.arl.unet.phy.TxFrameReq", "DatagramReq"),
+    "TxFrameStartNtf": ("org.arl.unet.phy.TxFrameStartNtf", None),
+    "TxRawFrameReq": ("org.arl.unet.phy.TxRawFrameReq", None),
+    # addr
+    "AddressAllocReq": ("org.arl.unet.addr.AddressAllocReq", None),
+    "AddressAllocRsp": ("org.arl.unet.addr.AddressAllocRsp", None),
+    "AddressResolutionReq": ("org.arl.unet.addr.AddressResolutionReq", None),
+    "AddressResolutionRsp": ("org.arl.unet.addr.AddressResolutionRsp", None),
+    # bb
+    "BasebandSignal": ("org.arl.unet.bb.BasebandSignal", None),
+    "RecordBasebandSignalReq": ("org.arl.unet.bb.RecordBasebandSignalReq", None),
+    "RxBasebandSignalNtf": ("org.arl.unet.bb.RxBasebandSignalNtf", "BasebandSignal"),
+    "TxBasebandSignalReq": ("org.arl.unet.bb.TxBasebandSignalReq", "BasebandSignal"),
+    # link
+    "LinkStatusNtf": ("org.arl.unet.link.LinkStatusNtf", None),
+    # localization
+    "RangeNtf": ("org.arl.unet.localization.RangeNtf", None),
+    "RangeReq": ("org.arl.unet.localization.RangeReq", None),
+    "RespondReq": ("org.arl.unet.localization.RespondReq", None),
+    "InterrogationNtf": ("org.arl.unet.localization.InterrogationNtf", None),
+    # mac
+    "ReservationAcceptReq": ("org.arl.unet.mac.ReservationAcceptReq", None),
+    "ReservationCancelReq": ("org.arl.unet.mac.ReservationCancelReq", None),
+    "ReservationReq": ("org.arl.unet.mac.ReservationReq", None),
+    "ReservationRsp": ("org.arl.unet.mac.ReservationRsp", None),
+    "ReservationStatusNtf": ("org.arl.unet.mac.ReservationStatusNtf", None),
+    "RxAckNtf": ("org.arl.unet.mac.RxAckNtf", None),
+    "TxAckReq": ("org.arl.unet.mac.TxAckReq", None),
+    # remote
+    "RemoteFileGetReq": ("org.arl.unet.remote.RemoteFileGetReq", None),
+    "RemoteFileNtf": ("org.arl.unet.remote.RemoteFileNtf", None),
+    "RemoteFilePutReq": ("org.arl.unet.remote.RemoteFilePutReq", None),
+    "RemoteFailureNtf": ("org.arl.unet.remote.RemoteFailureNtf", "DatagramFailureNtf"),
+    "RemoteSuccessNtf": ("org.arl.unet.remote.RemoteSuccessNtf", "DatagramDeliveryNtf"),
+    "RemoteMessageReq": ("org.arl.unet.remote.RemoteMessageReq", "DatagramReq"),
+    "RemoteMessageNtf": ("org.arl.unet.remote.RemoteMessageNtf", "DatagramNtf"),
+    "RemoteTextNtf": ("org.arl.unet.remote.RemoteTextNtf", "RemoteMessageNtf"),
+    "RemoteTextReq": ("org.arl.unet.remote.RemoteTextReq", "RemoteMessageReq"),
+    "RemoteExecReq": ("org.arl.unet.remote.RemoteExecReq", "RemoteMessageReq"),
+    # scheduler
+    "AddScheduledSleepReq": ("org.arl.unet.scheduler.AddScheduledSleepReq", None),
+    "GetSleepScheduleReq": ("org.arl.unet.scheduler.GetSleepScheduleReq", None),
+    "RemoveScheduledSleepReq": ("org.arl.unet.scheduler.RemoveScheduledSleepReq", None),
+    "SleepScheduleRsp": ("org.arl.unet.scheduler.SleepScheduleRsp", None),
+    "WakeFromSleepNtf": ("org.arl.unet.scheduler.WakeFromSleepNtf", None),
+    # state
+    "ClearStateReq": ("org.arl.unet.state.ClearStateReq", None),
+    "SaveStateReq": ("org.arl.unet.state.SaveStateReq", None),
+}
+
+__all__ = list(_MESSAGE_CLASSES)
+
+_lock = RLock()
+
+def _as_bytes(data: Any) -> Optional[bytes]:
+    """Convert a sequence of signed or unsigned byte values to bytes, or None if it is not one."""
+    try:
+        return bytes(data)
+    except ValueError:
+        try:
+            return array("b", data).tobytes()
+        except (OverflowError, TypeError):
+            return None
+    except TypeError:
+        return None
+
+
+def _data_bytes(self) -> Optional[bytes]:
+    """Payload of the datagram as bytes, decoded once and then cached.
+
+    fjåge sends byte arrays as signed Java bytes, so negative values are
+    mapped to their unsigned equivalents.
+    """
+    data = self.__dict__.get("data")
+    if data is None:
+        return None
+    cached = self.__dict__.get("_dataBytes")
+    if cached is not None and cached[0] is data:
+        return cached[1]
+    value = _as_bytes(data)
+    if value is None:
+        value = bytes(b & 0xFF for b in data)
+    # underscore fields are not sent on the wire
+    self.__dict__["_dataBytes"] = (data, value)
+    return value
+
+
+
+def __getattr__(name: str) -> type[Message]:
+    # message classes are created on first use, parents first
+    spec = _MESSAGE_CLASSES.get(name)
+    if spec is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _lock:
+        cls = globals().get(name)
+        if cls is None:
+            fqcn, parent = spec
+            cls = MessageClass(fqcn, __getattr__(parent)) if parent is not None else MessageClass(fqcn)
+            if name == "DatagramNtf":
+                # DatagramNtf.dataBytes, also inherited by RxFrameNtf
+                setattr(cls, "dataBytes", property(_data_bytes))
+            globals()[name] = cls
+    return cls
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_MESSAGE_CLASSES))
+
+
+def _inflate(msg: Message) -> Message:
+    """Give a received message its class, if it is one of ours not created yet.
+
+    fjåge inflates messages of classes it does not know yet to a plain
+    Message, so incoming messages are passed through here to get their class
+    even before it is first used.
+    """
+    if type(msg) is Message:
+        clazz = getattr(msg, "__clazz__", "")
+        name = clazz.rsplit(".", 1)[-1]
+        spec = _MESSAGE_CLASSES.get(name)
+        if spec is not None and spec[0] == clazz:
+            msg.__class__ = __getattr__(name)
+    return msg
@@ -0,0 +1,220 @@
+"""Opt-in counters and latency histograms for UnetSocket."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from threading import Lock
+from typing import Any, Optional
+
+__all__ = ["LatencyHistogram", "SocketMetrics"]
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram.
+
+    Observations are in seconds and are counted in cumulative buckets with
+    upper bounds from BUCKETS (plus an implicit +Inf bucket), as in a
+    Prometheus histogram.
+
+    Attributes:
+        count (int): Number of observations.
+        sum (float): Sum of all observations in seconds.
+    """
+
+    BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+               0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+    """Default bucket upper bounds in seconds."""
+
+    def __init__(self, buckets: Optional[tuple[float, ...]] = None) -> None:
+        self.buckets = tuple(sorted(buckets)) if buckets is not None else self.BUCKETS
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """Record one observation.
+
+        Args:
+            seconds: Observed latency in seconds.
+        """
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile from the bucket counts.
+
+        Args:
+            q: Quantile between 0 and 1 (e.g. 0.99).
+
+        Returns:
+            Upper bound of the bucket containing the quantile in seconds, or
+            None if there are no observations. Observations beyond the last
+            bucket are reported as ``float("inf")``.
+        """
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def toDict(self) -> dict[str, Any]:
+        """Export the histogram as a dictionary.
+
+        Returns:
+            Dictionary with ``count``, ``sum``, ``p50``, ``p99`` and cumulative
+            ``buckets`` keyed by upper bound.
+        """
+        cumulative: dict[str, int] = {}
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            cumulative[_format_bound(bound)] = seen
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": cumulative,
+        }
+
+
+class SocketMetrics:
+    """Counters and latency histograms for a UnetSocket.
+
+    Enable with UnetSocket.enableMetrics() and read with
+    UnetSocket.getMetrics(). Collection is thread-safe.
+
+    Counters:
+        sent: datagram requests handed to the gateway.
+        refused: requests refused by the stack.
+        timeout: requests not answered in time.
+        delivered: reliable datagrams acknowledged by the remote node.
+        failed: datagrams that failed after being accepted.
+        received: datagrams returned by receive().
+        dropped: received datagrams discarded (unmatched or queue overflow).
+
+    Histograms (seconds):
+        build: building the request and resolving its service provider.
+        agree: request submission to AGREE/REFUSE.
+        transmit: AGREE to DatagramTransmissionNtf.
+        deliver: request submission to DatagramDeliveryNtf/DatagramFailureNtf.
+        receive_wait: time a received datagram spent queued before receive().
+
+    Example:
+        >>> sock.enableMetrics()
+        >>> sock.send([1, 2, 3], to=31, protocol=Protocol.USER)
+        True
+        >>> sock.getMetrics().toDict()["counters"]["sent"]
+        1
+    """
+
+    COUNTERS = ("sent", "refused", "timeout", "delivered", "failed", "received", "dropped")
+    """Names of the counters."""
+
+    HISTOGRAMS = ("build", "agree", "transmit", "deliver", "receive_wait")
+    """Names of the latency histograms."""
+
+    def __init__(self) -> None:
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.histograms = {name: LatencyHistogram() for name in self.HISTOGRAMS}
+        self._lock = Lock()
+
+    def inc(self, counter: str, n: int = 1) -> None:
+        """Increment a counter.
+
+        Args:
+            counter: Counter name (one of COUNTERS).
+            n: Amount to add (default: 1).
+        """
+        with self._lock:
+            self.counters[counter] += n
+
+    def set(self, counter: str, value: int) -> None:
+        """Set a counter to an absolute value.
+
+        Args:
+            counter: Counter name (one of COUNTERS).
+            value: New counter value.
+        """
+        with self._lock:
+            self.counters[counter] = value
+
+    def observe(self, histogram: str, seconds: float) -> None:
+        """Record a latency observation.
+
+        Args:
+            histogram: Histogram name (one of HISTOGRAMS).
+            seconds: Observed latency in seconds.
+        """
+        with self._lock:
+            self.histograms[histogram].observe(seconds)
+
+    def reset(self) -> None:
+        """Reset all counters and histograms to zero."""
+        with self._lock:
+            self.counters = dict.fromkeys(self.COUNTERS, 0)
+            self.histograms = {name: LatencyHistogram() for name in self.HISTOGRAMS}
+
+    def toDict(self) -> dict[str, Any]:
+        """Export the metrics as a dictionary.
+
+        Returns:
+            Dictionary with ``counters`` and ``histograms`` (see
+            LatencyHistogram.toDict()).
+        """
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": {name: h.toDict() for name, h in self.histograms.items()},
+            }
+
+    def toPrometheus(self, prefix: str = "unetpy_socket", labels: Optional[dict[str, str]] = None) -> str:
+        """Export the metrics in the Prometheus text exposition format.
+
+        Args:
+            prefix: Metric name prefix (default: ``unetpy_socket``).
+            labels: Optional labels added to every sample, e.g.
+                ``{"node": "A"}``.
+
+        Returns:
+            Metrics text, ending with a newline.
+
+        Example:
+            >>> print(sock.getMetrics().toPrometheus(labels={"node": "A"}))
+            # TYPE unetpy_socket_sent_total counter
+            unetpy_socket_sent_total{node="A"} 1
+            ...
+        """
+        base = dict(labels or {})
+        lines = []
+        with self._lock:
+            for name, value in self.counters.items():
+                metric = f"{prefix}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric}{_format_labels(base)} {value}")
+            for name, h in self.histograms.items():
+                metric = f"{prefix}_{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                seen = 0
+                for bound, n in zip(h.buckets + (float("inf"),), h.counts):
+                    seen += n
+                    lines.append(f"{metric}_bucket{_format_labels({**base, 'le': _format_bound(bound)})} {seen}")
+                lines.append(f"{metric}_sum{_format_labels(base)} {h.sum}")
+                lines.append(f"{metric}_count{_format_labels(base)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
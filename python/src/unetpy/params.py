@@ -0,0 +1,248 @@
+"""Parameter access helpers: local parameter mirrors, and bulk reads and writes across nodes."""
+
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional, Sequence, Union
+
+from fjagepy import AgentID, Message, ParameterReq
+
+if TYPE_CHECKING:
+    from .socket import UnetSocket
+
+__all__ = ["ParamMirror", "getParamsAll", "setParamsAll"]
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class ParamMirror:
+    """Local copy of the parameters of an agent.
+
+    A mirror is created by UnetSocket.params(). It is seeded with a single
+    request for all parameters of the agent, and then updated from the
+    ParamChangeNtf notifications the socket receives, so reading a parameter
+    does not need a round trip to the node. Parameters are read and set with
+    the same dot notation as on an AgentID.
+
+    By default mirrored values never expire. With a maximum age, a value
+    that has not been refreshed by a notification or read for longer than
+    that is read from the agent again when it is next accessed. Parameters
+    that were not part of the initial read (such as indexed parameters) are
+    read from the agent on first access.
+
+    Example:
+        >>> phy = sock.params("phy")
+        >>> phy.MTU
+        64
+        >>> phy.powerLevel = -10
+        >>> sock.params("node", maxAge=60).address
+        232
+    """
+
+    def __init__(self, agent: AgentID, request: Callable[[Message], Optional[Message]], maxAge: Optional[float] = None) -> None:
+        object.__setattr__(self, "_agent", agent)
+        object.__setattr__(self, "_request", request)
+        object.__setattr__(self, "_maxAge", maxAge)
+        object.__setattr__(self, "_values", {})
+        object.__setattr__(self, "_seeded", False)
+        object.__setattr__(self, "_lock", Lock())
+
+    def __getattr__(self, param: str) -> Any:
+        if param.startswith("_"):
+            raise AttributeError(param)
+        if not self._seeded:
+            self.refresh()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._values.get(param)
+        if entry is not None and (self._maxAge is None or now - entry[1] <= self._maxAge):
+            return entry[0]
+        return self._read(ParameterReq().get(param), param)
+
+    def __setattr__(self, param: str, value: Any) -> None:
+        if param.startswith("_"):
+            object.__setattr__(self, param, value)
+            return
+        self._read(ParameterReq().set(param, value), param)
+
+    def __repr__(self) -> str:
+        return f"ParamMirror({self._agent.get_name()}, {len(self._values)} params)"
+
+    def getAgent(self) -> AgentID:
+        """Get the agent whose parameters are mirrored.
+
+        Returns:
+            AgentID of the agent.
+        """
+        return self._agent
+
+    def getMaxAge(self) -> Optional[float]:
+        """Get the maximum age of mirrored values.
+
+        Returns:
+            Maximum age in seconds, or None if values never expire.
+        """
+        return self._maxAge
+
+    def setMaxAge(self, maxAge: Optional[float]) -> None:
+        """Set the maximum age of mirrored values.
+
+        Args:
+            maxAge: Maximum age in seconds, after which a value is read from
+                the agent again, or None to rely on notifications only.
+                A maximum age of 0 reads every value from the agent.
+        """
+        if maxAge is not None and maxAge < 0:
+            logger.error(f"Invalid maximum parameter age {maxAge}")
+            return
+        object.__setattr__(self, "_maxAge", maxAge)
+
+    def refresh(self) -> bool:
+        """Read all parameters of the agent in a single request.
+
+        Values updated by a notification while the request was in flight
+        are kept, as they are newer than the response.
+
+        Returns:
+            True on success, False if the agent did not respond.
+        """
+        t0 = time.monotonic()
+        rsp = self._send(ParameterReq())
+        if rsp is None or "param" not in rsp.__dict__:
+            logger.error(f"Unable to read parameters of {self._agent.get_name()}")
+            return False
+        now = time.monotonic()
+        with self._lock:
+            for param, value in rsp.parameters().items():
+                key = _short(param)
+                entry = self._values.get(key)
+                if entry is None or entry[1] < t0:
+                    self._values[key] = (value, now)
+            object.__setattr__(self, "_seeded", True)
+        return True
+
+    def invalidate(self) -> None:
+        """Discard all mirrored values, so they are read again on next access."""
+        with self._lock:
+            self._values.clear()
+            object.__setattr__(self, "_seeded", False)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Get the mirrored values without contacting the agent.
+
+        Returns:
+            Dictionary of parameter names to their last known values.
+        """
+        with self._lock:
+            return {param: entry[0] for param, entry in self._values.items()}
+
+## Internal helper methods
+
+    def _update(self, values: dict[str, Any]) -> None:
+        # called with the paramValues of a ParamChangeNtf from the agent
+        now = time.monotonic()
+        with self._lock:
+            for param, value in values.items():
+                self._values[_short(param)] = (value, now)
+
+    def _send(self, req: ParameterReq) -> Optional[Message]:
+        req.recipient = self._agent
+        return self._request(req)
+
+    def _read(self, req: ParameterReq, param: str) -> Any:
+        rsp = self._send(req)
+        if rsp is None or "param" not in rsp.__dict__ or "value" not in rsp.__dict__:
+            return None
+        value = rsp.__dict__.get("value", None)
+        with self._lock:
+            self._values[param] = (value, time.monotonic())
+        return value
+
+
+def getParamsAll(
+    sockets: Sequence["UnetSocket"],
+    agentId: Union[AgentID, str],
+    params: Iterable[str],
+    index: int = -1,
+    maxWorkers: int = 16,
+) -> list[dict[str, Any]]:
+    """Read parameters of an agent on many nodes concurrently.
+
+    Each node is sent a single request for all the parameters (see
+    UnetSocket.getParams()), and up to maxWorkers nodes are queried at a
+    time, so the total time is close to that of the slowest node.
+
+    Args:
+        sockets: Sockets connected to the nodes.
+        agentId: Name of the agent (or its AgentID) on each node.
+        params: Parameter names.
+        index: Index for indexed parameters (default: -1, not indexed).
+        maxWorkers: Maximum number of nodes queried at a time (default: 16).
+
+    Returns:
+        One row per socket, in order, with the ``socket``, its local
+        ``address`` and the parameter ``values`` read (None if the request
+        failed).
+
+    Example:
+        >>> for row in getParamsAll(sockets, "phy", ["MTU", "busy"]):
+        ...     print(row["address"], row["values"])
+    """
+    names = list(params)
+    return _fanOut(sockets, lambda sock: sock.getParams(agentId, names, index), maxWorkers)
+
+
+def setParamsAll(
+    sockets: Sequence["UnetSocket"],
+    agentId: Union[AgentID, str],
+    values: dict[str, Any],
+    index: int = -1,
+    maxWorkers: int = 16,
+) -> list[dict[str, Any]]:
+    """Set parameters of an agent on many nodes concurrently.
+
+    Each node is sent a single request for all the parameters (see
+    UnetSocket.setParams()), and up to maxWorkers nodes are configured at
+    a time.
+
+    Args:
+        sockets: Sockets connected to the nodes.
+        agentId: Name of the agent (or its AgentID) on each node.
+        values: Dictionary of parameter names to new values.
+        index: Index for indexed parameters (default: -1, not indexed).
+        maxWorkers: Maximum number of nodes configured at a time (default: 16).
+
+    Returns:
+        One row per socket, in order, with the ``socket``, its local
+        ``address`` and the ``values`` reported back by the agent (None if
+        the request failed).
+
+    Example:
+        >>> rows = setParamsAll(sockets, "phy", {"powerLevel": -10}, index=1)
+        >>> failed = [row["address"] for row in rows if row["values"] is None]
+    """
+    return _fanOut(sockets, lambda sock: sock.setParams(agentId, values, index), maxWorkers)
+
+
+def _fanOut(sockets: Sequence["UnetSocket"], op: Callable[["UnetSocket"], Optional[dict[str, Any]]], maxWorkers: int) -> list[dict[str, Any]]:
+    def row(sock: "UnetSocket") -> dict[str, Any]:
+        try:
+            values = op(sock)
+        except Exception:
+            logger.error(f"Error accessing parameters through {sock}", exc_info=True)
+            values = None
+        return {"socket": sock, "address": sock.localAddress, "values": values}
+
+    if not sockets:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(maxWorkers, len(sockets)))) as executor:
+        return list(executor.map(row, sockets))
+
+
+def _short(param: str) -> str:
+    # parameters are named by their fully qualified enum name, e.g. org.arl.unet.phy.PhysicalParam.MTU
+    return param.split(".")[-1]
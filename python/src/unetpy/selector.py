@@ -0,0 +1,188 @@
+"""Readiness multiplexing across many UnetSockets."""
+
+from __future__ import annotations
+
+import logging
+import time
+from functools import partial
+from threading import Condition
+from typing import Callable, Iterable, Optional
+
+from .socket import UnetSocket
+
+__all__ = ["UnetSelector", "select"]
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class UnetSelector:
+    """Wait for datagrams on many UnetSockets from a single thread.
+
+    Sockets registered with a selector are watched for incoming datagrams
+    that match their bound protocol. select() blocks until at least one of
+    them has a datagram ready to receive(), and readiness callbacks can be
+    used instead of (or in addition to) select() to react as soon as a
+    datagram arrives.
+
+    A closed socket is always reported as ready, since receive() returns
+    immediately on it.
+
+    Example:
+        Servicing a fleet of modems from one thread::
+
+            from unetpy import UnetSelector, UnetSocket, Protocol
+
+            sockets = [UnetSocket(host, 1100) for host in hosts]
+            with UnetSelector() as selector:
+                for sock in sockets:
+                    sock.bind(Protocol.USER)
+                    selector.register(sock)
+                while True:
+                    for sock in selector.select(5000):
+                        ntf = sock.receive(0)
+                        if ntf:
+                            print(f"From: {ntf.from_}, Data: {ntf.data}")
+    """
+
+    def __init__(self) -> None:
+        """Create a new selector with no registered sockets."""
+        self._sockets: dict[UnetSocket, Optional[Callable[[UnetSocket], None]]] = {}
+        self._watchers: dict[UnetSocket, Callable[[], None]] = {}
+        self._ready = Condition()
+
+    def __enter__(self) -> "UnetSelector":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def register(self, sock: UnetSocket, callback: Optional[Callable[[UnetSocket], None]] = None) -> bool:
+        """Watch a socket for incoming datagrams.
+
+        Registering an already registered socket replaces its callback.
+
+        Args:
+            sock: Socket to watch.
+            callback: Optional readiness callback, called with the socket
+                whenever a datagram for it arrives. Callbacks run on the
+                socket's background dispatcher thread and must not block.
+
+        Returns:
+            True on success, False if the socket is closed.
+
+        Example:
+            >>> selector.register(sock, lambda s: print(s.receive(0)))
+            True
+        """
+        if sock.isClosed():
+            logger.error("Cannot register a closed socket with the selector.")
+            return False
+        with self._ready:
+            self._sockets[sock] = callback
+            if sock not in self._watchers:
+                watcher = partial(self._on_activity, sock)
+                self._watchers[sock] = watcher
+                sock._connection.watchers.append(watcher)
+            self._ready.notify_all()
+        if callback is not None and sock._readable():
+            self._callback(sock, callback)
+        return True
+
+    def unregister(self, sock: UnetSocket) -> None:
+        """Stop watching a socket.
+
+        Args:
+            sock: Socket to stop watching. Ignored if not registered.
+        """
+        with self._ready:
+            self._sockets.pop(sock, None)
+            watcher = self._watchers.pop(sock, None)
+        if watcher is not None and watcher in sock._connection.watchers:
+            sock._connection.watchers.remove(watcher)
+
+    def getSockets(self) -> list[UnetSocket]:
+        """Get the registered sockets.
+
+        Returns:
+            List of registered sockets.
+        """
+        with self._ready:
+            return list(self._sockets)
+
+    def select(self, timeout: Optional[int] = None) -> list[UnetSocket]:
+        """Wait until at least one registered socket has a datagram ready.
+
+        Args:
+            timeout: Timeout in milliseconds. Waits indefinitely if None or
+                BLOCKING, and returns immediately if NON_BLOCKING (0).
+
+        Returns:
+            List of ready sockets, in registration order. Empty on timeout or
+            if no sockets are registered.
+
+        Example:
+            >>> for sock in selector.select(1000):
+            ...     print(sock.receive(0))
+        """
+        deadline = None
+        if timeout is not None and timeout >= 0:
+            deadline = time.monotonic() + timeout / 1000
+        with self._ready:
+            while self._sockets:
+                ready = [sock for sock in self._sockets if sock._readable()]
+                if ready:
+                    return ready
+                if deadline is None:
+                    self._ready.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._ready.wait(remaining)
+        return []
+
+    def close(self) -> None:
+        """Unregister all sockets. The sockets themselves are not closed."""
+        for sock in self.getSockets():
+            self.unregister(sock)
+        with self._ready:
+            self._ready.notify_all()
+
+## Internal helper methods
+
+    def _on_activity(self, sock: UnetSocket) -> None:
+        with self._ready:
+            callback = self._sockets.get(sock)
+            self._ready.notify_all()
+        if callback is not None and sock._readable():
+            self._callback(sock, callback)
+
+    def _callback(self, sock: UnetSocket, callback: Callable[[UnetSocket], None]) -> None:
+        try:
+            callback(sock)
+        except Exception:
+            logger.error(f"Error in readiness callback for {sock}", exc_info=True)
+
+
+def select(sockets: Iterable[UnetSocket], timeout: Optional[int] = None) -> list[UnetSocket]:
+    """Wait until at least one of the given sockets has a datagram ready.
+
+    Convenience wrapper around a temporary UnetSelector. Use a UnetSelector
+    directly to wait on the same sockets repeatedly.
+
+    Args:
+        sockets: Sockets to wait on.
+        timeout: Timeout in milliseconds. Waits indefinitely if None or
+            BLOCKING, and returns immediately if NON_BLOCKING (0).
+
+    Returns:
+        List of ready sockets. Empty on timeout.
+
+    Example:
+        >>> ready = unetpy.select([sock1, sock2], 1000)
+    """
+    with UnetSelector() as selector:
+        for sock in sockets:
+            selector.register(sock)
+        return selector.select(timeout)
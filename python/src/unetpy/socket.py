@@ -2,61 +2,618 @@
 
 from __future__ import annotations
 
+import base64
+import heapq
 import logging
+import time
+from collections import OrderedDict, deque
+from enum import Enum
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
 from math import isnan
-from threading import Thread
-from typing import Any, Iterable, Optional, Sequence, Union, Callable
+from queue import Empty, SimpleQueue
+from threading import Condition, Event, Lock, Thread, current_thread
+from typing import Any, Iterable, Iterator, Optional, Sequence, Union, Callable
 
-from fjagepy import AgentID, Gateway, Message, Performative
+from fjagepy import AgentID, Gateway, JSONMessage, Message, ParameterReq, Performative
+from fjagepy.Utils import UUID7
 from .constants import Protocol, Services, Topics, Address, Priority, Robustness
 from .messages import (
+    AbnormalTerminationNtf,
     AddressResolutionReq,
     DatagramDeliveryNtf,
+    DatagramFailureNtf,
     DatagramNtf,
     DatagramReq,
     RemoteMessageReq,
     ParamChangeNtf,
-    DatagramTransmissionNtf
+    DatagramTransmissionNtf,
+    _as_bytes,
+    _inflate,
 )
+from .metrics import SocketMetrics
+from .params import ParamMirror, _short
 
 __all__ = ["UnetSocket"]
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
-class UnetSocket:
-    """High-level socket interface for UnetStack communication.
+# Maximum number of received datagrams queued per (protocol, destination).
+# Matches the fjagepy Gateway queue size; the oldest datagram is dropped when full.
+_MAX_QUEUE_SIZE = 512
 
-    UnetSocket provides a socket-like API for sending and receiving datagrams
-    through UnetStack nodes. It handles subscriptions, default addresses, and
-    blocking receives on top of fjåge's Gateway.
+# Receive timeout in milliseconds for the dispatcher when it has to poll the Gateway.
+_POLL_INTERVAL = 100
 
-    Attributes:
-        gw (Gateway): Underlying fjåge Gateway instance.
-        localProtocol (int): Bound protocol number (-1 if unbound).
-        remoteAddress (int): Default destination address (-1 if not connected).
-        remoteProtocol (int): Default protocol for sending.
-        timeout (int): Receive timeout in milliseconds.
+class _Dispatcher:
+    """Background thread that pulls messages off a Gateway and routes them.
 
-    Example:
-        Basic usage with context manager::
+    Replies are routed by ``inReplyTo`` to the handler registered with
+    expect() for the request. Other messages go to the first handler added
+    with addHandler() whose predicate accepts them. Messages nobody accepts
+    are left to the Gateway, for its receive() callers or queue. Handlers
+    run on the dispatcher thread and must not block.
 
-            from unetpy import UnetSocket, Protocol
+    Where the fjagepy Gateway hands incoming messages to ``_send_receivers``
+    (fjagepy 2.x), the dispatcher takes the messages it accepts from there
+    into its own inbox. Otherwise it falls back to polling the public
+    receive() with a short timeout.
 
-            with UnetSocket("localhost", 1100) as sock:
-                sock.bind(Protocol.USER)
-                sock.send([1, 2, 3], to=31, protocol=Protocol.USER)
+    A reply handler registered with a timeout is called with None if no
+    reply arrives in time, and all outstanding reply handlers are called
+    with None when the dispatcher is stopped.
+    """
 
-                sock.setTimeout(5000)
-                ntf = sock.receive()
-                if ntf:
-                    print(f"Received: {ntf.data}")
+    def __init__(self, gw: Gateway) -> None:
+        self.gw = gw
+        self._replies: dict[str, Callable[[Optional[Message]], None]] = {}
+        self._handlers: list[tuple[Callable[[Message], bool], Callable[[Any], None]]] = []
+        self._deadlines: list[tuple[float, str, Callable[[Optional[Message]], None]]] = []
+        self._lock = Condition()
+        self._wake = Event()
+        self._inbox: deque[Message] = deque()
+        self._deliver: Optional[Callable[[Message], bool]] = None
+        self._running = False
+        self._thread = Thread(target=self._run, name="unetpy-dispatcher", daemon=True)
+        self._reaper = Thread(target=self._expire, name="unetpy-dispatcher-timeouts", daemon=True)
+
+    def start(self) -> None:
+        self._running = True
+        # A blocking gw.receive() checks the gateway queue and then registers
+        # for new messages non-atomically, so a message arriving in between is
+        # stranded in the queue. fjagepy has no public hook for incoming
+        # messages, so wrap the one its receive thread hands them to and keep
+        # the messages we accept in our own inbox.
+        if hasattr(self.gw, "_send_receivers"):
+            self._deliver = getattr(self.gw, "_send_receivers")
+            setattr(self.gw, "_send_receivers", self._offer)
+        self._thread.start()
+        self._reaper.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        if not self._running:
+            return
+        self._running = False
+        if self._deliver is not None:
+            setattr(self.gw, "_send_receivers", self._deliver)
+        with self._lock:
+            pending = list(self._replies.values())
+            self._replies.clear()
+            self._deadlines.clear()
+            self._lock.notify_all()
+        for handler in pending:
+            self._call(handler, None)
+        self._wake.set()
+        if current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+    def expect(self, req: Message, handler: Callable[[Optional[Message]], None], timeout: Optional[int] = None) -> None:
+        with self._lock:
+            self._replies[req.msgID] = handler
+            if timeout is not None and timeout >= 0:
+                heapq.heappush(self._deadlines, (time.monotonic() + timeout / 1000, req.msgID, handler))
+                self._lock.notify()
+
+    def forget(self, req: Message) -> None:
+        with self._lock:
+            self._replies.pop(req.msgID, None)
+
+    def addHandler(self, predicate: Callable[[Message], bool], handler: Callable[[Any], None]) -> None:
+        self._handlers.append((predicate, handler))
+
+    def _route(self, msg: Message) -> Optional[Callable[[Any], None]]:
+        _inflate(msg)
+        inReplyTo = getattr(msg, "inReplyTo", None)
+        if inReplyTo is not None:
+            handler = self._replies.get(inReplyTo, None)
+            if handler is not None:
+                return handler
+        for predicate, handler in self._handlers:
+            if predicate(msg):
+                return handler
+        return None
+
+    def _accept(self, msg: Message) -> bool:
+        return self._route(msg) is not None
+
+    def _offer(self, msg: Message) -> bool:
+        # called on the gateway's receive thread; True if the message was consumed
+        _inflate(msg)
+        if self._deliver is not None and self._deliver(msg):
+            return True
+        if not self._running or not self._accept(msg):
+            return False
+        self._inbox.append(msg)
+        self._wake.set()
+        return True
+
+    def _call(self, handler: Callable, msg: Optional[Message]) -> None:
+        try:
+            handler(msg)
+        except Exception:
+            logger.error(f"Error handling {msg} in dispatcher thread", exc_info=True)
+
+    def _next(self) -> Optional[Message]:
+        if self._deliver is None:
+            # no hook: a message stranded by receive() waits at most one poll
+            return self.gw.receive(self._accept, _POLL_INTERVAL)
+        while self._running:
+            self._wake.clear()
+            if self._inbox:
+                return self._inbox.popleft()
+            self._wake.wait()
+        return None
+
+    def _run(self) -> None:
+        # messages that reached the gateway queue before the hook was installed
+        while self._running:
+            msg = self.gw.receive(self._accept, Gateway.NON_BLOCKING)
+            if msg is None:
+                break
+            self._dispatch(msg)
+        while self._running:
+            msg = self._next()
+            if msg is not None and self._running:
+                self._dispatch(msg)
+
+    def _dispatch(self, msg: Message) -> None:
+        handler = self._route(msg)
+        if handler is not None:
+            self._call(handler, msg)
+
+    def _expire(self) -> None:
+        while True:
+            with self._lock:
+                if not self._running:
+                    return
+                if not self._deadlines:
+                    self._lock.wait()
+                    continue
+                deadline, msgID, handler = self._deadlines[0]
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    self._lock.wait(delay)
+                    continue
+                heapq.heappop(self._deadlines)
+                # only expire if the handler is still waiting for its first reply
+                if self._replies.get(msgID) is not handler:
+                    continue
+                del self._replies[msgID]
+            self._call(handler, None)
+
+
+class _DatagramQueues:
+    """Received datagrams demultiplexed into per-(protocol, destination) queues.
+
+    Datagrams for reserved protocols or for other nodes are discarded by
+    put(), so only traffic a socket could ever receive is kept. Each queue
+    is bounded and drops its oldest datagram when full. Discarded datagrams
+    are counted by reason in ``discarded``. Not thread-safe; callers
+    serialize access.
+    """
+
+    # reasons for discarding a datagram
+    DISCARD_REASONS = ("unmatched", "unbound", "overflow", "readdressed")
+
+    def __init__(self, maxlen: int = _MAX_QUEUE_SIZE) -> None:
+        self.maxlen = maxlen
+        self.discarded = dict.fromkeys(self.DISCARD_REASONS, 0)
+        self._queues: dict[tuple[int, int], deque[tuple[int, float, Message]]] = {}
+        self._seq = 0
+
+    @staticmethod
+    def accepts(ntf: Optional[Message], localAddress: Optional[int]) -> bool:
+        if ntf is None or not isinstance(ntf, DatagramNtf):
+            return False
+        to = getattr(ntf, "to", -1)
+        if to != localAddress and to != Address.BROADCAST:
+            return False
+        proto = getattr(ntf, "protocol", Protocol.DATA)
+        return proto == Protocol.DATA or proto >= Protocol.USER
+
+    @property
+    def dropped(self) -> int:
+        return sum(self.discarded.values())
+
+    def put(self, ntf: Message, localAddress: Optional[int]) -> bool:
+        if not self.accepts(ntf, localAddress):
+            logger.debug("Discarding unmatched datagram %s", ntf)
+            self.discarded["unmatched"] += 1
+            return False
+        key = (getattr(ntf, "protocol", Protocol.DATA), ntf.to)
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque(maxlen=self.maxlen)
+        if len(queue) == queue.maxlen:
+            self.discarded["overflow"] += 1
+        self._seq += 1
+        queue.append((self._seq, time.monotonic(), ntf))
+        return True
+
+    def pop(self, localAddress: Optional[int], protocol: int) -> Optional[Message]:
+        entry = self.popEntry(localAddress, protocol)
+        return entry[1] if entry is not None else None
+
+    def popEntry(self, localAddress: Optional[int], protocol: int) -> Optional[tuple[float, Message]]:
+        # (arrival time, datagram) for the oldest matching datagram
+        queue = self._oldest(localAddress, protocol)
+        if queue is None:
+            return None
+        _, arrived, ntf = queue.popleft()
+        return arrived, ntf
+
+    def peek(self, localAddress: Optional[int], protocol: int) -> bool:
+        return self._oldest(localAddress, protocol) is not None
+
+    def _oldest(self, localAddress: Optional[int], protocol: int) -> Optional[deque]:
+        # queue with the oldest datagram across the unicast and broadcast queues for the protocol(s)
+        if protocol >= 0:
+            keys: Iterable[tuple[int, int]] = ((protocol, localAddress), (protocol, Address.BROADCAST))  # type: ignore
+        else:
+            keys = [k for k in self._queues if k[1] == localAddress or k[1] == Address.BROADCAST]
+        oldest = None
+        for key in keys:
+            queue = self._queues.get(key)
+            if queue and (oldest is None or queue[0][0] < oldest[0][0]):
+                oldest = queue
+        return oldest
+
+    def retain(self, localAddress: Optional[int]) -> None:
+        for key in [k for k in self._queues if k[1] != localAddress and k[1] != Address.BROADCAST]:
+            self.discarded["readdressed"] += len(self._queues.pop(key))
+
+    def clear(self) -> None:
+        self._queues.clear()
+
+
+class _ReceiveHandler:
+    """Runs a socket's onReceive() callback for the datagrams it matches.
+
+    Datagrams are offered by the dispatcher thread and run on an executor,
+    or on an asyncio event loop, with at most ``maxConcurrency`` callbacks
+    in progress. Datagrams waiting for a free slot are kept in a bounded
+    backlog. If ordered, datagrams from the same source node are handled
+    one at a time in arrival order.
+    """
+
+    def __init__(
+        self,
+        sock: "UnetSocket",
+        callback: Callable[[Message], Any],
+        protocol: Optional[int],
+        executor: Any,
+        maxConcurrency: int,
+        ordered: bool,
+    ) -> None:
+        self.sock = sock
+        self.callback = callback
+        self.protocol = protocol
+        self.maxConcurrency = maxConcurrency
+        self.ordered = ordered
+        self.dropped = 0
+        self._owned = executor is None
+        self._executor: Any = ThreadPoolExecutor(maxConcurrency, thread_name_prefix="unetpy-receive") if executor is None else executor
+        # an asyncio event loop, recognized without importing asyncio
+        self._loop = hasattr(self._executor, "call_soon_threadsafe")
+        self._backlog: deque[tuple[float, Message]] = deque()
+        self._busy: set[Any] = set()
+        self._running = 0
+        self._closed = False
+        self._lock = Lock()
+
+    def accepts(self, ntf: Message, localAddress: Optional[int]) -> bool:
+        # the matching of receive(), against this handler's protocol if it has one
+        if not _DatagramQueues.accepts(ntf, localAddress):
+            return False
+        protocol = self.sock.localProtocol if self.protocol is None else self.protocol
+        return protocol < 0 or protocol == getattr(ntf, "protocol", Protocol.DATA)
+
+    def offer(self, ntf: Message) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            if len(self._backlog) >= _MAX_QUEUE_SIZE:
+                self._backlog.popleft()
+                self.dropped += 1
+            self._backlog.append((time.monotonic(), ntf))
+            self._schedule()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self.dropped += len(self._backlog)
+            self._backlog.clear()
+        if self._owned:
+            self._executor.shutdown(wait=False)
+
+    def _schedule(self) -> None:
+        # called with _lock held
+        while self._running < self.maxConcurrency and self._backlog:
+            entry = self._next()
+            if entry is None:
+                return
+            self._running += 1
+            if self.ordered:
+                self._busy.add(getattr(entry[1], "from_", None))
+            try:
+                if self._loop:
+                    self._executor.call_soon_threadsafe(self._start, entry)
+                else:
+                    self._executor.submit(self._run, entry)
+            except RuntimeError:
+                logger.error("Receive callback executor is not accepting work", exc_info=True)
+                self._release(entry[1])
+                self.dropped += 1
+                return
+
+    def _next(self) -> Optional[tuple[float, Message]]:
+        if not self.ordered:
+            return self._backlog.popleft()
+        for i, entry in enumerate(self._backlog):
+            if getattr(entry[1], "from_", None) not in self._busy:
+                del self._backlog[i]
+                return entry
+        return None
+
+    def _start(self, entry: tuple[float, Message]) -> None:
+        # on the event loop: coroutine callbacks run as tasks, and hold their slot until done
+        result = self._call(entry)
+        if result is not None and hasattr(result, "__await__"):
+            import asyncio
+            task = asyncio.ensure_future(result)
+            task.add_done_callback(lambda t: self._done(entry[1], t))
+            return
+        self._finished(entry[1])
+
+    def _run(self, entry: tuple[float, Message]) -> None:
+        self._call(entry)
+        self._finished(entry[1])
+
+    def _call(self, entry: tuple[float, Message]) -> Any:
+        queued, ntf = entry
+        self.sock._received(ntf, queued)
+        try:
+            return self.callback(ntf)
+        except Exception:
+            logger.error(f"Error in receive callback for {ntf}", exc_info=True)
+            return None
+
+    def _done(self, ntf: Message, task: Any) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error in receive callback for {ntf}", exc_info=task.exception())
+        self._finished(ntf)
+
+    def _finished(self, ntf: Message) -> None:
+        with self._lock:
+            self._release(ntf)
+            if not self._closed:
+                self._schedule()
+
+    def _release(self, ntf: Message) -> None:
+        # called with _lock held
+        self._running -= 1
+        self._busy.discard(getattr(ntf, "from_", None))
+
+
+_MISSING = object()
+
+# fjagepy Gateway internals used by _find_agents()
+_LOOKUP_INTERNALS = ("_pending_actions", "_msg_tx", "_directory_timeout")
+
+
+def _find_agents(gw: Gateway, svc: Any, many: bool = False) -> Any:
+    # The agent (or all agents, if many) providing a service, uncached. Same as
+    # gw.agentForService() or gw.agentsForService(), but holding on to the reply
+    # channel: fjagepy looks it up again after sending the request, and fails
+    # with KeyError if the reply has already been handled by then. Gateways
+    # without these internals get the public lookups.
+    if isinstance(svc, Enum):
+        svc = svc.value
+    if not all(hasattr(gw, name) for name in _LOOKUP_INTERNALS):
+        return gw.agentsForService(svc) if many else gw.agentForService(svc)
+    req = JSONMessage.createAgentsForService(svc) if many else JSONMessage.createAgentForService(svc)
+    reply: SimpleQueue = SimpleQueue()
+    pending = getattr(gw, "_pending_actions")
+    pending[req.id] = reply
+    try:
+        getattr(gw, "_msg_tx")(req)
+        rsp = reply.get(timeout=getattr(gw, "_directory_timeout") / 1000)
+    except Empty:
+        logger.warning(f"Timed out looking up agents for service {svc}")
+        rsp = None
+    finally:
+        pending.pop(req.id, None)
+    if many:
+        agents = getattr(rsp, "agentIDs", None)
+        return agents if isinstance(agents, list) else []
+    agent = getattr(rsp, "agentID", None)
+    return agent if isinstance(agent, AgentID) else None
+
+
+class _Payload(Sequence[int]):
+    """Datagram payload kept as a byte buffer until it is encoded for the wire.
+
+    fjagepy encodes message fields with a to_json() method by calling it, so
+    the payload is only encoded while the request is being sent: as a list
+    of ints, or as a base64 encoded byte array if compact. It compares equal
+    to the bytes or list of ints it holds.
+    """
+
+    __slots__ = ("view", "compact")
+
+    def __init__(self, view: memoryview, compact: bool = False) -> None:
+        self.view = view
+        self.compact = compact
+
+    def to_json(self) -> Union[list[int], dict[str, str]]:
+        if self.compact:
+            return {"clazz": "[B", "data": base64.b64encode(self.view).decode("ascii")}
+        return self.view.tolist()
+
+    def __len__(self) -> int:
+        return self.view.nbytes
+
+    def __getitem__(self, index):  # type: ignore[override]
+        return self.view[index]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.view)
+
+    def __bytes__(self) -> bytes:
+        return self.view.tobytes()
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, _Payload):
+            return self.view == other.view
+        if isinstance(other, list):
+            return self.view.tolist() == other
+        try:
+            return self.view == memoryview(other)  # type: ignore[arg-type]
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"<{self.view.nbytes} bytes>"
+
+
+class _ServiceCache:
+    """Cached service directory lookups.
+
+    Lookups are cached until invalidate() is called when an agent
+    terminates (see Topics.LIFECYCLE). Services that were not found are
+    cached only for NEGATIVE_TTL seconds, since the directory cannot tell
+    a missing service from a lookup that timed out, and agents may start
+    later without notice.
+    """
+
+    NEGATIVE_TTL = 5.0
+
+    def __init__(self) -> None:
+        self.generation = 0
+        self._entries: dict[tuple[Any, bool], tuple[Any, float]] = {}
+        self._lock = Lock()
+
+    def get(self, svc: Any, many: bool) -> Any:
+        with self._lock:
+            entry = self._entries.get((svc, many))
+        if entry is None or entry[1] < time.monotonic():
+            return _MISSING
+        return list(entry[0]) if many else entry[0]
+
+    def put(self, svc: Any, many: bool, value: Any, generation: int) -> None:
+        # a lookup that raced with invalidate() may have seen the old directory
+        found = bool(value) if many else value is not None
+        expiry = float("inf") if found else time.monotonic() + self.NEGATIVE_TTL
+        with self._lock:
+            if generation == self.generation:
+                self._entries[(svc, many)] = (list(value) if many and value is not None else value, expiry)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+class _AddressCache:
+    """LRU cache of node name to address resolutions, with a reverse map.
+
+    Resolved names expire after ttl seconds, and names the node could not
+    resolve after negativeTtl seconds. Lookups that timed out are not
+    cached. The least recently used names are evicted beyond maxSize.
     """
 
+    def __init__(self, maxSize: int, ttl: float, negativeTtl: float) -> None:
+        self.maxSize = maxSize
+        self.ttl = ttl
+        self.negativeTtl = negativeTtl
+        self._entries: OrderedDict[str, tuple[Optional[int], float]] = OrderedDict()
+        self._names: dict[int, str] = {}
+        self._lock = Lock()
+
+    def get(self, name: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return _MISSING
+            if entry[1] < time.monotonic():
+                self._remove(name)
+                return _MISSING
+            self._entries.move_to_end(name)
+            return entry[0]
+
+    def put(self, name: str, address: Optional[int]) -> None:
+        if self.maxSize <= 0:
+            return
+        expiry = time.monotonic() + (self.ttl if address is not None else self.negativeTtl)
+        with self._lock:
+            self._remove(name)
+            self._entries[name] = (address, expiry)
+            if address is not None:
+                self._names[address] = name
+            while len(self._entries) > self.maxSize:
+                self._remove(next(iter(self._entries)))
+
+    def name(self, address: int) -> Optional[str]:
+        with self._lock:
+            name = self._names.get(address)
+        if name is None or self.get(name) != address:
+            return None
+        return name
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._names.clear()
+
+    def _remove(self, name: str) -> None:
+        # called with _lock held
+        entry = self._entries.pop(name, None)
+        if entry is not None and entry[0] is not None and self._names.get(entry[0]) == name:
+            del self._names[entry[0]]
+
+
+class _UnetSocketBase:
+    """Socket configuration and request building shared by UnetSocket and AsyncUnetSocket."""
+
     # Bounded wait for a request AGREE/response (e.g. datagram acceptance, parameter
     # reads). Matches the Java/Groovy UnetSocket.REQUEST_TIMEOUT.
     REQUEST_TIMEOUT = 5000
 
+    DELIVERY_TIMEOUT = 120000
+    """Time in milliseconds to wait, after a send is accepted, for the notification
+    that completes a blocking or reliable send. Reliable delivery can take a while,
+    so this is much longer than REQUEST_TIMEOUT. Set to BLOCKING to wait indefinitely."""
+
+    HOST_CACHE_SIZE = 256
+    """Maximum number of node names cached by host() and hosts(). Set to 0,
+    before the socket is created, to disable caching."""
+
+    HOST_CACHE_TTL = 600.0
+    """Time in seconds for which a resolved node address is cached."""
+
+    HOST_CACHE_NEGATIVE_TTL = 10.0
+    """Time in seconds for which a node name that could not be resolved is cached."""
+
     NON_BLOCKING = 0
     """When used as a timeout value, indicates a non-blocking receive().
     If data is available, it is returned immediately, otherwise returns None.
@@ -83,6 +640,43 @@ class UnetSocket:
     Not a valid timeout value for receive().
     """
 
+    DROP_OLDEST = "oldest"
+    """Buffer policy for datagrams(): when the buffer is full, discard the
+    oldest buffered datagram to make room for a new one."""
+
+    DROP_NEWEST = "newest"
+    """Buffer policy for datagrams(): when the buffer is full, discard newly
+    arriving datagrams until there is room again."""
+
+    LIST_ENCODING = "list"
+    """Payload encoding: send datagram payloads as JSON arrays of integers,
+    which every UnetStack version accepts."""
+
+    BASE64_ENCODING = "base64"
+    """Payload encoding: send datagram payloads as base64 encoded byte
+    arrays, the compact array encoding of the fjåge JSON protocol."""
+
+    PARAM_CHANGE_WORKERS = 4
+    """Number of worker threads running the parameter change callbacks of a UnetSocket."""
+
+    SUBSCRIBE_ALL = "all"
+    """Subscription profile: receive datagrams from every topic they may be
+    published on, as for any protocol (default)."""
+
+    SUBSCRIBE_BOUND = "bound"
+    """Subscription profile: only receive datagrams for the bound protocol,
+    discarding others as they arrive (needs UnetStack 5.2 or newer)."""
+
+    # services to send plain datagrams through, in order of preference
+    _PROVIDER_SERVICES = (
+        Services.REMOTE,
+        Services.TRANSPORT,
+        Services.ROUTING,
+        Services.LINK,
+        Services.PHYSICAL,
+        Services.DATAGRAM,
+    )
+
     sendMode: int
     localProtocol: int
     remoteAddress: int
@@ -98,30 +692,19 @@ class UnetSocket:
     messageClass: Optional[str]
     remoteRecipient: Optional[str]
     mailbox: Optional[str]
-
-    def __init__(
-        self,
-        hostname: str,
-        port: int = 1100
-    ) -> None:
-        """Create a new UnetSocket connected to the specified host.
-
-        Args:
-            hostname: Hostname or IP address of the UnetStack node.
-            port: TCP port number (default: 1100).
-
-        Example:
-            >>> sock = UnetSocket("localhost", 1100)
-            >>> sock.getLocalAddress()
-            232
-            >>> sock.close()
-        """
-        self.gw: Optional[Gateway] = Gateway(hostname, port)
-        self.sendMode = UnetSocket.SEMI_BLOCKING
+    payloadEncoding: str
+    gw: Optional[Gateway]
+    localAddress: Optional[int]
+
+    def __init__(self) -> None:
+        # built by _send_template(), with the settings it was built from
+        self._template: Optional[tuple[tuple[Any, ...], Message]] = None
+        self.sendMode = self.SEMI_BLOCKING
+        self.localAddress = -1
         self.localProtocol = -1
         self.remoteAddress = -1
         self.remoteProtocol = Protocol.DATA
-        self.timeout = UnetSocket.BLOCKING
+        self.timeout = self.BLOCKING
         self.provider = None
         self.ttl = float('nan')
         self.priority = Priority.NORMAL;
@@ -132,89 +715,12 @@ class UnetSocket:
         self.messageClass = None;
         self.remoteRecipient = None;
         self.mailbox = None;
-        self._param_change_callbacks: dict[str, Callable[[Any], None]] = {}
-        self._subscribe_datagrams()
-
-        nodeinfo = self.gw.agentForService(Services.NODE_INFO)
-
-        # subscribe to paramchange notifications for onParamChange callbacks
-        self.gw.subscribe(self.gw.topic(Topics.PARAMCHANGE))
-        if nodeinfo is not None:
-            self.gw.subscribe(self.gw.topic(nodeinfo))
-        self._param_change_thread = Thread(target=self._param_change_handler, daemon=True)
-        self._param_change_thread.start()
-
-        # subscribe to paramchange for local address
-        if nodeinfo is not None:
-            self.onParamChange("node", "address", self._update_local_address)
-            self.localAddress = nodeinfo.address
-
-    def __enter__(self) -> "UnetSocket":
-        return self
-
-    def __exit__(self, exc_type, exc, tb) -> None:
-        self.close()
-
-    def _update_local_address(self, new_address: int) -> None:
-        logger.debug(f"Local address changed to {new_address}")
-        self.localAddress = new_address
-
-    def _param_change_handler(self) -> None:
-        while True:
-            if self.gw is None:
-                break
-            try:
-                ntf = self.gw.receive(lambda msg: isinstance(msg, ParamChangeNtf), UnetSocket.BLOCKING)
-                logger.debug(f"Received parameter change notification: {ntf}")
-                if ntf is not None and ntf.paramValues is not None:
-                    sender = isinstance(ntf.sender, AgentID) and ntf.sender.get_name() or str(ntf.sender)
-                    for param, value in ntf.paramValues.items():
-                        pname = param.split(".")[-1] if "." in param else param
-                        key = f"{sender}:{pname}"
-                        callback = self._param_change_callbacks.get(key, None)
-                        if callback is not None:
-                            logger.debug(f"Invoking parameter change callback for {key} with value {value}")
-                            callback(value)
-            except Exception as e:
-                logger.error("Error in parameter change listener thread", exc_info=True)
-                break
-
-    def _subscribe_datagrams(self) -> None:
-        if self.gw is None:
-            return
-        # for new UnetStack versions (6.0.0 and later)
-        self.gw.subscribe(self.gw.topic(Topics.DATAGRAM))
-        # for compatibility with older UnetStack versions (before 5.2.0)
-        agents: Iterable[AgentID] = self.gw.agentsForService(Services.DATAGRAM) or []
-        for agent in agents:
-            self.gw.subscribe(self.gw.topic(agent))
-
-    def close(self) -> None:
-        """Close the socket and release all resources.
-
-        After calling close(), the socket cannot be used for communication.
-        All subsequent operations will fail or return None/-1.
-
-        Example:
-            >>> sock = UnetSocket("localhost", 1100)
-            >>> sock.isClosed()
-            False
-            >>> sock.close()
-            >>> sock.isClosed()
-            True
-        """
-        if self.gw is None:
-            return
-        self.gw.close()
-        self.gw = None
-
-    def isClosed(self) -> bool:
-        """Check if the socket is closed.
-
-        Returns:
-            True if the socket has been closed, False otherwise.
-        """
-        return self.gw is None
+        self.payloadEncoding = self.LIST_ENCODING
+        self._param_change_callbacks: dict[str, list[Callable[..., None]]] = {}
+        self._param_change_lock = Lock()
+        self._param_change_running: set[tuple[Callable[..., None], str, str]] = set()
+        self._param_change_pending: dict[tuple[Callable[..., None], str, str], tuple[Any, ...]] = {}
+        self._param_mirrors: dict[str, ParamMirror] = {}
 
     def bind(self, protocol: int) -> bool:
         """Bind the socket to listen for a specific protocol.
@@ -240,6 +746,7 @@ class UnetSocket:
 
         if protocol == Protocol.DATA or (Protocol.USER <= protocol <= Protocol.MAX):
             self.localProtocol = protocol
+            self._update_scope()
             return True
         logger.error(f"Invalid protocol number {protocol} for binding")
         return False
@@ -258,6 +765,7 @@ class UnetSocket:
         """
 
         self.localProtocol = -1
+        self._update_scope()
 
     def isBound(self) -> bool:
         """Check if the socket is bound to a protocol.
@@ -320,28 +828,6 @@ class UnetSocket:
         """
         return self.remoteAddress >= 0
 
-    def getLocalAddress(self) -> int:
-        """Get the local node address.
-
-        Returns:
-            Local node address, or -1 on error.
-
-        Example:
-            >>> sock.getLocalAddress()
-            232
-        """
-
-        if self.gw is None:
-            return -1
-        nodeinfo = self.gw.agentForService(Services.NODE_INFO)
-        if nodeinfo is None:
-            logger.error("No NODE_INFO service provider found.")
-            return -1
-        if nodeinfo.address is not None:
-            return nodeinfo.address
-        logger.error("Unable to retrieve local node address.")
-        return -1
-
     def getLocalProtocol(self) -> int:
         """Get the protocol number that the socket is bound to.
 
@@ -376,7 +862,7 @@ class UnetSocket:
             ms: Timeout in milliseconds. 0 = non-blocking, -1 = blocking.
         """
         if ms < 0:
-            ms = UnetSocket.BLOCKING
+            ms = self.BLOCKING
         self.timeout = ms
 
     def getTimeout(self) -> int:
@@ -412,12 +898,12 @@ class UnetSocket:
         Args:
             mode: Send mode. -2 = semi-blocking, 0 = non-blocking, -1 = blocking.
         """
-        if mode not in (UnetSocket.SEMI_BLOCKING, UnetSocket.NON_BLOCKING, UnetSocket.BLOCKING):
+        if mode not in (self.SEMI_BLOCKING, self.NON_BLOCKING, self.BLOCKING):
             logger.error(
                 f"Invalid send mode {mode}. Must be one of "
-                f"{UnetSocket.SEMI_BLOCKING} (SEMI_BLOCKING), "
-                f"{UnetSocket.NON_BLOCKING} (NON_BLOCKING), "
-                f"{UnetSocket.BLOCKING} (BLOCKING)."
+                f"{self.SEMI_BLOCKING} (SEMI_BLOCKING), "
+                f"{self.NON_BLOCKING} (NON_BLOCKING), "
+                f"{self.BLOCKING} (BLOCKING)."
             )
             return
         self.sendMode = mode
@@ -593,6 +1079,40 @@ class UnetSocket:
         """
         self.mailbox = mailbox
 
+    def getPayloadEncoding(self) -> str:
+        """Get the wire encoding of outgoing datagram payloads.
+
+        Returns:
+            LIST_ENCODING or BASE64_ENCODING.
+        """
+        return self.payloadEncoding
+
+    def setPayloadEncoding(self, encoding: str) -> bool:
+        """Set the wire encoding of outgoing datagram payloads.
+
+        With BASE64_ENCODING, payloads are sent as base64 encoded byte arrays,
+        which take about a third of the space of a JSON array of integers and
+        are faster to encode and parse. The node must run a fjåge version that
+        accepts base64 encoded arrays. Payloads that are not bytes (such as
+        lists with values out of the byte range) are still sent as arrays of
+        integers. Received payloads are decoded in either encoding.
+
+        Args:
+            encoding: LIST_ENCODING (default) or BASE64_ENCODING.
+
+        Returns:
+            True on success, False if the encoding is not known.
+
+        Example:
+            >>> sock.setPayloadEncoding(UnetSocket.BASE64_ENCODING)
+            True
+        """
+        if encoding not in (self.LIST_ENCODING, self.BASE64_ENCODING):
+            logger.error(f"Invalid payload encoding {encoding!r}")
+            return False
+        self.payloadEncoding = encoding
+        return True
+
     def getServiceProvider(self) -> Optional[AgentID]:
         """Get the explicitly selected datagram service provider.
 
@@ -619,87 +1139,946 @@ class UnetSocket:
         self.provider = provider
 
 
-    def send(
-        self,
-        data: Union[bytes, bytearray, Sequence[int], Message, str],
-        to: Optional[int] = None,
-        protocol: Optional[int] = None,
-    ) -> bool:
-        """Transmit a datagram to the specified destination.
-
-        Protocol numbers between Protocol.DATA+1 to Protocol.USER-1 are reserved
-        and cannot be used for sending. Socket-level metadata such as MIME type,
-        message class, remote recipient, and mailbox automatically promote the
-        outgoing request to a RemoteMessageReq.
+    def onParamChange(self, agentId: Union[AgentID, str], paramName:str, callback: Callable[..., None]) -> None:
+        """Register a callback for parameter change notifications from a specific agent.
 
-        If no service provider is set explicitly, plain datagrams are routed using
-        the normal UnetStack stack in order of preference: REMOTE, TRANSPORT, ROUTING,
-        LINK, PHYSICAL, DATAGRAM.
+        Any number of callbacks may be registered for a parameter. The agent
+        name, the parameter name, or both may be the wildcard ``"*"``, e.g.
+        ``("phy", "*")`` for every parameter of phy or ``("*", "address")``
+        for the address parameter of any agent. Callbacks for exact names
+        are called with the new value. Wildcard callbacks are called with
+        the new value, the agent name and the parameter name.
 
-        Send behavior depends on sendMode. NON_BLOCKING returns after handing the
-        request to the gateway. SEMI_BLOCKING waits for AGREE, and if reliability
-        is True also waits for a remote delivery/failure notification. BLOCKING
-        waits for AGREE and then for a transmission or delivery/failure notification.
+        Callbacks run on a small pool of worker threads (PARAM_CHANGE_WORKERS),
+        so a slow callback does not hold up other notifications, and errors
+        raised by a callback are logged. Each callback sees the changes of
+        a parameter in order. If a parameter changes again while its callback
+        is still running, the callback is then called once, with the latest
+        value, rather than once per intermediate change.
 
         Args:
-            data: Data to transmit. Can be bytes, bytearray, list of integers,
-                a string (encoded as UTF-8), or a DatagramReq message. Passing a
-                pre-built DatagramReq is supported for compatibility, but using the
-                socket-level configuration API is preferred.
-            to: Destination node address. Uses default if not specified.
-            protocol: Protocol number. Uses default if not specified.
-
-        Returns:
-            True on success, False on failure.
+            agentId: AgentID or name of the agent to monitor, or ``"*"``.
+            paramName: Name of the parameter to watch for changes, or ``"*"``.
+            callback: Function to call when a change is detected.
 
         Example:
-            >>> sock.send([1, 2, 3], to=31, protocol=Protocol.USER)
-            True
-            >>> sock.send(b'\\x01\\x02\\x03', to=31, protocol=Protocol.USER)
-            True
-            >>> sock.send("Hello", to=31, protocol=Protocol.USER)
-            True
+            >>> def on_address_change(address):
+            ...     print(f"Address changed: {address}")
+            ...
+            >>> sock.onParamChange("node", "address", on_address_change)
+            >>> sock.onParamChange("phy", "*", lambda value, agent, param: print(param, value))
         """
-
         if self.gw is None:
-            logger.error("Cannot send datagram: socket is closed.")
-            return False
+            logger.error("Cannot register parameter change callback: socket is closed.")
+            return
+        key = self._param_change_key(agentId, paramName)
+        callbacks = self._param_change_callbacks.get(key, [])
+        if callback not in callbacks:
+            # copied on write, so notifications are dispatched from a consistent list
+            self._param_change_callbacks[key] = callbacks + [callback]
 
-        req = self._build_datagram_request(data, to, protocol)
-        logger.debug(f"Built datagram request: {req}")
-        if req is None:
-            return False
+    def removeParamChangeCallback(self, agentId: Union[AgentID, str], paramName:str, callback: Optional[Callable[..., None]] = None) -> None:
+        """Remove a previously registered parameter change callback.
 
-        if req.recipient is None:
-            provider = self._resolve_provider()
-            if provider is None:
-                logger.error("No datagram service provider found. Not sending datagram.")
-                return False
-            logger.debug(f"Using {provider} as datagram service provider.")
-            req.recipient = provider
+        Args:
+            agentId: AgentID or name of the agent, or ``"*"``.
+            paramName: Name of the parameter, or ``"*"``.
+            callback: Callback to remove, or None to remove all callbacks
+                registered for the agent and parameter (default: None).
+
+        Example:
+            >>> sock.removeParamChangeCallback("node", "address")
+            >>> sock.removeParamChangeCallback("phy", "*", on_phy_change)
+        """
+        if self.gw is None:
+            logger.error("Cannot remove parameter change callback: socket is closed.")
+            return
+        key = self._param_change_key(agentId, paramName)
+        callbacks = self._param_change_callbacks.get(key, [])
+        remaining = [cb for cb in callbacks if callback is not None and cb != callback]
+        if len(remaining) == len(callbacks):
+            logger.warning(f"No parameter change callback found for '{key}'")
+        elif remaining:
+            self._param_change_callbacks[key] = remaining
+        else:
+            del self._param_change_callbacks[key]
+
+
+## Internal helper methods
+
+    @staticmethod
+    def _param_request(agent: AgentID, names: Iterable[str], values: Optional[dict[str, Any]], index: int) -> ParameterReq:
+        req = ParameterReq(index=index)
+        if values is None:
+            for name in names:
+                req.get(name)
+        else:
+            for name, value in values.items():
+                req.set(name, value)
+        req.recipient = agent
+        return req
+
+    @staticmethod
+    def _param_values(rsp: Optional[Message]) -> Optional[dict[str, Any]]:
+        # agents refuse requests with no known parameters, and leave out unknown ones
+        if rsp is None or "param" not in rsp.__dict__:
+            return None
+        return {_short(param): value for param, value in rsp.parameters().items()}
+
+    @staticmethod
+    def _send_outcome(ntf: Message, reliable: bool) -> Optional[bool]:
+        # whether the send a notification is in reply to succeeded, or None if the
+        # notification does not complete the send: a reliable send completes on
+        # delivery or failure, others on transmission or failure
+        if isinstance(ntf, DatagramFailureNtf):
+            return False
+        if isinstance(ntf, DatagramDeliveryNtf if reliable else DatagramTransmissionNtf):
+            return True
+        return None
+
+    def _drain_replies(self, dispatcher: _Dispatcher, req: Message) -> None:
+        # Nobody waits for the replies to a non-blocking send, so take them off
+        # the gateway instead of leaving them to fill up its queue, which every
+        # receive() (and so every request()) scans. Call before sending.
+        reliable = bool(getattr(req, "reliability", False))
+
+        def on_reply(msg: Optional[Message]) -> None:
+            if msg is not None and msg.perf in (Performative.AGREE, Performative.INFORM):
+                if msg.perf == Performative.AGREE or self._send_outcome(msg, reliable) is None:
+                    return  # the send is still in progress
+            dispatcher.forget(req)
+
+        dispatcher.expect(req, on_reply, self.DELIVERY_TIMEOUT)
+
+    def _build_datagram_request(
+        self,
+        data: Union[bytes, bytearray, memoryview, Sequence[int], Message, str],
+        to: Optional[int],
+        protocol: Optional[int],
+    ) -> Optional[DatagramReq]: # type: ignore
+        if isinstance(data, Message):
+            if not isinstance(data, DatagramReq):
+                logger.error("Message provided is not a DatagramReq")
+                return None
+            req = data
+            payload = getattr(req, "data", None)
+            if payload is not None and (not isinstance(payload, list) or self.payloadEncoding == self.BASE64_ENCODING):
+                req.data = self._normalize_payload(payload)
+        else:
+            destination = to if to is not None else self.remoteAddress
+            if destination < 0:
+                logger.error("No destination address specified for sending datagram")
+                return None
+            # a shallow clone of the template, bypassing Message.__init__ and __setattr__
+            template = self._send_template()
+            req = template.__class__.__new__(template.__class__)
+            fields = req.__dict__
+            fields.update(template.__dict__)
+            fields["msgID"] = str(UUID7.generate())
+            fields["data"] = self._normalize_payload(data)
+            fields["to"] = destination
+            fields["protocol"] = protocol if protocol is not None else self.remoteProtocol
+        if req.protocol != Protocol.DATA and (
+            req.protocol < Protocol.USER or req.protocol > Protocol.MAX
+        ):
+            logger.error(f"Invalid protocol number {req.protocol} for sending datagram")
+            return None
+        logger.debug("Built %s for sending", req)
+        return req
+
+    def _send_template(self) -> Message:
+        # rebuilt when a setting it copies has changed, whether through a
+        # setter or by assigning the attribute
+        settings = (self.ttl, self.priority, self.robustness, self.reliability, self.route,
+                    self.mimeType, self.messageClass, self.remoteRecipient, self.mailbox)
+        cached = self._template
+        if cached is not None and cached[0] == settings:
+            return cached[1]
+        template: Message
+        if (self.mimeType is None and self.messageClass is None and self.remoteRecipient is None and self.mailbox is None):
+            template = DatagramReq()
+        else:
+            template = RemoteMessageReq()
+            if (self.mimeType is not None):
+                template.mimeType = self.mimeType;
+            template.messageClass = self.messageClass
+            template.remoteRecipient = self.remoteRecipient
+            template.mailbox = self.mailbox
+        if (isnan(self.ttl) == False):
+            template.ttl = self.ttl
+        if (self.priority is not None):
+            template.priority = self.priority
+        if (self.robustness is not None):
+            template.robustness = self.robustness
+        template.reliability = self.reliability
+        template.route = self.route
+        self._template = (settings, template)
+        return template
+
+    def _normalize_payload(
+        self,
+        data: Union[bytes, bytearray, memoryview, Sequence[int], str],
+    ) -> Sequence[int]:
+        compact = self.payloadEncoding == self.BASE64_ENCODING
+        if isinstance(data, str):
+            return _Payload(memoryview(data.encode("utf-8")), compact)
+        if isinstance(data, _Payload):
+            return _Payload(data.view, compact)
+        try:
+            view = memoryview(data)  # type: ignore[arg-type]
+        except TypeError:
+            view = None
+        if view is None or view.itemsize != 1:
+            # e.g. a list, array('i') or a numpy int32 array: a sequence of ints, not bytes
+            packed = _as_bytes(data) if compact else None
+            if packed is None:
+                return list(data)
+            return _Payload(memoryview(packed), compact)
+        if not view.c_contiguous:
+            view = memoryview(view.tobytes())
+        return _Payload(view.cast("B"), compact)
+
+
+    def _effective_timeout(self, override: Optional[int]) -> int:
+        if override is None:
+            return self.timeout
+        if override < 0:
+            return self.BLOCKING
+        return override
+
+    def _matches(self, ntf: Optional[Message]) -> bool:
+        if not _DatagramQueues.accepts(ntf, self.localAddress):
+            return False
+        proto = getattr(ntf, "protocol", Protocol.DATA)
+        return self.localProtocol < 0 or self.localProtocol == proto
+
+    def _stream_filter(
+        self,
+        source: Optional[int],
+        protocol: Optional[int],
+        minRssi: Optional[float],
+    ) -> Callable[[Message], bool]:
+        def accept(ntf: Message) -> bool:
+            if source is not None and getattr(ntf, "from_", None) != source:
+                return False
+            if protocol is not None and getattr(ntf, "protocol", Protocol.DATA) != protocol:
+                return False
+            if minRssi is not None:
+                rssi = getattr(ntf, "rssi", None)
+                if rssi is None or rssi < minRssi:
+                    return False
+            return True
+        return accept
+
+    def _buffer_stream(
+        self,
+        buffer: deque,
+        batch: Iterable[Message],
+        accept: Callable[[Message], bool],
+        maxBuffer: Optional[int],
+        dropPolicy: str,
+    ) -> None:
+        for ntf in batch:
+            if not accept(ntf):
+                continue
+            if maxBuffer is not None and len(buffer) >= maxBuffer:
+                logger.debug(f"Datagram stream buffer full, dropping {dropPolicy} datagram")
+                if dropPolicy == self.DROP_NEWEST:
+                    continue
+                buffer.popleft()
+            buffer.append(ntf)
+
+    def _check_stream_args(self, maxBuffer: Optional[int], dropPolicy: str) -> bool:
+        if dropPolicy not in (self.DROP_OLDEST, self.DROP_NEWEST):
+            logger.error(f"Invalid drop policy {dropPolicy!r} for datagram stream")
+            return False
+        if maxBuffer is not None and maxBuffer <= 0:
+            logger.error(f"Invalid buffer size {maxBuffer} for datagram stream")
+            return False
+        return True
+
+    def _handle_param_change(self, ntf: Message) -> None:
+        logger.debug(f"Received parameter change notification: {ntf}")
+        if ntf.paramValues is None:
+            return
+        sender = isinstance(ntf.sender, AgentID) and ntf.sender.get_name() or str(ntf.sender)
+        mirror = self._param_mirrors.get(sender)
+        if mirror is not None:
+            mirror._update(ntf.paramValues)
+        callbacks = self._param_change_callbacks
+        if not callbacks:
+            return
+        for param, value in ntf.paramValues.items():
+            pname = _short(param)
+            # at most four dictionary lookups, however many callbacks are registered
+            for key, named in ((f"{sender}:{pname}", False), (f"{sender}:*", True), (f"*:{pname}", True), ("*:*", True)):
+                for callback in callbacks.get(key, ()):
+                    self._dispatch_param_change(callback, sender, pname, (value, sender, pname) if named else (value,))
+
+    def _dispatch_param_change(self, callback: Callable[..., None], agent: str, param: str, args: tuple[Any, ...]) -> None:
+        task = (callback, agent, param)
+        with self._param_change_lock:
+            if task in self._param_change_running:
+                # coalesce: only the latest value is passed once the callback returns
+                self._param_change_pending[task] = args
+                return
+            self._param_change_running.add(task)
+        self._submit_param_change(lambda: self._run_param_change(task, args))
+
+    def _run_param_change(self, task: tuple[Callable[..., None], str, str], args: Optional[tuple[Any, ...]]) -> None:
+        while args is not None:
+            try:
+                task[0](*args)
+            except Exception:
+                logger.error(f"Error in parameter change callback for {task[1]}:{task[2]}", exc_info=True)
+            with self._param_change_lock:
+                args = self._param_change_pending.pop(task, None)
+                if args is None:
+                    self._param_change_running.discard(task)
+
+    def _submit_param_change(self, run: Callable[[], None]) -> None:
+        # already on the event loop for AsyncUnetSocket; UnetSocket uses worker threads
+        run()
+
+    def _update_scope(self) -> None:
+        # called when the protocols the socket receives change
+        pass
+
+    @staticmethod
+    def _param_change_key(agentId: Union[AgentID, str], paramName: str) -> str:
+        agent = agentId.get_name() if isinstance(agentId, AgentID) else agentId
+        return "{}:{}".format(agent, paramName)
+
+
+class _Connection:
+    """Gateway connection with its subscriptions, dispatcher and receive queues.
+
+    A connection may be shared by several UnetSockets on the same host and
+    port (see the ``shared`` argument of UnetSocket). Incoming datagrams are
+    demultiplexed once into queues shared by all its sockets, and parameter
+    change notifications are fanned out to every socket. The connection is
+    closed when the last socket using it is closed.
+
+    The directory lookups and the local address read needed to set up the
+    connection are resolved by _resolve(). A lazy connection resolves them
+    in the background, holding back incoming datagrams until the local
+    address is known.
+
+    The per-agent topics of the DATAGRAM service providers are only
+    subscribed to while a socket needs them, see updateSubscriptions().
+    Agent topics are subscribed to with subscribe() on behalf of an owner,
+    and unsubscribed from once no owner needs them.
+    """
+
+    # shared connections by (hostname, port), as futures so that a connection
+    # is opened without holding the lock
+    _pool: dict[tuple[str, int], "Future[_Connection]"] = {}
+    _pool_lock = Lock()
+
+    def __init__(self, hostname: str, port: int, lazy: bool = False) -> None:
+        self.key = (hostname, port)
+        self.gw = Gateway(hostname, port)
+        self.datagrams = _DatagramQueues(_MAX_QUEUE_SIZE)
+        self.ready = Condition()
+        self.sockets: list[UnetSocket] = []
+        self.watchers: list[Callable[[], None]] = []
+        self.receivers: list[_ReceiveHandler] = []
+        self.refs = 0
+        self.dispatcher = _Dispatcher(self.gw)
+        self.dispatcher.addHandler(lambda msg: isinstance(msg, DatagramNtf), self._on_datagram)
+        self.dispatcher.addHandler(lambda msg: isinstance(msg, ParamChangeNtf), self._on_param_change)
+        self.services = _ServiceCache()
+        self.hosts = _AddressCache(UnetSocket.HOST_CACHE_SIZE, UnetSocket.HOST_CACHE_TTL, UnetSocket.HOST_CACHE_NEGATIVE_TTL)
+        lifecycle = self.gw.topic(Topics.LIFECYCLE)
+        self.dispatcher.addHandler(
+            lambda msg: isinstance(msg, AbnormalTerminationNtf) or msg.recipient == lifecycle, self._on_lifecycle)
+        # agents that terminate invalidate the cached service directory
+        self.gw.subscribe(lifecycle)
+
+        # for new UnetStack versions (6.0.0 and later)
+        self.gw.subscribe(self.gw.topic(Topics.DATAGRAM))
+        # subscribe to paramchange notifications for onParamChange callbacks
+        self.gw.subscribe(self.gw.topic(Topics.PARAMCHANGE))
+
+        self.legacyTopics: list[AgentID] = []
+        self.topicOwners: dict[AgentID, set[Any]] = {}
+        self._topics_lock = Lock()
+        self.protocols: Optional[frozenset[int]] = None
+        self._subscriptions_lock = Lock()
+
+        self.nodeinfo: Optional[AgentID] = None
+        self.localAddress: Optional[int] = -1
+        self.resolved = Event()
+        self._early: deque[Message] = deque(maxlen=_MAX_QUEUE_SIZE)
+        if lazy:
+            self.dispatcher.start()
+            Thread(target=self._resolve, name="unetpy-connect", daemon=True).start()
+        else:
+            self._resolve()
+            # route incoming datagrams only once the local address is known
+            self.dispatcher.start()
+
+    @classmethod
+    def acquire(cls, hostname: str, port: int, shared: bool, lazy: bool = False) -> "_Connection":
+        if not shared:
+            conn = cls(hostname, port, lazy)
+            conn.refs = 1
+            return conn
+        key = (hostname, port)
+        while True:
+            with cls._pool_lock:
+                entry = cls._pool.get(key)
+                opening = entry is None
+                if entry is None:
+                    entry = cls._pool[key] = Future()
+            if opening:
+                try:
+                    entry.set_result(cls(hostname, port, lazy))
+                except BaseException as e:
+                    with cls._pool_lock:
+                        del cls._pool[key]
+                    entry.set_exception(e)
+                    raise
+            pooled = entry.result()
+            with cls._pool_lock:
+                # unless the last socket released it meanwhile
+                if cls._pool.get(key) is entry:
+                    pooled.refs += 1
+                    break
+        if not lazy:
+            # a lazy socket may have opened the shared connection
+            pooled.resolved.wait(UnetSocket.REQUEST_TIMEOUT / 1000)
+        return pooled
+
+    def release(self) -> None:
+        with self._pool_lock:
+            self.refs -= 1
+            if self.refs > 0:
+                return
+            entry = self._pool.get(self.key)
+            if entry is not None and entry.done() and entry.exception() is None and entry.result() is self:
+                del self._pool[self.key]
+        self.dispatcher.stop()
+        self.gw.close()
+        with self.ready:
+            self.datagrams.clear()
+            self.ready.notify_all()
+
+    def lookup(self, svc: Any, many: bool = False) -> Any:
+        """Look up the agent (or all agents, if many) providing a service, using the cache."""
+        value = self.services.get(svc, many)
+        if value is _MISSING:
+            generation = self.services.generation
+            value = _find_agents(self.gw, svc, many)
+            self.services.put(svc, many, value, generation)
+        return value
+
+    def setLocalAddress(self, address: int) -> None:
+        with self.ready:
+            self.localAddress = address
+            self.datagrams.retain(address)
+        # the cached address of this node's name is no longer valid
+        self.hosts.clear()
+
+    def notifyWatchers(self) -> None:
+        for watcher in list(self.watchers):
+            try:
+                watcher()
+            except Exception:
+                logger.error("Error in readiness watcher", exc_info=True)
+
+    def _resolve(self) -> None:
+        # The DATAGRAM agent lookup runs alongside the NODE_INFO lookup and
+        # address read, so setting up takes two round trips rather than three
+        legacy = Thread(target=self._subscribe_datagram_agents, name="unetpy-connect-datagram", daemon=True)
+        legacy.start()
+        nodeinfo: Optional[AgentID] = None
+        address: Optional[int] = -1
+        try:
+            nodeinfo = self.lookup(Services.NODE_INFO)
+            if nodeinfo is not None:
+                self.subscribe(self.gw.topic(nodeinfo), "nodeinfo")
+                address = nodeinfo.address
+        except Exception:
+            logger.error("Unable to resolve the local node address", exc_info=True)
+        legacy.join()
+        with self.ready:
+            self.nodeinfo = nodeinfo
+            self.localAddress = address
+            for sock in self.sockets:
+                sock._on_resolved(address)
+            early = list(self._early)
+            self._early.clear()
+            queued = [ntf for ntf in early if self._deliver(ntf)]
+            self.resolved.set()
+            self.ready.notify_all()
+        if queued:
+            self.notifyWatchers()
+
+    def _subscribe_datagram_agents(self) -> None:
+        # for compatibility with older UnetStack versions (before 5.2.0)
+        try:
+            agents: Iterable[AgentID] = self.lookup(Services.DATAGRAM, True) or []
+            topics = [self.gw.topic(agent) for agent in agents]
+            with self._subscriptions_lock:
+                self.legacyTopics = topics
+            self.updateSubscriptions()
+        except Exception:
+            logger.error("Unable to subscribe to datagram agents", exc_info=True)
+
+    def updateSubscriptions(self) -> None:
+        """Subscribe to the datagram agent topics only if a socket needs them.
+
+        When every socket on the connection uses the SUBSCRIBE_BOUND profile
+        and is bound, datagrams only arrive through the DATAGRAM topic, and
+        those for protocols no socket receives are discarded on arrival.
+        """
+        with self._subscriptions_lock:
+            with self.ready:
+                scoped = bool(self.sockets)
+                protocols = set()
+                for sock in self.sockets:
+                    if sock.subscriptionProfile != UnetSocket.SUBSCRIBE_BOUND or sock.localProtocol < 0:
+                        scoped = False
+                        break
+                    protocols.add(sock.localProtocol)
+                for receiver in self.receivers:
+                    if receiver.protocol is not None:
+                        protocols.add(receiver.protocol)
+                self.protocols = frozenset(protocols) if scoped else None
+            # the per-agent topics are needed unless every socket is scoped
+            for topic in self.legacyTopics:
+                if scoped:
+                    self.unsubscribe(topic, "datagram")
+                else:
+                    self.subscribe(topic, "datagram")
+
+    def subscribe(self, topic: AgentID, owner: Any) -> None:
+        """Subscribe to a topic on behalf of an owner, until the owner unsubscribes."""
+        with self._topics_lock:
+            owners = self.topicOwners.setdefault(topic, set())
+            if not owners:
+                self.gw.subscribe(topic)
+            owners.add(owner)
+
+    def unsubscribe(self, topic: AgentID, owner: Any) -> None:
+        """Drop an owner's subscription to a topic, unsubscribing if no other owner needs it."""
+        with self._topics_lock:
+            owners = self.topicOwners.get(topic)
+            if owners is None or owner not in owners:
+                return
+            owners.remove(owner)
+            if not owners:
+                del self.topicOwners[topic]
+                self.gw.unsubscribe(topic)
+
+    def _on_datagram(self, ntf: Message) -> None:
+        with self.ready:
+            if not self.resolved.is_set():
+                # the local address is not known yet, see _resolve()
+                self._early.append(ntf)
+                return
+            if not self._deliver(ntf):
+                return
+            self.ready.notify_all()
+        self.notifyWatchers()
+
+    def _deliver(self, ntf: Message) -> bool:
+        # called with ready held: hands the datagram to the first matching
+        # onReceive() callback, or queues it, returning True if queued
+        protocols = self.protocols
+        if protocols is not None and getattr(ntf, "protocol", Protocol.DATA) not in protocols:
+            self.datagrams.discarded["unbound"] += 1
+            return False
+        for receiver in self.receivers:
+            if receiver.accepts(ntf, self.localAddress):
+                receiver.offer(ntf)
+                return False
+        return self.datagrams.put(ntf, self.localAddress)
+
+    def _on_lifecycle(self, ntf: Message) -> None:
+        logger.debug(f"Agent lifecycle change, clearing service cache: {ntf}")
+        self.services.invalidate()
+        # a restarted agent may not have kept its parameters
+        for sock in list(self.sockets):
+            for mirror in list(sock._param_mirrors.values()):
+                mirror.invalidate()
+
+    def _on_param_change(self, ntf: Message) -> None:
+        for sock in list(self.sockets):
+            try:
+                sock._handle_param_change(ntf)
+            except Exception:
+                logger.error(f"Error handling {ntf} for {sock}", exc_info=True)
+
+
+class UnetSocket(_UnetSocketBase):
+    """High-level socket interface for UnetStack communication.
+
+    UnetSocket provides a socket-like API for sending and receiving datagrams
+    through UnetStack nodes. It handles subscriptions, default addresses, and
+    blocking receives on top of fjåge's Gateway.
+
+    Attributes:
+        gw (Gateway): Underlying fjåge Gateway instance.
+        localProtocol (int): Bound protocol number (-1 if unbound).
+        remoteAddress (int): Default destination address (-1 if not connected).
+        remoteProtocol (int): Default protocol for sending.
+        timeout (int): Receive timeout in milliseconds.
+
+    Example:
+        Basic usage with context manager::
+
+            from unetpy import UnetSocket, Protocol
+
+            with UnetSocket("localhost", 1100) as sock:
+                sock.bind(Protocol.USER)
+                sock.send([1, 2, 3], to=31, protocol=Protocol.USER)
+
+                sock.setTimeout(5000)
+                ntf = sock.receive()
+                if ntf:
+                    print(f"Received: {ntf.data}")
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int = 1100,
+        shared: bool = False,
+        lazy: bool = False
+    ) -> None:
+        """Create a new UnetSocket connected to the specified host.
+
+        By default each socket opens its own Gateway connection. Shared sockets
+        on the same host and port use a single Gateway connection, subscription
+        set and dispatcher thread instead, which is closed when the last of them
+        is closed. Shared sockets should be bound to different protocols, since
+        each received datagram is delivered to only one of the sockets it matches.
+
+        Setting up a socket looks up the node's datagram and node info agents
+        and reads its local address. A lazy socket returns as soon as the
+        Gateway is connected and does this in the background. Datagrams that
+        arrive in the meantime are held back and delivered to receive() once
+        the local address is known, and the ``localAddress`` attribute stays
+        -1 until then.
+
+        Args:
+            hostname: Hostname or IP address of the UnetStack node.
+            port: TCP port number (default: 1100).
+            shared: Share the Gateway connection with other shared sockets
+                on the same host and port (default: False).
+            lazy: Look up agents and the local address in the background
+                instead of during construction (default: False).
+
+        Example:
+            >>> sock = UnetSocket("localhost", 1100)
+            >>> sock.getLocalAddress()
+            232
+            >>> sock.close()
+            >>> worker = UnetSocket("localhost", 1100, lazy=True)
+        """
+        super().__init__()
+        self._connection = _Connection.acquire(hostname, port, shared, lazy)
+        self.gw = self._connection.gw
+        self._datagrams = self._connection.datagrams
+        self._datagrams_ready = self._connection.ready
+        self._dispatcher: Optional[_Dispatcher] = self._connection.dispatcher
+        self._pending_sends: dict[Future, Callable[[bool], None]] = {}
+        self._cancels = 0
+        self._metrics: Optional[SocketMetrics] = None
+        self._dropped_base = 0
+        self._trace_listeners: tuple[Callable[[dict[str, Any]], None], ...] = ()
+        self._receiver: Optional[_ReceiveHandler] = None
+        self._param_change_executor: Optional[ThreadPoolExecutor] = None
+        self.subscriptionProfile = self.SUBSCRIBE_ALL
+
+        with self._datagrams_ready:
+            if self._connection.resolved.is_set():
+                self._on_resolved(self._connection.localAddress)
+            self._connection.sockets.append(self)
+        self._connection.updateSubscriptions()
+
+    def __enter__(self) -> "UnetSocket":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _on_resolved(self, address: Optional[int]) -> None:
+        # called once the connection knows the local address, with _datagrams_ready held
+        if self._connection.nodeinfo is not None:
+            # subscribe to paramchange for local address
+            self.onParamChange("node", "address", self._update_local_address)
+            self.localAddress = address
+
+    def _update_local_address(self, new_address: int) -> None:
+        logger.debug(f"Local address changed to {new_address}")
+        self.localAddress = new_address
+        self._connection.setLocalAddress(new_address)
+
+    def close(self) -> None:
+        """Close the socket and release all resources.
+
+        After calling close(), the socket cannot be used for communication.
+        All subsequent operations will fail or return None/-1. A shared Gateway
+        connection is closed once all sockets using it are closed.
+
+        Example:
+            >>> sock = UnetSocket("localhost", 1100)
+            >>> sock.isClosed()
+            False
+            >>> sock.close()
+            >>> sock.isClosed()
+            True
+        """
+        if self.gw is None:
+            return
+        self.cancel()
+        self.removeReceiveCallback()
+        with self._datagrams_ready:
+            self._connection.sockets.remove(self)
+        if self._connection.sockets:
+            self._connection.updateSubscriptions()
+        if self._param_change_executor is not None:
+            self._param_change_executor.shutdown(wait=False)
+        for name, mirror in self._param_mirrors.items():
+            self._connection.unsubscribe(self.gw.topic(self.gw.agent(name)), mirror)
+        self._param_mirrors.clear()
+        with self._datagrams_ready:
+            self.gw = None
+            self._dispatcher = None
+            self._datagrams_ready.notify_all()
+        self._connection.notifyWatchers()
+        self._connection.release()
+
+    def cancel(self) -> None:
+        """Wake up all threads blocked in this socket.
+
+        Blocked receive(), receiveMany() and datagrams() calls return as if they
+        had timed out, and pending send() calls (and sendAsync() futures) complete
+        as failed. The socket stays open and can be used again afterwards.
+
+        Example:
+            >>> threading.Thread(target=sock.receive, args=(UnetSocket.BLOCKING,)).start()
+            >>> sock.cancel()
+        """
+        with self._datagrams_ready:
+            self._cancels += 1
+            pending = list(self._pending_sends.values())
+            self._datagrams_ready.notify_all()
+        for done in pending:
+            done(False)
+
+    def isClosed(self) -> bool:
+        """Check if the socket is closed.
+
+        Returns:
+            True if the socket has been closed, False otherwise.
+        """
+        return self.gw is None
+
+    def getLocalAddress(self) -> int:
+        """Get the local node address.
+
+        The address read when the socket was opened, and kept up to date by
+        parameter change notifications, is returned without a request to the
+        node. The node is only asked if the address is not known yet.
+
+        Returns:
+            Local node address, or -1 on error.
+
+        Example:
+            >>> sock.getLocalAddress()
+            232
+        """
+
+        if self.gw is None:
+            return -1
+        if self.localAddress is not None and self.localAddress >= 0:
+            return self.localAddress
+        nodeinfo = self.agentForService(Services.NODE_INFO)
+        if nodeinfo is None:
+            logger.error("No NODE_INFO service provider found.")
+            return -1
+        if nodeinfo.address is not None:
+            return nodeinfo.address
+        logger.error("Unable to retrieve local node address.")
+        return -1
+
+    def send(
+        self,
+        data: Union[bytes, bytearray, memoryview, Sequence[int], Message, str],
+        to: Optional[int] = None,
+        protocol: Optional[int] = None,
+    ) -> bool:
+        """Transmit a datagram to the specified destination.
+
+        Protocol numbers between Protocol.DATA+1 to Protocol.USER-1 are reserved
+        and cannot be used for sending. Socket-level metadata such as MIME type,
+        message class, remote recipient, and mailbox automatically promote the
+        outgoing request to a RemoteMessageReq.
+
+        If no service provider is set explicitly, plain datagrams are routed using
+        the normal UnetStack stack in order of preference: REMOTE, TRANSPORT, ROUTING,
+        LINK, PHYSICAL, DATAGRAM.
+
+        Send behavior depends on sendMode. NON_BLOCKING returns after handing the
+        request to the gateway. SEMI_BLOCKING waits for AGREE, and if reliability
+        is True also waits for a remote delivery/failure notification. BLOCKING
+        waits for AGREE and then for a transmission or delivery/failure notification.
+        A waiting send() can be interrupted with cancel() or close(), and then
+        returns False.
+
+        Args:
+            data: Data to transmit. Can be bytes, bytearray, memoryview, list of
+                integers, any buffer of bytes (such as ``array('B')`` or a numpy
+                uint8 array), a string (encoded as UTF-8), or a DatagramReq message.
+                Buffers are not copied, and must not be modified until send()
+                returns. Passing a
+                pre-built DatagramReq is supported for compatibility, but using the
+                socket-level configuration API is preferred.
+            to: Destination node address. Uses default if not specified.
+            protocol: Protocol number. Uses default if not specified.
+
+        Returns:
+            True on success, False on failure.
+
+        Example:
+            >>> sock.send([1, 2, 3], to=31, protocol=Protocol.USER)
+            True
+            >>> sock.send(b'\\x01\\x02\\x03', to=31, protocol=Protocol.USER)
+            True
+            >>> sock.send("Hello", to=31, protocol=Protocol.USER)
+            True
+        """
+
+        if self.gw is None:
+            logger.error("Cannot send datagram: socket is closed.")
+            return False
+
+        req = self._prepare_request(data, to, protocol)
+        if req is None:
+            return False
 
         if self.sendMode == UnetSocket.NON_BLOCKING:
+            if self._dispatcher is not None:
+                self._drain_replies(self._dispatcher, req)
             try:
                 self.gw.send(req)
             except Exception:
                 logger.error("Failed to send datagram", exc_info=True)
                 return False
+            self._sent(req)
             return True
 
-        wait_for_tx = getattr(req, "reliability", False)
-        rsp = self.gw.request(req, self.REQUEST_TIMEOUT)
-        logger.debug(f"Received response for datagram send request: {rsp}")
-        if rsp is None or rsp.perf != Performative.AGREE:
-            return False
-        if self.sendMode == UnetSocket.SEMI_BLOCKING and not wait_for_tx:
-            return True
+        # wait on the future so that cancel() and close() can interrupt the send
+        return self._submit(req).result()
+
+    def sendAsync(
+        self,
+        data: Union[bytes, bytearray, memoryview, Sequence[int], Message, str],
+        to: Optional[int] = None,
+        protocol: Optional[int] = None,
+    ) -> "Future[bool]":
+        """Transmit a datagram and return a future for its outcome.
+
+        The request is handed to the gateway immediately, and the responses
+        are correlated by ``inReplyTo`` on a background thread, so any number
+        of datagrams can be in flight without a waiting thread per datagram.
+
+        The future resolves to False if the stack refuses the request or does
+        not respond within REQUEST_TIMEOUT. Otherwise it resolves when the
+        outcome is known for the send mode, as in send(): on AGREE, or for
+        reliable datagrams on the delivery/failure notification. In BLOCKING
+        mode it also waits for a transmission notification. Unlike send(),
+        NON_BLOCKING mode still reports a refusal.
+
+        Args:
+            data: Data to transmit, as for send().
+            to: Destination node address. Uses default if not specified.
+            protocol: Protocol number. Uses default if not specified.
+
+        Returns:
+            A ``concurrent.futures.Future`` resolving to True on success and
+            False on failure. Outstanding futures resolve to False when the
+            socket is cancelled or closed.
+
+        Example:
+            >>> sock.setReliability(True)
+            >>> futures = [sock.sendAsync([i], to=31, protocol=Protocol.USER) for i in range(100)]
+            >>> all(f.result() for f in futures)
+            True
+        """
+
+        if self.gw is None:
+            logger.error("Cannot send datagram: socket is closed.")
+            return self._resolved(False)
+
+        req = self._prepare_request(data, to, protocol)
+        if req is None:
+            return self._resolved(False)
+        return self._submit(req)
+
+    def sendMany(
+        self,
+        payloads: Iterable[Union[bytes, bytearray, memoryview, Sequence[int], Message, str]],
+        to: Optional[int] = None,
+        protocol: Optional[int] = None,
+    ) -> list[bool]:
+        """Transmit a batch of datagrams without waiting for each one in turn.
+
+        All requests are built and handed to the gateway back-to-back, and
+        the AGREE/REFUSE responses are then collected by message id (see
+        sendAsync()), so the batch costs roughly one round trip to the stack
+        instead of one per datagram.
 
-        logger.debug(f"Waiting for send completion notification for datagram with reliability={getattr(req, 'reliability', None)}")
+        The send mode applies to each datagram as in send(): NON_BLOCKING does
+        not wait for responses, SEMI_BLOCKING waits for AGREE (and for a
+        delivery/failure notification if reliability is True), and BLOCKING
+        also waits for a transmission or delivery/failure notification.
 
-        ntf = self.gw.receive(req, self.BLOCKING)
-        logger.debug(f"Received send completion notification: {ntf}")
+        Args:
+            payloads: Datagrams to transmit. Each item accepts the same types
+                as the ``data`` argument of send().
+            to: Destination node address. Uses default if not specified.
+            protocol: Protocol number. Uses default if not specified.
+
+        Returns:
+            List with one entry per payload, True if that datagram was sent
+            successfully and False otherwise.
+
+        Example:
+            >>> sock.sendMany([[1, 2], [3, 4], [5, 6]], to=31, protocol=Protocol.USER)
+            [True, True, True]
+        """
 
-        return isinstance(ntf, (DatagramDeliveryNtf, DatagramTransmissionNtf))
+        items = list(payloads)
+        if self.gw is None:
+            logger.error("Cannot send datagrams: socket is closed.")
+            return [False] * len(items)
+
+        if self.sendMode == self.NON_BLOCKING:
+            results = []
+            for data in items:
+                req = self._prepare_request(data, to, protocol)
+                if req is None:
+                    results.append(False)
+                    continue
+                if self._dispatcher is not None:
+                    self._drain_replies(self._dispatcher, req)
+                try:
+                    self.gw.send(req)
+                    self._sent(req)
+                    results.append(True)
+                except Exception:
+                    logger.error("Failed to send datagram", exc_info=True)
+                    results.append(False)
+            return results
+
+        # responses are correlated in the background in whatever order they arrive
+        futures = [self.sendAsync(data, to, protocol) for data in items]
+        return [future.result() for future in futures]
 
     def receive(self, timeout: Optional[int] = None) -> Optional[DatagramNtf]: # type: ignore
         """Receive a datagram sent to the local node.
@@ -708,8 +2087,13 @@ class UnetSocket:
         If unbound, receives datagrams with all unreserved protocols.
         Broadcast datagrams are always received.
 
-        This call blocks until a datagram is available, the socket timeout is reached.
-        There is currently no way to cancel a blocking receive.
+        Incoming datagrams are demultiplexed by a background thread into bounded
+        per-(protocol, destination) queues as they arrive, so receive() only pops
+        the oldest queued datagram for the bound protocol. Datagrams for reserved
+        protocols or other nodes are discarded on arrival.
+
+        This call blocks until a datagram is available, the socket timeout is reached,
+        or the socket is cancelled (see cancel()) or closed.
 
         Args:
             timeout: Override timeout in milliseconds. Uses socket timeout if None.
@@ -728,27 +2112,342 @@ class UnetSocket:
         if self.gw is None:
             return None
 
-        def _createMatcher(localAddress, localProtocol) -> Callable[[Message], bool]:
-            def _matches(ntf) -> bool:
-                if ntf is None or not isinstance(ntf, DatagramNtf):
-                    return False
-                to = getattr(ntf, "to", -1)
-                if to != localAddress and to != Address.BROADCAST:
-                    return False
-                proto = getattr(ntf, "protocol", Protocol.DATA)
-                logger.debug(f"Checking if received datagram [{ntf} protocol={proto}] matches")
-                if proto != Protocol.DATA and proto < Protocol.USER:
-                    return False
-                return localProtocol < 0 or localProtocol == proto
-            return _matches
-
         effective_timeout = self._effective_timeout(timeout)
-        logger.debug(f"Trying to receive datagram for up to {effective_timeout} ms")
-        try:
-            return self.gw.receive(_createMatcher(self.localAddress, self.localProtocol), effective_timeout)
-        except Exception:
-            logger.error(f"Failed to receive datagram", exc_info=True)
-            return None
+        deadline = None
+        if effective_timeout != self.BLOCKING:
+            deadline = time.monotonic() + effective_timeout / 1000
+        with self._datagrams_ready:
+            cancels = self._cancels
+            while self.gw is not None and self._cancels == cancels:
+                ntf = self._pop()
+                if ntf is not None:
+                    return ntf
+                if deadline is None:
+                    self._datagrams_ready.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._datagrams_ready.wait(remaining)
+        return None
+
+    def receiveMany(self, n: int, timeout: Optional[int] = None) -> list[DatagramNtf]: # type: ignore
+        """Receive up to n datagrams sent to the local node in one call.
+
+        Blocks only until the first matching datagram is available (as with
+        receive()), then drains up to n-1 further matching datagrams that are
+        already queued without waiting for more. This amortizes the per-call
+        overhead when datagrams arrive in bursts.
+
+        Args:
+            n: Maximum number of datagrams to return.
+            timeout: Override timeout in milliseconds for the first datagram.
+                Uses socket timeout if None.
+
+        Returns:
+            List of DatagramNtf or RxFrameNtf in arrival order, empty on timeout
+            or if closed.
+
+        Example:
+            >>> sock.bind(Protocol.USER)
+            >>> for ntf in sock.receiveMany(32, 1000):
+            ...     print(f"From: {ntf.from_}, Data: {ntf.data}")
+        """
+
+        if n <= 0:
+            return []
+        ntf = self.receive(timeout)
+        if ntf is None:
+            return []
+        batch = [ntf]
+        with self._datagrams_ready:
+            while len(batch) < n:
+                ntf = self._pop()
+                if ntf is None:
+                    break
+                batch.append(ntf)
+        return batch
+
+    def datagrams(
+        self,
+        timeout: Optional[int] = None,
+        source: Optional[int] = None,
+        protocol: Optional[int] = None,
+        minRssi: Optional[float] = None,
+        maxBuffer: Optional[int] = None,
+        dropPolicy: str = _UnetSocketBase.DROP_OLDEST,
+    ) -> Iterator[DatagramNtf]: # type: ignore
+        """Iterate over datagrams sent to the local node as they arrive.
+
+        Datagrams are matched against the bound protocol as in receive(), and
+        then against the optional filters before they are yielded. Filtered
+        out datagrams are consumed and discarded.
+
+        Whenever the consumer asks for the next datagram, everything already
+        queued on the socket is moved into the stream buffer. If ``maxBuffer``
+        is set, the buffer holds at most that many datagrams, and
+        ``dropPolicy`` decides whether the oldest buffered datagrams
+        (DROP_OLDEST) or the newly arrived ones (DROP_NEWEST) are discarded
+        when a slow consumer falls behind.
+
+        Args:
+            timeout: Stop iterating if no datagram arrives for this many
+                milliseconds. Iterates until the socket is closed if None.
+            source: Only yield datagrams from this node address.
+            protocol: Only yield datagrams with this protocol number.
+            minRssi: Only yield datagrams with a received signal strength
+                of at least this value. Datagrams without an ``rssi`` (e.g.
+                those not received directly from the physical layer) are
+                discarded.
+            maxBuffer: Maximum number of buffered datagrams (default: unbounded
+                beyond the socket's own queues).
+            dropPolicy: DROP_OLDEST (default) or DROP_NEWEST.
+
+        Yields:
+            DatagramNtf or RxFrameNtf instances in arrival order.
+
+        Example:
+            >>> sock.bind(Protocol.USER)
+            >>> for ntf in sock.datagrams(timeout=5000, source=31):
+            ...     print(f"From: {ntf.from_}, Data: {ntf.data}")
+        """
+
+        if not self._check_stream_args(maxBuffer, dropPolicy):
+            return
+        wait = self.BLOCKING if timeout is None else timeout
+        accept = self._stream_filter(source, protocol, minRssi)
+        buffer: deque = deque()
+        while self.gw is not None:
+            batch = self.receiveMany(_MAX_QUEUE_SIZE, self.NON_BLOCKING if buffer else wait)
+            if not batch and not buffer:
+                return
+            self._buffer_stream(buffer, batch, accept, maxBuffer, dropPolicy)
+            if buffer:
+                yield buffer.popleft()
+
+    def onReceive(
+        self,
+        callback: Callable[[DatagramNtf], Any], # type: ignore
+        protocol: Optional[int] = None,
+        executor: Any = None,
+        maxConcurrency: int = 4,
+        ordered: bool = False,
+    ) -> bool:
+        """Call a function for every datagram received, instead of polling receive().
+
+        Datagrams are matched as in receive(): against the bound protocol
+        (or the given protocol), and to the local node or broadcast.
+        Matching datagrams are handed to the callback as they arrive and
+        are no longer queued for receive(). Datagrams for other protocols
+        are queued as before.
+
+        Callbacks run on a thread pool created for the socket, on the given
+        ``concurrent.futures.Executor``, or on the given asyncio event loop,
+        where the callback may also be a coroutine function. At most
+        ``maxConcurrency`` callbacks are in progress at a time, and
+        datagrams waiting for a free slot are queued, dropping the oldest
+        when the queue is full. If ``ordered``, datagrams from the same
+        source node are handled one at a time, in the order they arrived.
+
+        A socket has at most one receive callback. Registering a new one
+        replaces it.
+
+        Args:
+            callback: Function called with each DatagramNtf or RxFrameNtf.
+            protocol: Only handle datagrams with this protocol number
+                (default: the bound protocol, or all unreserved protocols if unbound).
+            executor: Executor or asyncio event loop to run the callback on
+                (default: a thread pool of ``maxConcurrency`` threads).
+            maxConcurrency: Maximum number of callbacks in progress (default: 4).
+            ordered: Handle datagrams from each source node in order (default: False).
+
+        Returns:
+            True if the callback was registered, False on error.
+
+        Example:
+            >>> sock.bind(Protocol.USER)
+            >>> sock.onReceive(lambda ntf: print(ntf.from_, ntf.dataBytes), ordered=True)
+            True
+            >>> sock.onReceive(handle, executor=asyncio.get_running_loop())
+            True
+        """
+        if self.gw is None:
+            logger.error("Cannot register receive callback: socket is closed.")
+            return False
+        if maxConcurrency < 1:
+            logger.error(f"Invalid maximum callback concurrency {maxConcurrency}")
+            return False
+        if protocol is not None and protocol != Protocol.DATA and (protocol < Protocol.USER or protocol > Protocol.MAX):
+            logger.error(f"Invalid protocol number {protocol} for receive callback")
+            return False
+        self.removeReceiveCallback()
+        receiver = _ReceiveHandler(self, callback, protocol, executor, maxConcurrency, ordered)
+        with self._datagrams_ready:
+            self._receiver = receiver
+            self._connection.receivers.append(receiver)
+            # datagrams already queued for this socket go to the callback too
+            while True:
+                entry = self._datagrams.popEntry(self.localAddress, self.localProtocol if protocol is None else protocol)
+                if entry is None:
+                    break
+                receiver.offer(entry[1])
+        self._update_scope()
+        return True
+
+    def removeReceiveCallback(self) -> None:
+        """Stop calling the receive callback registered with onReceive().
+
+        Callbacks already in progress complete, and datagrams still waiting
+        for a callback are discarded. Datagrams are queued for receive()
+        again afterwards.
+
+        Example:
+            >>> sock.removeReceiveCallback()
+        """
+        with self._datagrams_ready:
+            receiver = self._receiver
+            if receiver is None:
+                return
+            self._receiver = None
+            self._connection.receivers.remove(receiver)
+        receiver.close()
+        self._update_scope()
+
+    def setSubscriptionProfile(self, profile: str) -> bool:
+        """Set which datagrams the socket subscribes to.
+
+        With SUBSCRIBE_ALL (the default), the socket's connection subscribes
+        to the topics of all datagram agents, so that datagrams for any
+        protocol can be received. With SUBSCRIBE_BOUND, a bound socket only
+        needs the datagrams for its bound protocol (and its onReceive()
+        protocol). Once every socket on the connection is bound with this
+        profile, the per-agent topics are unsubscribed from, and datagrams
+        for other protocols are discarded as they arrive rather than queued,
+        so they are not seen after binding to a different protocol either.
+        Unbinding, or another socket on the connection using SUBSCRIBE_ALL,
+        subscribes to the per-agent topics again.
+
+        SUBSCRIBE_BOUND relies on the node publishing datagrams on the
+        DATAGRAM topic, which UnetStack does from version 5.2.
+
+        Args:
+            profile: SUBSCRIBE_ALL or SUBSCRIBE_BOUND.
+
+        Returns:
+            True if the profile was set, False if it is not valid.
+
+        Example:
+            >>> sock.setSubscriptionProfile(UnetSocket.SUBSCRIBE_BOUND)
+            True
+            >>> sock.bind(Protocol.USER)
+            True
+        """
+        if profile not in (self.SUBSCRIBE_ALL, self.SUBSCRIBE_BOUND):
+            logger.error(f"Invalid subscription profile {profile!r}")
+            return False
+        self.subscriptionProfile = profile
+        self._update_scope()
+        return True
+
+    def getSubscriptionProfile(self) -> str:
+        """Get the subscription profile set with setSubscriptionProfile().
+
+        Returns:
+            SUBSCRIBE_ALL or SUBSCRIBE_BOUND.
+        """
+        return self.subscriptionProfile
+
+    def getDiscardCounts(self) -> dict[str, int]:
+        """Get the number of datagrams discarded on arrival, by reason.
+
+        Counts are kept for the socket's connection, and so include
+        datagrams for other sockets sharing the connection. The reasons are
+        ``unmatched`` (not addressed to the local node), ``unbound`` (for a
+        protocol no socket receives, see setSubscriptionProfile()),
+        ``overflow`` (oldest datagram discarded from a full queue) and
+        ``readdressed`` (queued for an old local address after it changed).
+
+        Returns:
+            Dictionary of discarded datagram counts by reason.
+
+        Example:
+            >>> sock.getDiscardCounts()
+            {'unmatched': 0, 'unbound': 12, 'overflow': 0, 'readdressed': 0}
+        """
+        with self._datagrams_ready:
+            return dict(self._datagrams.discarded)
+
+    def enableMetrics(self, enable: bool = True) -> None:
+        """Enable or disable metrics collection for this socket.
+
+        Metrics are off by default, and cost nothing beyond a check per
+        datagram while off. Enabling metrics starts a fresh SocketMetrics.
+
+        Args:
+            enable: True to start collecting metrics, False to stop.
+
+        Example:
+            >>> sock.enableMetrics()
+            >>> sock.send([1, 2, 3], to=31, protocol=Protocol.USER)
+            True
+            >>> print(sock.getMetrics().toPrometheus())
+        """
+        if not enable:
+            self._metrics = None
+            return
+        with self._datagrams_ready:
+            self._dropped_base = self._datagrams.dropped
+        self._metrics = SocketMetrics()
+
+    def getMetrics(self) -> Optional[SocketMetrics]:
+        """Get the metrics collected for this socket.
+
+        The ``dropped`` counter reports datagrams discarded by the socket's
+        connection since metrics were enabled, and so includes datagrams
+        for other sockets sharing the connection.
+
+        Returns:
+            SocketMetrics, or None if metrics are not enabled.
+        """
+        metrics = self._metrics
+        if metrics is not None:
+            with self._datagrams_ready:
+                dropped = self._datagrams.dropped - self._dropped_base
+            metrics.set("dropped", dropped)
+        return metrics
+
+    def addTraceListener(self, listener: Callable[[dict[str, Any]], None]) -> None:
+        """Add a listener for per-datagram lifecycle events.
+
+        The listener is called with a dictionary for each event, with keys
+        ``event`` (event name), ``msgID`` (id of the DatagramReq or received
+        DatagramNtf, to stitch events together), ``time`` (``time.monotonic()``
+        timestamp) and ``message``. Events for sent datagrams are ``built``,
+        ``provider`` (service provider resolved, with a ``provider`` key),
+        ``submitted``, ``agree``, ``refuse``, ``timeout``, ``transmitted``,
+        ``delivered`` and ``failed``. Received datagrams produce a ``received``
+        event when they are returned to the caller, with a ``queued`` key for
+        the time they arrived. Response and notification events also carry the
+        received message under ``rsp`` or ``ntf``.
+
+        Listeners may be called from the socket's background thread, and must
+        not block. Tracing costs nothing when no listener is added.
+
+        Args:
+            listener: Callable taking an event dictionary.
+
+        Example:
+            >>> sock.addTraceListener(lambda e: print(e["time"], e["event"], e["msgID"]))
+        """
+        self._trace_listeners = self._trace_listeners + (listener,)
+
+    def removeTraceListener(self, listener: Callable[[dict[str, Any]], None]) -> None:
+        """Remove a listener added with addTraceListener().
+
+        Args:
+            listener: Listener to remove. Ignored if not added.
+        """
+        self._trace_listeners = tuple(fn for fn in self._trace_listeners if fn != listener)
 
     def getGateway(self) -> Optional[Gateway]:
         """Get the underlying fjåge Gateway for low-level access.
@@ -766,6 +2465,10 @@ class UnetSocket:
     def agentForService(self, svc) -> Optional[AgentID]:
         """Get an agent providing the specified service.
 
+        Lookups are cached, and the cache is cleared when an agent
+        terminates (see Topics.LIFECYCLE). Services that are not found are
+        looked up again after a few seconds.
+
         Args:
             svc: Service identifier (from Services class).
 
@@ -779,11 +2482,13 @@ class UnetSocket:
 
         if self.gw is None:
             return None
-        return self.gw.agentForService(svc)
+        return self._connection.lookup(svc)
 
     def agentsForService(self, svc) -> Optional[Iterable[AgentID]]:
         """Get all agents providing the specified service.
 
+        Lookups are cached like agentForService().
+
         Args:
             svc: Service identifier (from Services class).
 
@@ -793,7 +2498,7 @@ class UnetSocket:
 
         if self.gw is None:
             return None
-        return self.gw.agentsForService(svc)
+        return self._connection.lookup(svc, True)
 
     def agent(self, name: str) -> Optional[AgentID]:
         """Get an agent by name.
@@ -816,6 +2521,9 @@ class UnetSocket:
     def host(self, nodeName: str) -> Optional[int]:
         """Resolve a node name to its address.
 
+        Resolved names are cached for HOST_CACHE_TTL seconds, and names that
+        the node could not resolve for HOST_CACHE_NEGATIVE_TTL seconds.
+
         Args:
             nodeName: Name of the node to resolve.
 
@@ -831,156 +2539,418 @@ class UnetSocket:
         if self.gw is None:
             logger.error("Cannot resolve host: socket is closed.")
             return None
+        return self.hosts([nodeName])[0]
 
-        arp = self.agentForService(Services.ADDRESS_RESOLUTION)
-        if arp is None:
-            logger.error("No ADDRESS_RESOLUTION service provider found.")
-            return None
+    def hosts(self, nodeNames: Iterable[str]) -> list[Optional[int]]:
+        """Resolve several node names to their addresses.
 
-        req = AddressResolutionReq()
-        req.name = nodeName
-        req.recipient = arp
-        rsp = self.gw.request(req, self.REQUEST_TIMEOUT)
-        if rsp is None:
-            logger.error(f"Address resolution request timed out for node '{nodeName}'")
-            return None
-        return rsp.address
+        Requests for all names that are not cached are sent at once, so
+        resolving many names takes about as long as resolving one.
 
-    def onParamChange(self, agentId: Union[AgentID, str], paramName:str, callback: Callable[[Any], None]) -> None:
-        """Register a callback for parameter change notifications from a specific agent.
+        Args:
+            nodeNames: Names of the nodes to resolve.
+
+        Returns:
+            List with the address of each node in order, or None for nodes
+            that could not be resolved.
+
+        Example:
+            >>> sock.hosts(["A", "B", "C"])
+            [232, 31, None]
+        """
+        names = list(nodeNames)
+        if self.gw is None:
+            logger.error("Cannot resolve hosts: socket is closed.")
+            return [None] * len(names)
+        cache = self._connection.hosts
+        resolved: dict[str, Optional[int]] = {}
+        missing = []
+        for name in dict.fromkeys(names):
+            address = cache.get(name)
+            if address is _MISSING:
+                missing.append(name)
+            else:
+                resolved[name] = address
+        if missing:
+            resolved.update(self._resolve_hosts(missing))
+        return [resolved.get(name) for name in names]
+
+    def hostName(self, address: int) -> Optional[str]:
+        """Get the name of a node from its address.
+
+        Only names resolved by host() or hosts() (on any socket sharing this
+        socket's connection) are known, so no request is sent to the node.
 
         Args:
-            agentId: AgentID or name of the agent to monitor.
-            paramName: Name of the parameter to watch for changes.
-            callback: Function to call with the new parameter value when a change is detected.
+            address: Node address.
+
+        Returns:
+            Node name, or None if no cached resolution has that address.
 
         Example:
-            >>> def on_address_change(ntf):
-            ...     print(f"Address changed: {ntf.paramValues['address']}")
-            ...
-            >>> sock.onParamChange("node", "address", on_address_change)
+            >>> sock.host("B")
+            31
+            >>> sock.hostName(31)
+            'B'
         """
         if self.gw is None:
-            logger.error("Cannot register parameter change callback: socket is closed.")
-            return
-        if isinstance(agentId, AgentID):
-            agent = agentId.get_name()
-        else:
-            agent = agentId
+            return None
+        return self._connection.hosts.name(address)
 
-        self._param_change_callbacks["{}:{}".format(agent, paramName)] = callback
+    def params(self, agentId: Union[AgentID, str], maxAge: Optional[float] = None) -> Optional[ParamMirror]:
+        """Get a local mirror of the parameters of an agent.
 
-    def removeParamChangeCallback(self, agentId: Union[AgentID, str], paramName:str) -> None:
-        """Remove a previously registered parameter change callback.
+        The first call for an agent reads all its parameters in one request,
+        after which parameter reads are served locally and kept up to date
+        from parameter change notifications. Later calls return the same
+        mirror. Setting a parameter on the mirror sets it on the agent.
 
         Args:
             agentId: AgentID or name of the agent.
-            paramName: Name of the parameter.
+            maxAge: Maximum age of mirrored values in seconds, after which a
+                value is read from the agent again (default: None, values are
+                only updated by notifications). Changes the maximum age of an
+                existing mirror if given.
+
+        Returns:
+            ParamMirror for the agent, or None if the socket is closed.
 
         Example:
-            >>> sock.removeParamChangeCallback("node", "address")
+            >>> sock.params("phy").MTU
+            64
+            >>> sock.params(sock.agentForService(Services.NODE_INFO), maxAge=60).address
+            232
         """
         if self.gw is None:
-            logger.error("Cannot remove parameter change callback: socket is closed.")
-            return
-        if isinstance(agentId, AgentID):
-            agent = agentId.get_name()
-        else:
-            agent = agentId
+            logger.error("Cannot mirror parameters: socket is closed.")
+            return None
+        agent = self.gw.agent(agentId) if isinstance(agentId, str) else agentId
+        name = agent.get_name()
+        mirror = self._param_mirrors.get(name)
+        if mirror is None:
+            mirror = ParamMirror(agent, self._request, maxAge)
+            # notifications from older UnetStack versions are only published on the agent's topic
+            self._connection.subscribe(self.gw.topic(agent), mirror)
+            self._param_mirrors[name] = mirror
+            mirror.refresh()
+        elif maxAge is not None:
+            mirror.setMaxAge(maxAge)
+        return mirror
+
+    def getParams(self, agentId: Union[AgentID, str], params: Iterable[str], index: int = -1) -> Optional[dict[str, Any]]:
+        """Read several parameters of an agent in a single request.
 
-        key = "{}:{}".format(agent, paramName)
-        if key in self._param_change_callbacks:
-            del self._param_change_callbacks[key]
-        else:
-            logger.warning(f"No parameter change callback found for agent '{agent}' and parameter '{paramName}'")
+        Args:
+            agentId: AgentID or name of the agent.
+            params: Parameter names.
+            index: Index for indexed parameters (default: -1, not indexed).
+
+        Returns:
+            Dictionary of parameter names to values, leaving out parameters
+            the agent does not have, or None if the request failed.
+
+        Example:
+            >>> sock.getParams("phy", ["MTU", "busy"])
+            {'MTU': 64, 'busy': False}
+        """
+        names = list(params)
+        if self.gw is None:
+            logger.error("Cannot read parameters: socket is closed.")
+            return None
+        if not names:
+            return {}
+        agent = self.gw.agent(agentId) if isinstance(agentId, str) else agentId
+        values = self._param_values(self._request(self._param_request(agent, names, None, index)))
+        if values is None:
+            logger.error(f"Unable to read parameters {names} of {agent.get_name()}")
+        return values
+
+    def setParams(self, agentId: Union[AgentID, str], values: dict[str, Any], index: int = -1) -> Optional[dict[str, Any]]:
+        """Set several parameters of an agent in a single request.
+
+        Args:
+            agentId: AgentID or name of the agent.
+            values: Dictionary of parameter names to new values.
+            index: Index for indexed parameters (default: -1, not indexed).
 
+        Returns:
+            Dictionary of the values reported back by the agent, leaving out
+            parameters the agent does not have, or None if the request failed.
+
+        Example:
+            >>> sock.setParams("phy", {"powerLevel": -10, "fec": 1}, index=1)
+            {'powerLevel': -10.0, 'fec': 1}
+        """
+        if self.gw is None:
+            logger.error("Cannot set parameters: socket is closed.")
+            return None
+        if not values:
+            return {}
+        agent = self.gw.agent(agentId) if isinstance(agentId, str) else agentId
+        result = self._param_values(self._request(self._param_request(agent, (), values, index)))
+        if result is None:
+            logger.error(f"Unable to set parameters {list(values)} of {agent.get_name()}")
+            return None
+        mirror = self._param_mirrors.get(agent.get_name())
+        if mirror is not None and index < 0:
+            mirror._update(result)
+        return result
 
 ## Internal helper methods
 
-    def _build_datagram_request(
+    def _resolve_hosts(self, names: list[str]) -> dict[str, Optional[int]]:
+        gw = self.gw
+        dispatcher = self._dispatcher
+        if gw is None or dispatcher is None:
+            return {}
+        arp = self.agentForService(Services.ADDRESS_RESOLUTION)
+        if arp is None:
+            logger.error("No ADDRESS_RESOLUTION service provider found.")
+            return {}
+        replies: dict[str, Optional[Message]] = {}
+        ready = Condition()
+
+        def expect(name: str, req: Message) -> None:
+            def on_rsp(rsp: Optional[Message]) -> None:
+                dispatcher.forget(req)
+                with ready:
+                    replies[name] = rsp
+                    ready.notify_all()
+            dispatcher.expect(req, on_rsp, self.REQUEST_TIMEOUT)
+
+        # register all replies first, then send the requests back to back
+        requests = []
+        for name in names:
+            req = AddressResolutionReq()
+            req.name = name
+            req.recipient = arp
+            expect(name, req)
+            requests.append(req)
+        try:
+            for req in requests:
+                gw.send(req)
+        except Exception:
+            logger.error("Failed to send address resolution request", exc_info=True)
+        with ready:
+            ready.wait_for(lambda: len(replies) == len(names), self.REQUEST_TIMEOUT / 1000 + 1)
+        for req in requests:
+            dispatcher.forget(req)
+
+        addresses: dict[str, Optional[int]] = {}
+        for name in names:
+            rsp = replies.get(name)
+            if rsp is None:
+                logger.error(f"Address resolution request timed out for node '{name}'")
+                continue
+            # a node that cannot resolve the name refuses the request
+            address = getattr(rsp, "address", None)
+            self._connection.hosts.put(name, address)
+            addresses[name] = address
+        return addresses
+
+    def _request(self, req: Message) -> Optional[Message]:
+        # like gw.request(), but registered for the reply before sending
+        gw = self.gw
+        dispatcher = self._dispatcher
+        if gw is None or dispatcher is None:
+            return None
+        replies: SimpleQueue = SimpleQueue()
+
+        def on_rsp(rsp: Optional[Message]) -> None:
+            dispatcher.forget(req)
+            replies.put(rsp)
+
+        dispatcher.expect(req, on_rsp, self.REQUEST_TIMEOUT)
+        try:
+            gw.send(req)
+        except Exception:
+            dispatcher.forget(req)
+            logger.error("Failed to send request", exc_info=True)
+            return None
+        return replies.get()
+
+    def _update_scope(self) -> None:
+        if self.gw is not None:
+            self._connection.updateSubscriptions()
+
+    def _submit_param_change(self, run: Callable[[], None]) -> None:
+        executor = self._param_change_executor
+        if executor is None:
+            with self._param_change_lock:
+                if self._param_change_executor is None:
+                    self._param_change_executor = ThreadPoolExecutor(
+                        self.PARAM_CHANGE_WORKERS, thread_name_prefix="unetpy-paramchange")
+                executor = self._param_change_executor
+        try:
+            executor.submit(run)
+        except RuntimeError:
+            # the socket was closed
+            with self._param_change_lock:
+                self._param_change_running.clear()
+                self._param_change_pending.clear()
+
+    def _pop(self) -> Optional[Message]:
+        # called with _datagrams_ready held
+        entry = self._datagrams.popEntry(self.localAddress, self.localProtocol)
+        if entry is None:
+            return None
+        self._received(entry[1], entry[0])
+        return entry[1]
+
+    def _received(self, ntf: Message, queued: float) -> None:
+        metrics = self._metrics
+        if metrics is not None:
+            metrics.inc("received")
+            metrics.observe("receive_wait", time.monotonic() - queued)
+        if self._trace_listeners:
+            self._trace("received", ntf, queued=queued)
+
+    def _trace(self, event: str, msg: Message, **extra: Any) -> None:
+        info = {"event": event, "msgID": msg.msgID, "time": time.monotonic(), "message": msg, **extra}
+        for listener in self._trace_listeners:
+            try:
+                listener(info)
+            except Exception:
+                logger.error(f"Error in trace listener for {event} event", exc_info=True)
+
+    def _readable(self) -> bool:
+        # a closed socket is readable, as receive() returns immediately
+        with self._datagrams_ready:
+            return self.gw is None or self._datagrams.peek(self.localAddress, self.localProtocol)
+
+    def _submit(self, req: Message) -> "Future[bool]":
+        dispatcher = self._dispatcher
+        if self.gw is None or dispatcher is None:
+            return self._resolved(False)
+        future: Future[bool] = Future()
+        reliable = bool(getattr(req, "reliability", False))
+        wait_for_tx = self.sendMode == self.BLOCKING or reliable
+        metrics = self._metrics
+        submitted = agreed = time.monotonic() if metrics is not None else 0.0
+
+        def done(result: bool) -> None:
+            dispatcher.forget(req)
+            with self._datagrams_ready:
+                self._pending_sends.pop(future, None)
+            if not future.done():
+                try:
+                    future.set_result(result)
+                except InvalidStateError:
+                    pass  # completed concurrently by cancel()
+
+        def on_ntf(ntf: Optional[Message]) -> None:
+            logger.debug(f"Received send notification: {ntf}")
+            if ntf is None:
+                if metrics is not None:
+                    metrics.inc("timeout")
+                if self._trace_listeners:
+                    self._trace("timeout", req)
+                done(False)
+                return
+            if isinstance(ntf, DatagramTransmissionNtf):
+                if metrics is not None:
+                    metrics.observe("transmit", time.monotonic() - agreed)
+                if self._trace_listeners:
+                    self._trace("transmitted", req, ntf=ntf)
+            outcome = self._send_outcome(ntf, reliable)
+            if outcome is None:
+                return  # not the notification that completes this send
+            if reliable or not outcome:
+                if metrics is not None:
+                    metrics.inc("delivered" if outcome else "failed")
+                    metrics.observe("deliver", time.monotonic() - submitted)
+                if self._trace_listeners:
+                    self._trace("delivered" if outcome else "failed", req, ntf=ntf)
+            done(outcome)
+
+        def on_rsp(rsp: Optional[Message]) -> None:
+            nonlocal agreed
+            logger.debug(f"Received response for datagram send request: {rsp}")
+            if metrics is not None:
+                agreed = time.monotonic()
+                if rsp is None:
+                    metrics.inc("timeout")
+                else:
+                    metrics.observe("agree", agreed - submitted)
+                    if rsp.perf != Performative.AGREE:
+                        metrics.inc("refused")
+            if self._trace_listeners:
+                if rsp is None:
+                    self._trace("timeout", req)
+                else:
+                    self._trace("agree" if rsp.perf == Performative.AGREE else "refuse", req, rsp=rsp)
+            if rsp is None or rsp.perf != Performative.AGREE:
+                done(False)
+            elif wait_for_tx:
+                dispatcher.expect(req, on_ntf, self.DELIVERY_TIMEOUT)
+            else:
+                done(True)
+
+        with self._datagrams_ready:
+            self._pending_sends[future] = done
+        # register before sending so an early reply cannot be missed
+        dispatcher.expect(req, on_rsp, self.REQUEST_TIMEOUT)
+        # trace before sending, so that the submitted event precedes the AGREE
+        if self._trace_listeners:
+            self._trace("submitted", req)
+        try:
+            self.gw.send(req)
+        except Exception:
+            logger.error("Failed to send datagram", exc_info=True)
+            done(False)
+            return future
+        if metrics is not None:
+            metrics.inc("sent")
+        return future
+
+    @staticmethod
+    def _resolved(result: bool) -> "Future[bool]":
+        future: Future[bool] = Future()
+        future.set_result(result)
+        return future
+
+    def _prepare_request(
         self,
-        data: Union[bytes, bytearray, Sequence[int], Message, str],
+        data: Union[bytes, bytearray, memoryview, Sequence[int], Message, str],
         to: Optional[int],
         protocol: Optional[int],
     ) -> Optional[DatagramReq]: # type: ignore
-        if isinstance(data, Message):
-            if not isinstance(data, DatagramReq):
-                logger.error("Message provided is not a DatagramReq")
-                return None
-            req = data
-            payload = getattr(req, "data", None)
-            if isinstance(payload, (bytes, bytearray)):
-                req.data = list(payload)
-            elif isinstance(payload, str):
-                req.data = list(payload.encode("utf-8"))
-        else:
-            if (self.mimeType is None and self.messageClass is None and self.remoteRecipient is None and self.mailbox is None):
-                req = DatagramReq()
-            else:
-                req = RemoteMessageReq()
-                if (self.mimeType is not None):
-                    req.mimeType = self.mimeType;
-                req.messageClass = self.messageClass
-                req.remoteRecipient = self.remoteRecipient
-                req.mailbox = self.mailbox
-            if (isnan(self.ttl) == False):
-                logger.debug(f"Setting TTL to {self.ttl} for datagram request")
-                req.ttl = self.ttl
-            if (self.priority is not None):
-                req.priority = self.priority
-            if (self.robustness is not None):
-                req.robustness = self.robustness
-            req.reliability = self.reliability
-            req.route = self.route
-            req.data = self._normalize_payload(data)
-            destination = to if to is not None else self.remoteAddress
-            proto = protocol if protocol is not None else self.remoteProtocol
-            if destination < 0:
-                logger.error("No destination address specified for sending datagram")
-                return None
-            req.to = destination
-            req.protocol = proto
-        if req.protocol != Protocol.DATA and (
-            req.protocol < Protocol.USER or req.protocol > Protocol.MAX
-        ):
-            logger.error(f"Invalid protocol number {req.protocol} for sending datagram")
+        metrics = self._metrics
+        t0 = time.monotonic() if metrics is not None else 0.0
+        req = self._build_datagram_request(data, to, protocol)
+        if req is None:
             return None
-        logger.debug(f"Built {req} for sending")
+        if self._trace_listeners:
+            self._trace("built", req)
+        if req.recipient is None:
+            provider = self._resolve_provider()
+            if provider is None:
+                logger.error("No datagram service provider found. Not sending datagram.")
+                return None
+            logger.debug(f"Using {provider} as datagram service provider.")
+            req.recipient = provider
+            if self._trace_listeners:
+                self._trace("provider", req, provider=provider)
+        if metrics is not None:
+            metrics.observe("build", time.monotonic() - t0)
         return req
 
-    def _normalize_payload(
-        self,
-        data: Union[bytes, bytearray, Sequence[int], str],
-    ) -> Sequence[int]:
-        if isinstance(data, str):
-            return list(data.encode("utf-8"))
-        if isinstance(data, (bytes, bytearray)):
-            return list(data)
-        return list(data)
+    def _sent(self, req: Message) -> None:
+        metrics = self._metrics
+        if metrics is not None:
+            metrics.inc("sent")
+        if self._trace_listeners:
+            self._trace("submitted", req)
 
     def _resolve_provider(self) -> Optional[AgentID]:
         if self.gw is None:
             return None
         if self.provider is not None:
             return self.provider
-        for service in (
-            Services.REMOTE,
-            Services.TRANSPORT,
-            Services.ROUTING,
-            Services.LINK,
-            Services.PHYSICAL,
-            Services.DATAGRAM,
-        ):
-            agent = self.gw.agentForService(service)
+        # not latched: the lookups are cached until the provider terminates
+        for service in self._PROVIDER_SERVICES:
+            agent = self.agentForService(service)
             if agent is not None:
-                self.provider = agent
-                break
-        return self.provider
-
-    def _effective_timeout(self, override: Optional[int]) -> int:
-        if override is None:
-            return self.timeout
-        if override < 0:
-            return UnetSocket.BLOCKING
-        return override
+                return agent
+        return None
 
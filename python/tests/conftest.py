@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import os
 from pathlib import Path
 import pytest
 import subprocess
@@ -14,6 +15,9 @@ GET_UNET_SCRIPT = TESTS_DIR / "get-unet.sh"
 SIM_SCRIPT = TESTS_DIR / "sim.sh"
 SIM_HOST = "127.0.0.1"
 SIM_PORTS = (1101, 1102)
+# set UNETPY_LOCAL_STACK=1 to run against the in-process LocalUnetStack instead
+# of the UnetStack simulator (no Java or network access needed)
+LOCAL_STACK = os.environ.get("UNETPY_LOCAL_STACK", "") not in ("", "0")
 
 
 def _run_script(script: Path, *args: str) -> None:
@@ -24,6 +28,16 @@ def _run_script(script: Path, *args: str) -> None:
 def socket_module_setup():
     """Start UnetStack once for the entire pytest session."""
 
+    if LOCAL_STACK:
+        from unetpy import LocalUnetStack
+
+        print("\n[Setup] starting local UnetStack stand-in")
+        with LocalUnetStack() as stack:
+            stack.addNode("A", 232, SIM_PORTS[0], SIM_HOST)
+            stack.addNode("B", 31, SIM_PORTS[1], SIM_HOST)
+            yield
+        return
+
     print("\n[Setup] downloading UnetStack")
 
     _run_script(GET_UNET_SCRIPT)
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from unetpy import (
+    AgentID,
+    AsyncUnetSocket,
+    DatagramNtf,
+    Protocol,
+    Services,
+    UnetSocket,
+)
+
+# Apply socket_module_setup fixture to all tests in this module
+pytestmark = pytest.mark.usefixtures("socket_module_setup")
+
+
+# Node A (232): tcp://localhost:1101
+# Node B (31): tcp://localhost:1102
+
+NODE_A_HOST = "localhost"
+NODE_A_PORT = 1101
+NODE_A_ADDRESS = 232
+
+NODE_B_HOST = "localhost"
+NODE_B_PORT = 1102
+NODE_B_ADDRESS = 31
+
+
+class TestAsyncUnetSocketConstruction:
+    """Tests for AsyncUnetSocket construction and basic lifecycle."""
+
+    def test_socket_can_be_awaited(self):
+        """AsyncUnetSocket should connect when awaited and close when closed."""
+        async def main():
+            sock = await AsyncUnetSocket(NODE_A_HOST, NODE_A_PORT)
+            assert not sock.isClosed()
+            await sock.close()
+            assert sock.isClosed()
+
+        asyncio.run(main())
+
+    def test_socket_is_not_open_until_awaited(self):
+        """AsyncUnetSocket should not connect from the constructor."""
+        sock = AsyncUnetSocket(NODE_A_HOST, NODE_A_PORT)
+        assert sock.isClosed()
+        assert sock.getGateway() is None
+
+    def test_get_local_address(self):
+        """AsyncUnetSocket should be able to get local address."""
+        async def main():
+            async with AsyncUnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+                assert sock.localAddress == NODE_A_ADDRESS
+                assert await sock.getLocalAddress() == NODE_A_ADDRESS
+
+        asyncio.run(main())
+
+    def test_configuration_matches_unet_socket(self):
+        """AsyncUnetSocket should share the UnetSocket configuration API."""
+        sock = AsyncUnetSocket(NODE_A_HOST, NODE_A_PORT)
+        assert sock.bind(Protocol.USER)
+        assert sock.getLocalProtocol() == Protocol.USER
+        assert not sock.bind(5)
+        assert sock.connect(NODE_B_ADDRESS, Protocol.USER)
+        assert sock.getRemoteAddress() == NODE_B_ADDRESS
+        sock.setTtl(3.0)
+        assert sock.getTtl() == 3.0
+        assert sock.getSendMode() == UnetSocket.SEMI_BLOCKING
+
+        req = sock._build_datagram_request([1, 2, 3], None, None)
+        assert req is not None
+        assert req.to == NODE_B_ADDRESS
+        assert req.protocol == Protocol.USER
+        assert req.ttl == 3.0
+
+
+class TestAsyncUnetSocketAgentAccess:
+    """Tests for host resolution and parameter access."""
+
+    def test_host_and_parameters(self):
+        """AsyncUnetSocket should resolve hosts and read parameters as coroutines."""
+        async def main():
+            async with AsyncUnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+                assert await sock.host("A") == NODE_A_ADDRESS
+                assert await sock.host("B") == NODE_B_ADDRESS
+                assert await sock.hosts(["B", "NoSuchNode", "A"]) == [NODE_B_ADDRESS, None, NODE_A_ADDRESS]
+                assert sock.hostName(NODE_B_ADDRESS) == "B"
+
+                phy = await sock.agentForService(Services.PHYSICAL)
+                assert isinstance(phy, AgentID)
+                assert await sock.getParam(phy, "MTU") > 0
+                assert await sock.getParam("node", "nodeName") == "A"
+                assert await sock.getParams("node", ["address", "nodeName"]) == {"address": NODE_A_ADDRESS, "nodeName": "A"}
+
+        asyncio.run(main())
+
+    def test_concurrent_requests(self):
+        """Many outstanding requests should be awaited concurrently."""
+        async def main():
+            async with AsyncUnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+                names = ["A", "B"] * 10
+                addrs = await asyncio.gather(*[sock.host(n) for n in names])
+                assert addrs == [NODE_A_ADDRESS, NODE_B_ADDRESS] * 10
+
+        asyncio.run(main())
+
+
+class TestAsyncUnetSocketCommunication:
+    """Tests for datagram communication between nodes."""
+
+    def test_datagram_between_two_nodes(self):
+        """Datagrams should flow between two simulator nodes using coroutines."""
+        async def main():
+            async with AsyncUnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1:
+                async with AsyncUnetSocket(NODE_B_HOST, NODE_B_PORT) as sock2:
+                    assert sock2.bind(Protocol.USER)
+                    while await sock2.receive(100) is not None:
+                        pass
+
+                    results = await asyncio.gather(*[
+                        sock1.send([61, i], NODE_B_ADDRESS, Protocol.USER) for i in range(3)
+                    ])
+                    assert all(results)
+
+                    received = []
+                    for _ in range(3):
+                        ntf = await sock2.receive(5000)
+                        assert isinstance(ntf, DatagramNtf)
+                        received.append(ntf.data)
+                    assert sorted(received) == [[61, 0], [61, 1], [61, 2]]
+
+        asyncio.run(main())
+
+    def test_datagrams_received_while_opening_are_kept(self, monkeypatch):
+        """Datagrams arriving before the local address is known should be delivered once it is."""
+        getParam = AsyncUnetSocket.getParam
+
+        async def slow_getParam(self, *args, **kwargs):
+            with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sender:
+                assert sender.send([64], NODE_B_ADDRESS, Protocol.USER)
+            await asyncio.sleep(0.5)
+            return await getParam(self, *args, **kwargs)
+
+        async def main():
+            monkeypatch.setattr(AsyncUnetSocket, "getParam", slow_getParam)
+            sock = await AsyncUnetSocket(NODE_B_HOST, NODE_B_PORT)
+            monkeypatch.setattr(AsyncUnetSocket, "getParam", getParam)
+            try:
+                assert sock.localAddress == NODE_B_ADDRESS
+                ntf = await sock.receive(3000)
+                assert isinstance(ntf, DatagramNtf)
+                assert ntf.data == [64]
+            finally:
+                await sock.close()
+
+        asyncio.run(main())
+
+    def test_receive_many(self):
+        """receiveMany() should drain queued datagrams after the first arrives."""
+        async def main():
+            async with AsyncUnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1:
+                async with AsyncUnetSocket(NODE_B_HOST, NODE_B_PORT) as sock2:
+                    assert sock2.bind(Protocol.USER)
+                    for i in range(4):
+                        assert await sock1.send([62, i], NODE_B_ADDRESS, Protocol.USER)
+                    await asyncio.sleep(0.5)
+
+                    batch = await sock2.receiveMany(10, 5000)
+                    assert [ntf.data for ntf in batch] == [[62, i] for i in range(4)]
+                    assert await sock2.receiveMany(10, 100) == []
+
+        asyncio.run(main())
+
+    def test_datagram_stream(self):
+        """datagrams() should support async iteration with filters."""
+        async def main():
+            async with AsyncUnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1:
+                async with AsyncUnetSocket(NODE_B_HOST, NODE_B_PORT) as sock2:
+                    for i in range(3):
+                        assert await sock1.send([63, i], NODE_B_ADDRESS, Protocol.USER)
+                    assert await sock1.send([63, 9], NODE_B_ADDRESS, Protocol.USER + 1)
+                    await asyncio.sleep(0.5)
+
+                    received = [ntf.data async for ntf in sock2.datagrams(timeout=300, protocol=Protocol.USER)]
+                    assert received == [[63, 0], [63, 1], [63, 2]]
+
+        asyncio.run(main())
+
+    def test_receive_timeout(self):
+        """receive() should honour timeouts without blocking the event loop."""
+        async def main():
+            async with AsyncUnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+                sock.bind(Protocol.USER)
+                t1 = time.time()
+                ticks = 0
+
+                async def ticker():
+                    nonlocal ticks
+                    while True:
+                        await asyncio.sleep(0.1)
+                        ticks += 1
+
+                task = asyncio.ensure_future(ticker())
+                assert await sock.receive(1000) is None
+                task.cancel()
+                assert (time.time() - t1) * 1000 >= 1000
+                assert ticks >= 5
+
+                assert await sock.receive(0) is None
+
+        asyncio.run(main())
+
+    def test_close_wakes_blocked_receive(self):
+        """Closing the socket should wake a blocked receive()."""
+        async def main():
+            sock = await AsyncUnetSocket(NODE_A_HOST, NODE_A_PORT)
+            sock.bind(Protocol.USER)
+            task = asyncio.ensure_future(sock.receive(AsyncUnetSocket.BLOCKING))
+            await asyncio.sleep(0.2)
+            await sock.close()
+            assert await asyncio.wait_for(task, 2) is None
+
+        asyncio.run(main())
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from unetpy import LocalUnetStack, Protocol, Services, UnetSocket
+
+# The local stack listens on free ports, so these tests do not need the simulator.
+
+NODE_A_ADDRESS = 232
+NODE_B_ADDRESS = 31
+
+
+def _stack(**kwargs) -> LocalUnetStack:
+    stack = LocalUnetStack(**kwargs)
+    stack.addNode("A", NODE_A_ADDRESS)
+    stack.addNode("B", NODE_B_ADDRESS)
+    stack.start()
+    return stack
+
+
+class TestLocalUnetStack:
+    """Tests for the offline UnetStack stand-in."""
+
+    def test_invalid_arguments(self):
+        """Out of range latency, loss or agreeRate should be rejected."""
+        with pytest.raises(ValueError):
+            LocalUnetStack(latency=-1)
+        with pytest.raises(ValueError):
+            LocalUnetStack(loss=1.5)
+        with pytest.raises(ValueError):
+            LocalUnetStack(agreeRate=-0.1)
+
+    def test_nodes_agents_and_parameters(self):
+        """Nodes should expose node info, datagram, address resolution and shell agents."""
+        with _stack() as stack:
+            assert stack.getNodes() == ["A", "B"]
+            assert stack.isRunning()
+            with pytest.raises(ValueError):
+                stack.addNode("A", 1)
+            with UnetSocket("localhost", stack.getPort("A")) as sock:
+                assert sock.getLocalAddress() == NODE_A_ADDRESS
+                assert sock.host("B") == NODE_B_ADDRESS
+                assert sock.agent("node").nodeName == "A"
+                assert sock.agentForService(Services.PHYSICAL).MTU == 64
+                assert sock.agentForService(Services.LINK) is not None
+                assert sock.agentForService(Services.SHELL) is not None
+        assert not stack.isRunning()
+        assert stack.getPort("A") is None
+
+    def test_datagrams_between_nodes(self):
+        """Datagrams should be delivered to the destination node with a delivery notification."""
+        with _stack() as stack:
+            with UnetSocket("localhost", stack.getPort("A")) as sock1:
+                with UnetSocket("localhost", stack.getPort("B")) as sock2:
+                    assert sock2.bind(Protocol.USER)
+                    assert sock1.send([1, 2, 3], NODE_B_ADDRESS, Protocol.USER)
+                    ntf = sock2.receive(3000)
+                    assert ntf.data == [1, 2, 3]
+                    assert ntf.from_ == NODE_A_ADDRESS
+
+                    sock1.setReliability(True)
+                    assert sock1.send([4], NODE_B_ADDRESS, Protocol.USER)
+                    assert not sock1.send([5], NODE_B_ADDRESS + 1, Protocol.USER)
+                    assert sock2.receive(3000).data == [4]
+
+    def test_latency_loss_and_refusal(self):
+        """Latency should delay datagrams, and loss and agreeRate should fail sends."""
+        with _stack(latency=0.3) as stack:
+            with UnetSocket("localhost", stack.getPort("A")) as sock1:
+                with UnetSocket("localhost", stack.getPort("B")) as sock2:
+                    assert sock2.bind(Protocol.USER)
+                    t1 = time.time()
+                    assert sock1.send([6], NODE_B_ADDRESS, Protocol.USER)
+                    assert sock2.receive(3000).data == [6]
+                    assert time.time() - t1 >= 0.3
+
+        with _stack(loss=1.0) as stack:
+            with UnetSocket("localhost", stack.getPort("A")) as sock1:
+                with UnetSocket("localhost", stack.getPort("B")) as sock2:
+                    assert sock2.bind(Protocol.USER)
+                    assert sock1.send([7], NODE_B_ADDRESS, Protocol.USER)
+                    sock1.setReliability(True)
+                    assert not sock1.send([8], NODE_B_ADDRESS, Protocol.USER)
+                    assert sock2.receive(300) is None
+
+        with _stack(agreeRate=0.0) as stack:
+            with UnetSocket("localhost", stack.getPort("A")) as sock:
+                assert not sock.send([9], NODE_B_ADDRESS, Protocol.USER)
+
+    def test_parameter_changes_are_published(self):
+        """Setting a parameter should publish a parameter change notification."""
+        with _stack() as stack:
+            with UnetSocket("localhost", stack.getPort("A")) as sock:
+                changed = threading.Event()
+                sock.onParamChange("phy", "MTU", lambda value: changed.set())
+                phy = sock.agentForService(Services.PHYSICAL)
+                phy.MTU = 32
+                assert changed.wait(3)
+                assert phy.MTU == 32
+
+                sock.agent("node").address = 42
+                deadline = time.time() + 3
+                while sock.getLocalAddress() != 42 and time.time() < deadline:
+                    time.sleep(0.05)
+                assert sock.getLocalAddress() == 42
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import pytest
+
+from unetpy import AgentID, LatencyHistogram, Protocol, SocketMetrics, UnetSocket
+
+# Apply socket_module_setup fixture to all tests in this module
+pytestmark = pytest.mark.usefixtures("socket_module_setup")
+
+
+# Node A (232): tcp://localhost:1101
+# Node B (31): tcp://localhost:1102
+
+NODE_A_HOST = "localhost"
+NODE_A_PORT = 1101
+NODE_A_ADDRESS = 232
+
+NODE_B_HOST = "localhost"
+NODE_B_PORT = 1102
+NODE_B_ADDRESS = 31
+
+
+class TestLatencyHistogram:
+    """Tests for the latency histogram."""
+
+    def test_observations_and_quantiles(self):
+        """Observations should land in cumulative buckets with quantile estimates."""
+        h = LatencyHistogram((0.001, 0.01, 0.1))
+        assert h.quantile(0.5) is None
+        for seconds in (0.0005, 0.002, 0.003, 0.05, 2.0):
+            h.observe(seconds)
+        assert h.count == 5
+        assert h.sum == pytest.approx(2.0555)
+        assert h.quantile(0.5) == 0.01
+        assert h.quantile(0.99) == float("inf")
+        assert h.toDict()["buckets"] == {"0.001": 1, "0.01": 3, "0.1": 4, "+Inf": 5}
+
+    def test_prometheus_export(self):
+        """Metrics should export counters and histograms in Prometheus text format."""
+        m = SocketMetrics()
+        m.inc("sent", 2)
+        m.observe("agree", 0.003)
+        text = m.toPrometheus(labels={"node": "A"})
+        assert "# TYPE unetpy_socket_sent_total counter\n" in text
+        assert 'unetpy_socket_sent_total{node="A"} 2\n' in text
+        assert 'unetpy_socket_agree_seconds_bucket{node="A",le="0.005"} 1\n' in text
+        assert 'unetpy_socket_agree_seconds_bucket{node="A",le="+Inf"} 1\n' in text
+        assert 'unetpy_socket_agree_seconds_count{node="A"} 1\n' in text
+        m.reset()
+        assert m.toDict()["counters"]["sent"] == 0
+
+
+class TestUnetSocketMetrics:
+    """Tests for metrics collected by UnetSocket."""
+
+    def test_metrics_are_opt_in(self):
+        """Metrics should only be collected once enabled."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+            assert sock.getMetrics() is None
+            sock.enableMetrics()
+            assert isinstance(sock.getMetrics(), SocketMetrics)
+            sock.enableMetrics(False)
+            assert sock.getMetrics() is None
+
+    def test_send_and_receive_are_counted(self):
+        """Sends, deliveries, failures and receives should be counted and timed."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1:
+            with UnetSocket(NODE_B_HOST, NODE_B_PORT) as sock2:
+                sock1.enableMetrics()
+                sock2.enableMetrics()
+                assert sock2.bind(Protocol.USER)
+
+                assert sock1.send([111], NODE_B_ADDRESS, Protocol.USER)
+                sock1.setReliability(True)
+                assert sock1.send([112], NODE_B_ADDRESS, Protocol.USER)
+                assert not sock1.send([113], NODE_B_ADDRESS + 1, Protocol.USER)
+                assert not sock1.send([114], NODE_B_ADDRESS, 5)
+
+                assert sock2.receive(3000).data == [111]
+                assert sock2.receive(3000).data == [112]
+
+                sent = sock1.getMetrics().toDict()
+                assert sent["counters"]["sent"] == 3
+                assert sent["counters"]["delivered"] == 1
+                assert sent["counters"]["failed"] == 1
+                assert sent["histograms"]["build"]["count"] == 3
+                assert sent["histograms"]["agree"]["count"] == 3
+                assert sent["histograms"]["deliver"]["count"] == 2
+
+                received = sock2.getMetrics().toDict()
+                assert received["counters"]["received"] == 2
+                assert received["histograms"]["receive_wait"]["count"] == 2
+
+    def test_timeouts_are_counted_apart_from_refusals(self):
+        """Requests that are not answered in time should be counted as timeouts, not refusals."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+            sock.enableMetrics()
+            sock.REQUEST_TIMEOUT = 200
+            sock.setServiceProvider(AgentID("nosuchagent"))
+            assert not sock.send([115], NODE_B_ADDRESS, Protocol.USER)
+
+            counters = sock.getMetrics().toDict()["counters"]
+            assert counters["sent"] == 1
+            assert counters["timeout"] == 1
+            assert counters["refused"] == 0
+            assert sock.getMetrics().toDict()["histograms"]["agree"]["count"] == 0
+
+
+class TestUnetSocketTracing:
+    """Tests for per-datagram lifecycle tracing."""
+
+    def test_trace_events_follow_datagram_lifecycle(self):
+        """Trace listeners should see each lifecycle step of a datagram, keyed by msgID."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1:
+            with UnetSocket(NODE_B_HOST, NODE_B_PORT) as sock2:
+                assert sock2.bind(Protocol.USER)
+                sent, received = [], []
+                sock1.addTraceListener(sent.append)
+                sock2.addTraceListener(received.append)
+
+                sock1.setReliability(True)
+                assert sock1.send([121], NODE_B_ADDRESS, Protocol.USER)
+                ntf = sock2.receive(3000)
+                assert ntf.data == [121]
+
+                assert [e["event"] for e in sent] == ["built", "provider", "submitted", "agree", "delivered"]
+                assert len({e["msgID"] for e in sent}) == 1
+                times = [e["time"] for e in sent]
+                assert times == sorted(times)
+
+                assert [e["event"] for e in received] == ["received"]
+                assert received[0]["msgID"] == ntf.msgID
+                assert received[0]["queued"] <= received[0]["time"]
+
+                sock1.removeTraceListener(sent.append)
+                count = len(sent)
+                assert sock1.send([122], NODE_B_ADDRESS, Protocol.USER)
+                assert len(sent) == count
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from unetpy import DatagramNtf, Protocol, UnetSelector, UnetSocket, select
+
+# Apply socket_module_setup fixture to all tests in this module
+pytestmark = pytest.mark.usefixtures("socket_module_setup")
+
+
+# Node A (232): tcp://localhost:1101
+# Node B (31): tcp://localhost:1102
+
+NODE_A_HOST = "localhost"
+NODE_A_PORT = 1101
+NODE_A_ADDRESS = 232
+
+NODE_B_HOST = "localhost"
+NODE_B_PORT = 1102
+NODE_B_ADDRESS = 31
+
+
+class TestUnetSelector:
+    """Tests for readiness multiplexing across sockets."""
+
+    def test_select_reports_ready_sockets(self):
+        """select() should report only the sockets with matching datagrams queued."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1:
+            with UnetSocket(NODE_B_HOST, NODE_B_PORT) as sock2:
+                assert sock1.bind(Protocol.USER)
+                assert sock2.bind(Protocol.USER)
+                while sock2.receive(100) is not None:
+                    pass
+
+                with UnetSelector() as selector:
+                    assert selector.register(sock1)
+                    assert selector.register(sock2)
+                    assert selector.getSockets() == [sock1, sock2]
+                    assert selector.select(0) == []
+
+                    t1 = time.time()
+                    assert selector.select(300) == []
+                    assert time.time() - t1 >= 0.3
+
+                    assert sock1.send([101], NODE_B_ADDRESS, Protocol.USER)
+                    assert selector.select(3000) == [sock2]
+                    ntf = sock2.receive(0)
+                    assert isinstance(ntf, DatagramNtf)
+                    assert ntf.data == [101]
+                    assert selector.select(0) == []
+
+    def test_select_wakes_on_arrival(self):
+        """A blocked select() should return as soon as a datagram arrives."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1:
+            with UnetSocket(NODE_B_HOST, NODE_B_PORT) as sock2:
+                assert sock2.bind(Protocol.USER)
+                threading.Timer(0.2, sock1.send, ([102], NODE_B_ADDRESS, Protocol.USER)).start()
+                t1 = time.time()
+                assert select([sock2], UnetSocket.BLOCKING) == [sock2]
+                assert time.time() - t1 < 3
+                assert sock2.receive(0).data == [102]
+
+    def test_readiness_callbacks(self):
+        """Readiness callbacks should be called with the socket when a datagram arrives."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1:
+            with UnetSocket(NODE_B_HOST, NODE_B_PORT) as sock2:
+                assert sock2.bind(Protocol.USER)
+                received = []
+                done = threading.Event()
+
+                def on_ready(sock):
+                    ntf = sock.receive(0)
+                    if ntf is not None:
+                        received.append(ntf.data)
+                    if len(received) == 3:
+                        done.set()
+
+                with UnetSelector() as selector:
+                    selector.register(sock2, on_ready)
+                    assert sock1.sendMany([[103, i] for i in range(3)], NODE_B_ADDRESS, Protocol.USER) == [True] * 3
+                    assert done.wait(5)
+                    assert received == [[103, 0], [103, 1], [103, 2]]
+
+                    selector.unregister(sock2)
+                    assert selector.getSockets() == []
+                    assert sock1.send([104], NODE_B_ADDRESS, Protocol.USER)
+                    time.sleep(0.3)
+                    assert len(received) == 3
+
+    def test_closed_socket_is_ready(self):
+        """Closing a registered socket should wake select() and report it as ready."""
+        sock = UnetSocket(NODE_A_HOST, NODE_A_PORT)
+        with UnetSelector() as selector:
+            assert selector.register(sock)
+            threading.Timer(0.2, sock.close).start()
+            assert selector.select(3000) == [sock]
+        assert not UnetSelector().register(sock)
@@ -1,12 +1,21 @@
 from __future__ import annotations
 
+import asyncio
 import math
+import os
+import subprocess
+import sys
+import threading
 import time
+from array import array
 from enum import Enum
+from pathlib import Path
 
 import pytest
 
+import unetpy
 from unetpy import (
+    AbnormalTerminationNtf,
     AgentID,
     DatagramNtf,
     DatagramReq,
@@ -17,7 +26,10 @@ from unetpy import (
     ReservationStatus,
     RouteInfo,
     Services,
+    Topics,
     UnetSocket,
+    getParamsAll,
+    setParamsAll,
     Priority,
     Robustness
 )
@@ -73,6 +85,93 @@ class TestUnetSocketConstruction:
             gw = sock.getGateway()
             assert isinstance(gw, Gateway)
 
+    def test_lazy_socket_resolves_in_background(self):
+        """A lazy socket should resolve its local address in the background and still receive datagrams."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1:
+            with UnetSocket(NODE_B_HOST, NODE_B_PORT, lazy=True) as sock2:
+                assert sock2.bind(Protocol.USER)
+                assert sock1.send([71], NODE_B_ADDRESS, Protocol.USER)
+                ntf = sock2.receive(3000)
+                assert ntf is not None and ntf.data == [71]
+                assert sock2._connection.resolved.is_set()
+                assert sock2.localAddress == NODE_B_ADDRESS
+                assert sock2.getLocalAddress() == NODE_B_ADDRESS
+
+
+class TestUnetSocketSharedConnection:
+    """Tests for sockets sharing one Gateway connection."""
+
+    def test_shared_sockets_use_one_gateway(self):
+        """Shared sockets on the same host and port should share the Gateway until the last close."""
+        sock1 = UnetSocket(NODE_A_HOST, NODE_A_PORT, shared=True)
+        sock2 = UnetSocket(NODE_A_HOST, NODE_A_PORT, shared=True)
+        sock3 = UnetSocket(NODE_A_HOST, NODE_A_PORT)
+        try:
+            assert sock1.getGateway() is sock2.getGateway()
+            assert sock3.getGateway() is not sock1.getGateway()
+            assert sock2.getLocalAddress() == NODE_A_ADDRESS
+
+            gw = sock1.getGateway()
+            sock1.close()
+            assert sock1.isClosed()
+            assert not sock2.isClosed()
+            assert sock2.host("B") == NODE_B_ADDRESS
+
+            sock2.close()
+            assert not gw.is_connected()
+        finally:
+            for sock in (sock1, sock2, sock3):
+                sock.close()
+
+    def test_shared_sockets_receive_their_own_protocols(self):
+        """Shared sockets bound to different protocols should each receive their own datagrams."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sender:
+            with UnetSocket(NODE_B_HOST, NODE_B_PORT, shared=True) as sock1:
+                with UnetSocket(NODE_B_HOST, NODE_B_PORT, shared=True) as sock2:
+                    assert sock1.bind(Protocol.USER)
+                    assert sock2.bind(Protocol.USER + 1)
+                    sock1.setTimeout(3000)
+                    sock2.setTimeout(3000)
+
+                    assert sender.send([41], NODE_B_ADDRESS, Protocol.USER + 1)
+                    assert sender.send([42], NODE_B_ADDRESS, Protocol.USER)
+                    _assert_received_payload(sock1, [42])
+                    _assert_received_payload(sock2, [41])
+                    assert sock1.receive(200) is None
+
+    def test_slow_host_does_not_hold_up_other_shared_sockets(self, monkeypatch):
+        """Opening a shared connection to a slow host should not block shared sockets for other hosts."""
+        opening = threading.Event()
+        proceed = threading.Event()
+
+        class SlowGateway(Gateway):
+            def __init__(self, hostname, port, *args, **kwargs):
+                if port == NODE_B_PORT:
+                    opening.set()
+                    proceed.wait(5)
+                super().__init__(hostname, port, *args, **kwargs)
+
+        monkeypatch.setattr(unetpy.socket, "Gateway", SlowGateway)
+        slow = []
+        thread = threading.Thread(target=lambda: slow.append(UnetSocket(NODE_B_HOST, NODE_B_PORT, shared=True)))
+        thread.start()
+        try:
+            assert opening.wait(5)
+            start = time.monotonic()
+            with UnetSocket(NODE_A_HOST, NODE_A_PORT, shared=True) as sock:
+                assert sock.getLocalAddress() == NODE_A_ADDRESS
+            assert time.monotonic() - start < 2
+            assert thread.is_alive()
+            proceed.set()
+            thread.join(5)
+            assert len(slow) == 1
+            assert slow[0].getLocalAddress() == NODE_B_ADDRESS
+        finally:
+            proceed.set()
+            thread.join(5)
+            for sock in slow:
+                sock.close()
+
 
 class TestUnetSocketLocalAddress:
     """Tests for getting local address."""
@@ -83,6 +182,19 @@ class TestUnetSocketLocalAddress:
             local_addr = sock.getLocalAddress()
             assert local_addr == NODE_A_ADDRESS
 
+    def test_known_local_address_is_not_read_again(self, monkeypatch):
+        """getLocalAddress should return the known local address without asking the node."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+            sent = []
+            send = sock.gw.send
+            monkeypatch.setattr(sock.gw, "send", lambda msg: sent.append(msg) or send(msg))
+            assert sock.getLocalAddress() == NODE_A_ADDRESS
+            assert sent == []
+
+            sock.localAddress = -1
+            assert sock.getLocalAddress() == NODE_A_ADDRESS
+            assert sent
+
 
 class TestUnetSocketHostResolution:
     """Tests for host name resolution."""
@@ -95,6 +207,37 @@ class TestUnetSocketHostResolution:
             host_b = sock.host("B")
             assert host_b == NODE_B_ADDRESS
 
+    def test_host_resolution_is_cached_and_batched(self, monkeypatch):
+        """Resolved and unresolvable names should be cached, and hosts() should resolve many names."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+            assert sock.hostName(NODE_B_ADDRESS) is None
+            assert sock.hosts(["A", "B", "NoSuchNode", "A"]) == [NODE_A_ADDRESS, NODE_B_ADDRESS, None, NODE_A_ADDRESS]
+            assert sock.hostName(NODE_B_ADDRESS) == "B"
+            assert sock.hostName(NODE_A_ADDRESS) == "A"
+
+            sent = []
+            send = sock.gw.send
+            monkeypatch.setattr(sock.gw, "send", lambda msg: sent.append(msg) or send(msg))
+            assert sock.host("B") == NODE_B_ADDRESS
+            assert sock.host("NoSuchNode") is None
+            assert sock.hosts(["B", "A"]) == [NODE_B_ADDRESS, NODE_A_ADDRESS]
+            assert sent == []
+
+    def test_replies_are_not_stranded_by_a_slow_gateway_queue(self, monkeypatch):
+        """Replies should reach the socket at once even if the gateway is slow to queue messages."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+            queue = sock.gw._queue
+            append = queue.append
+
+            def slow_append(msg):
+                time.sleep(0.02)
+                append(msg)
+
+            monkeypatch.setattr(queue, "append", slow_append)
+            start = time.monotonic()
+            assert sock.hosts(["B"]) == [NODE_B_ADDRESS]
+            assert time.monotonic() - start < 1
+
 
 class TestUnetSocketAgentAccess:
     """Tests for accessing agents."""
@@ -105,6 +248,58 @@ class TestUnetSocketAgentAccess:
             shell = sock.agentForService(Services.SHELL)
             assert isinstance(shell, AgentID)
 
+    def test_service_lookups_are_cached_until_an_agent_terminates(self, monkeypatch):
+        """Service lookups should be cached, and the cache cleared on lifecycle notifications."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+            phy = sock.agentForService(Services.PHYSICAL)
+            lookups = []
+            lookup = unetpy.socket._find_agents
+
+            def find_agents(gw, svc, many=False):
+                if not many:
+                    lookups.append(svc)
+                return lookup(gw, svc, many)
+
+            monkeypatch.setattr(unetpy.socket, "_find_agents", find_agents)
+
+            assert sock.agentForService(Services.PHYSICAL) == phy
+            assert sock.agentsForService(Services.PHYSICAL) == [phy]
+            assert sock._resolve_provider() is not None
+            sock._resolve_provider()
+            assert Services.PHYSICAL not in lookups
+
+            gw = Gateway(NODE_A_HOST, NODE_A_PORT)
+            try:
+                ntf = AbnormalTerminationNtf()
+                ntf.recipient = gw.topic(Topics.LIFECYCLE)
+                gw.send(ntf)
+                deadline = time.time() + 5
+                while Services.PHYSICAL not in lookups and time.time() < deadline:
+                    sock.agentForService(Services.PHYSICAL)
+                    time.sleep(0.05)
+            finally:
+                gw.close()
+            assert Services.PHYSICAL in lookups
+            assert sock.agentForService(Services.PHYSICAL) == phy
+
+    def test_service_lookups_without_gateway_internals(self, monkeypatch):
+        """Service lookups should use the public Gateway lookups if fjagepy lacks the internals they rely on."""
+        monkeypatch.setattr(unetpy.socket, "_LOOKUP_INTERNALS", ("_no_such_attribute",))
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+            lookups = []
+            agentForService = sock.gw.agentForService
+
+            def lookup(svc):
+                lookups.append(svc)
+                return agentForService(svc)
+
+            monkeypatch.setattr(sock.gw, "agentForService", lookup)
+            phy = sock.agentForService(Services.PHYSICAL)
+            assert isinstance(phy, AgentID)
+            assert phy.name == "phy"
+            assert Services.PHYSICAL in lookups
+            assert sock.agentsForService(Services.PHYSICAL) == [phy]
+
     def test_agent_by_name(self):
         """UnetSocket should be able to get access to Agents for given name."""
         with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
@@ -125,6 +320,29 @@ class TestUnetSocketAgentAccess:
             assert phy.MTU > 0
 
 
+    def test_get_and_set_several_parameters(self):
+        """UnetSocket should read and set several parameters of an agent in one request."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+            assert sock.getParams("node", ["address", "nodeName"]) == {"address": NODE_A_ADDRESS, "nodeName": "A"}
+            assert sock.getParams("node", []) == {}
+            assert sock.setParams("node", {"address": NODE_A_ADDRESS}) == {"address": NODE_A_ADDRESS}
+
+    def test_parameters_across_nodes(self):
+        """Parameters should be read and set on several nodes concurrently, one row per node."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1, UnetSocket(NODE_B_HOST, NODE_B_PORT) as sock2:
+            rows = getParamsAll([sock1, sock2], "node", ["nodeName"])
+            assert [row["socket"] for row in rows] == [sock1, sock2]
+            assert [row["address"] for row in rows] == [NODE_A_ADDRESS, NODE_B_ADDRESS]
+            assert [row["values"] for row in rows] == [{"nodeName": "A"}, {"nodeName": "B"}]
+
+            headings = [row["values"]["heading"] for row in getParamsAll([sock1, sock2], "node", ["heading"])]
+            rows = setParamsAll([sock1, sock2], "node", {"heading": 90.0})
+            assert [row["values"] for row in rows] == [{"heading": 90.0}, {"heading": 90.0}]
+            assert sock2.getParams("node", ["heading"]) == {"heading": 90.0}
+            for sock, heading in zip((sock1, sock2), headings):
+                sock.setParams("node", {"heading": heading})
+
+
 class TestUnetSocketBindUnbind:
     """Tests for bind and unbind functionality."""
 
@@ -219,6 +437,50 @@ class TestUnetSocketTimeout:
             assert result is None
             assert dt <= 500
 
+class TestUnetSocketCancel:
+    """Tests for cancelling blocked receives and sends."""
+
+    def test_cancel_wakes_blocked_receive(self):
+        """cancel() should promptly wake a receive() blocked indefinitely."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+            sock.bind(Protocol.USER)
+            result = []
+            thread = threading.Thread(target=lambda: result.append(sock.receive(UnetSocket.BLOCKING)))
+            thread.start()
+            time.sleep(0.2)
+            sock.cancel()
+            thread.join(2)
+            assert not thread.is_alive()
+            assert result == [None]
+            assert not sock.isClosed()
+
+    def test_cancel_interrupts_blocking_send(self, monkeypatch):
+        """cancel() should make a send() waiting for a response return False."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+            sock.setSendMode(UnetSocket.BLOCKING)
+            monkeypatch.setattr(sock.gw, "send", lambda msg: None)
+            result = []
+            thread = threading.Thread(target=lambda: result.append(sock.send([1], NODE_B_ADDRESS, Protocol.USER)))
+            thread.start()
+            time.sleep(0.2)
+            sock.cancel()
+            thread.join(2)
+            assert not thread.is_alive()
+            assert result == [False]
+
+    def test_close_stops_background_threads(self):
+        """close() should stop the socket's dispatcher thread."""
+        def dispatchers():
+            return [t for t in threading.enumerate() if t.name.startswith("unetpy-dispatcher")]
+
+        before = len(dispatchers())
+        sock = UnetSocket(NODE_A_HOST, NODE_A_PORT)
+        assert len(dispatchers()) > before
+        sock.close()
+        time.sleep(0.2)
+        assert len(dispatchers()) == before
+
+
 class TestUnetSocketSendOptions:
     """Tests for socket-level send metadata and send mode."""
 
@@ -235,6 +497,19 @@ class TestUnetSocketSendOptions:
             assert sock.getMessageClass() is None
             assert sock.getRemoteRecipient() is None
 
+    def test_send_completes_on_terminal_notifications(self):
+        """Reliable sends should complete on delivery or failure, others on transmission or failure."""
+        from unetpy.messages import DatagramDeliveryNtf, DatagramFailureNtf, DatagramProgressNtf, DatagramTransmissionNtf
+
+        outcome = UnetSocket._send_outcome
+        assert outcome(DatagramDeliveryNtf(), True) is True
+        assert outcome(DatagramFailureNtf(), True) is False
+        assert outcome(DatagramTransmissionNtf(), True) is None
+        assert outcome(DatagramProgressNtf(), True) is None
+        assert outcome(DatagramTransmissionNtf(), False) is True
+        assert outcome(DatagramFailureNtf(), False) is False
+        assert outcome(DatagramProgressNtf(), False) is None
+
     def test_send_option_accessors_round_trip(self):
         """Configured send metadata should round-trip through the socket accessors."""
         with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
@@ -263,6 +538,20 @@ class TestUnetSocketSendOptions:
             sock.setSendMode(99)
             assert sock.getSendMode() == UnetSocket.BLOCKING
 
+    def test_non_blocking_send_replies_are_not_queued(self):
+        """Replies to non-blocking sends should not pile up in the Gateway queue."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+            sock.connect(NODE_B_ADDRESS, Protocol.USER)
+            sock.setSendMode(UnetSocket.NON_BLOCKING)
+            sent = set()
+            sock.addTraceListener(lambda event: sent.add(event["msgID"]) if event["event"] == "submitted" else None)
+            for i in range(20):
+                assert sock.send([i])
+            assert sock.sendMany([[i] for i in range(20)]) == [True] * 20
+            assert len(sent) == 40
+            time.sleep(0.5)
+            assert not [msg for msg in list(sock.gw._queue) if getattr(msg, "inReplyTo", None) in sent]
+
     def test_socket_metadata_is_applied_to_datagram_requests(self):
         """Socket-level metadata should be copied into outgoing datagram requests."""
         with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
@@ -306,6 +595,39 @@ class TestUnetSocketSendOptions:
             assert req.remoteRecipient == "TOPSIDE"
             assert req.mailbox == "STATUS"
 
+    def test_request_template_is_reused_until_metadata_changes(self):
+        """Requests should be cloned from a cached template that any metadata change rebuilds."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+            sock.connect(NODE_B_ADDRESS, Protocol.USER)
+            sock.setTtl(5.5)
+            req1 = sock._build_datagram_request([1], None, None)
+            template = sock._template
+            req2 = sock._build_datagram_request([2], None, None)
+            assert sock._template is template
+            assert req1 is not template and req2 is not template
+            assert req1.msgID != req2.msgID
+            assert (req1.data, req2.data) == ([1], [2])
+            assert template[1].__dict__.get("data") is None
+
+            sock.setTtl(7.0)
+            assert sock._build_datagram_request([3], None, None).ttl == 7.0
+            assert sock._template is not template
+
+            sock.setMailbox("STATUS")
+            req = sock._build_datagram_request([4], None, None)
+            assert isinstance(req, RemoteMessageReq)
+            assert req.mailbox == "STATUS"
+            assert req.ttl == 7.0
+
+            # settings assigned directly rather than through the setters
+            sock.ttl = 9.0
+            sock.mailbox = None
+            sock.remoteAddress = NODE_A_ADDRESS
+            sock.remoteProtocol = Protocol.USER + 1
+            req = sock._build_datagram_request([5], None, None)
+            assert not isinstance(req, RemoteMessageReq)
+            assert (req.ttl, req.to, req.protocol) == (9.0, NODE_A_ADDRESS, Protocol.USER + 1)
+
 class TestUnetSocketJavaParity:
     """Tests for Java API parity features implemented in Python."""
 
@@ -350,24 +672,25 @@ class TestUnetSocketJavaParity:
             sock.setSendMode(UnetSocket.SEMI_BLOCKING)
 
             # check that the send method waits for a delivery notification
-            # hook the gateway's receive method to capture the received message type and the time
-            # it was called, and then call the original receive method then check that the send method
-            # returns False and that it returned AFTER the receive method was called (i.e. it waited for the notification)
-            original_receive = getattr(sock.gw, "receive")
+            # notifications reach the socket through its dispatcher rather than gw.receive(), so
+            # capture the received message type and the time it arrived with a trace listener
+            # then check that the send method returns False and that it returned AFTER the
+            # notification was received (i.e. it waited for the notification)
             received_message_type = None
             receive_called_time = None
 
-            def receive_hook(*args, **kwargs):
+            def receive_hook(event):
                 nonlocal received_message_type, receive_called_time
+                ntf = event.get("ntf")
+                if ntf is None:
+                    return
                 receive_called_time = time.time()
-                ntf = original_receive(*args, **kwargs)
                 if isinstance(ntf, DatagramDeliveryNtf):
                     received_message_type = "DatagramDeliveryNtf"
                 elif isinstance(ntf, DatagramFailureNtf):
                     received_message_type = "DatagramFailureNtf"
-                return ntf
 
-            monkeypatch.setattr(sock.gw, "receive", receive_hook)
+            sock.addTraceListener(receive_hook)
             start_time = time.time()
             result = sock.send([71, 72, 73])
             end_time = time.time()
@@ -415,6 +738,36 @@ class TestEnumConstants:
         assert ReservationStatus.REQUEST == "REQUEST"
         assert RouteInfo.Operation.CREATE == "CREATE"
 
+
+class TestMessageClasses:
+    """Tests for lazily created message classes."""
+
+    def test_message_classes_keep_their_hierarchy(self):
+        """Message classes created on first use should keep the UnetStack inheritance."""
+        from unetpy import RemoteTextNtf, RxFrameNtf, TxFrameReq
+
+        assert issubclass(RxFrameNtf, DatagramNtf)
+        assert issubclass(RemoteTextNtf, DatagramNtf)
+        assert issubclass(TxFrameReq, DatagramReq)
+        assert RxFrameNtf(data=[1, 2]).dataBytes == b"\x01\x02"
+        assert unetpy.RxFrameNtf is RxFrameNtf
+
+    def test_import_is_lazy(self):
+        """Importing unetpy should not load asyncio, multiprocessing or unused message classes."""
+        code = (
+            "import sys, unetpy\n"
+            "from fjagepy import Message\n"
+            "assert 'asyncio' not in sys.modules and 'multiprocessing' not in sys.modules\n"
+            "assert 'RangeNtf' not in vars(unetpy.messages)\n"
+            "assert not hasattr(sys.modules[Message.__module__], '__getattr__')\n"
+            "msg = Message.from_json({'clazz': 'org.arl.unet.localization.RangeNtf', 'data': {}})\n"
+            "assert isinstance(unetpy.messages._inflate(msg), unetpy.RangeNtf)\n"
+        )
+        env = dict(os.environ, PYTHONPATH=str(Path(unetpy.__file__).resolve().parents[1]))
+        result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+
+
 class TestUnetSocketCommunication:
     """Tests for datagram communication between nodes."""
 
@@ -562,6 +915,252 @@ class TestUnetSocketCommunication:
                 assert sock1.send(payload, addr2, Protocol.USER)
                 _assert_received_payload(sock2, payload)
 
+    def test_byte_buffer_payloads_between_two_nodes(self):
+        """Byte buffers should be sent without conversion and received as bytes."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1:
+            with UnetSocket(NODE_B_HOST, NODE_B_PORT) as sock2:
+                assert sock2.bind(Protocol.USER)
+                sock1.connect(sock2.getLocalAddress(), Protocol.USER)
+
+                req = sock1._build_datagram_request(bytearray(b"abc"), None, None)
+                assert not isinstance(req.data, list)
+                assert req.data == [97, 98, 99]
+
+                for payload in (b"\x00\x7f\x80\xff", memoryview(b"xyz"), array("B", [1, 2, 250])):
+                    assert sock1.send(payload)
+                    ntf = sock2.receive(3000)
+                    assert ntf is not None
+                    assert ntf.dataBytes == bytes(payload)
+                    assert ntf.data == list(bytes(payload))
+
+    def test_base64_payload_encoding_between_two_nodes(self):
+        """Payloads sent with base64 encoding should be received unchanged."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1:
+            with UnetSocket(NODE_B_HOST, NODE_B_PORT) as sock2:
+                assert sock2.bind(Protocol.USER)
+                sock1.connect(sock2.getLocalAddress(), Protocol.USER)
+                assert sock1.getPayloadEncoding() == UnetSocket.LIST_ENCODING
+                assert not sock1.setPayloadEncoding("hex")
+                assert sock1.setPayloadEncoding(UnetSocket.BASE64_ENCODING)
+                assert sock1.getPayloadEncoding() == UnetSocket.BASE64_ENCODING
+
+                for payload in (b"\x00\x7f\x80\xff", [1, 2, 3], "text"):
+                    assert sock1.send(payload)
+                    ntf = sock2.receive(3000)
+                    assert ntf is not None
+                    assert ntf.dataBytes == (payload.encode() if isinstance(payload, str) else bytes(payload))
+
+    def test_send_many_between_two_nodes(self):
+        """sendMany should report one result per payload and deliver every datagram."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1:
+            with UnetSocket(NODE_B_HOST, NODE_B_PORT) as sock2:
+                assert sock2.bind(Protocol.USER)
+                sock2.setTimeout(3000)
+
+                payloads = [[81, i] for i in range(5)]
+                assert sock1.sendMany(payloads, NODE_B_ADDRESS, Protocol.USER) == [True] * 5
+
+                received = []
+                for _ in payloads:
+                    ntf = sock2.receive()
+                    assert isinstance(ntf, DatagramNtf)
+                    received.append(ntf.data)
+                assert sorted(received) == payloads
+
+                # invalid protocol fails that item only
+                assert sock1.sendMany([[91], [92]], NODE_B_ADDRESS, 5) == [False, False]
+                assert sock1.sendMany([]) == []
+
+    def test_receive_demultiplexes_by_protocol(self):
+        """Datagrams should be queued per protocol and popped for the bound protocol only."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1:
+            with UnetSocket(NODE_B_HOST, NODE_B_PORT) as sock2:
+                assert sock2.bind(Protocol.USER + 1)
+                sock2.setTimeout(3000)
+
+                assert sock1.send([86], NODE_B_ADDRESS, Protocol.USER)
+                assert sock1.send([87], NODE_B_ADDRESS, Protocol.USER + 1)
+                _assert_received_payload(sock2, [87])
+
+                sock2.unbind()
+                assert sock2.bind(Protocol.USER)
+                _assert_received_payload(sock2, [86])
+                assert sock2.receive(200) is None
+
+    def test_receive_callbacks_run_concurrently_in_source_order(self):
+        """onReceive callbacks should handle matching datagrams, in order per source if asked to."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1:
+            with UnetSocket(NODE_B_HOST, NODE_B_PORT) as sock2:
+                received = []
+                done = threading.Event()
+
+                def handle(ntf):
+                    time.sleep(0.05)
+                    received.append(ntf.data[0])
+                    if len(received) == 4:
+                        done.set()
+
+                assert sock2.onReceive(handle, protocol=Protocol.USER, maxConcurrency=4, ordered=True)
+                for i in range(4):
+                    assert sock1.send([90 + i], NODE_B_ADDRESS, Protocol.USER)
+                assert sock1.send([99], NODE_B_ADDRESS, Protocol.USER + 1)
+                assert done.wait(5)
+                assert received == [90, 91, 92, 93]
+
+                # other protocols are still queued for receive()
+                _assert_received_payload(sock2, [99])
+
+                sock2.removeReceiveCallback()
+                assert sock1.send([98], NODE_B_ADDRESS, Protocol.USER)
+                _assert_received_payload(sock2, [98])
+                assert received == [90, 91, 92, 93]
+
+    def test_receive_callbacks_on_an_event_loop(self):
+        """Coroutine receive callbacks should run on the given asyncio event loop."""
+        async def main():
+            loop = asyncio.get_running_loop()
+            received = asyncio.Queue()
+
+            async def handle(ntf):
+                assert asyncio.get_running_loop() is loop
+                await received.put(ntf.data)
+
+            with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1:
+                with UnetSocket(NODE_B_HOST, NODE_B_PORT) as sock2:
+                    assert sock2.bind(Protocol.USER)
+                    assert sock2.onReceive(handle, executor=loop)
+                    assert sock1.send([95], NODE_B_ADDRESS, Protocol.USER)
+                    assert await asyncio.wait_for(received.get(), 5) == [95]
+
+        asyncio.run(main())
+
+    def test_bound_subscription_profile_discards_other_protocols(self):
+        """A bound socket with the bound profile should only receive its own protocol."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1:
+            with UnetSocket(NODE_B_HOST, NODE_B_PORT) as sock2:
+                connection = sock2._connection
+                gw = sock2.getGateway()
+                assert connection.legacyTopics
+                assert sock2.getSubscriptionProfile() == UnetSocket.SUBSCRIBE_ALL
+                assert not sock2.setSubscriptionProfile("some")
+                assert sock2.setSubscriptionProfile(UnetSocket.SUBSCRIBE_BOUND)
+                # unbound sockets still need every datagram
+                assert all(gw._subscriptions[topic] for topic in connection.legacyTopics)
+
+                assert sock2.bind(Protocol.USER)
+                assert not any(gw._subscriptions[topic] for topic in connection.legacyTopics)
+                discarded = sock2.getDiscardCounts()["unbound"]
+                assert sock1.send([41], NODE_B_ADDRESS, Protocol.USER + 1)
+                assert sock1.send([40], NODE_B_ADDRESS, Protocol.USER)
+                _assert_received_payload(sock2, [40])
+                assert sock2.getDiscardCounts()["unbound"] == discarded + 1
+
+                sock2.unbind()
+                assert all(gw._subscriptions[topic] for topic in connection.legacyTopics)
+                assert sock1.send([42], NODE_B_ADDRESS, Protocol.USER + 1)
+                _assert_received_payload(sock2, [42])
+
+    def test_bound_subscription_profile_keeps_mirrored_agent_topics(self):
+        """Agent topics a parameter mirror needs should stay subscribed when a bound socket drops them."""
+        with UnetSocket(NODE_B_HOST, NODE_B_PORT, shared=True) as sock1:
+            with UnetSocket(NODE_B_HOST, NODE_B_PORT, shared=True) as sock2:
+                connection = sock2._connection
+                gw = sock2.getGateway()
+                agent = sock1.agentsForService(Services.DATAGRAM)[0]
+                mirrored = gw.topic(agent)
+                assert mirrored in connection.legacyTopics
+                assert sock1.params(agent) is not None
+
+                for sock in (sock1, sock2):
+                    assert sock.setSubscriptionProfile(UnetSocket.SUBSCRIBE_BOUND)
+                    assert sock.bind(Protocol.USER)
+                assert gw._subscriptions[mirrored]
+                assert not any(gw._subscriptions[topic] for topic in connection.legacyTopics if topic != mirrored)
+
+                sock2.unbind()
+                assert all(gw._subscriptions[topic] for topic in connection.legacyTopics)
+                assert sock2.bind(Protocol.USER)
+                assert gw._subscriptions[mirrored]
+
+                # the mirror's subscription ends with the socket that owns it
+                sock1.close()
+                assert not any(gw._subscriptions[topic] for topic in connection.legacyTopics)
+
+    def test_receive_many_drains_queued_datagrams(self):
+        """receiveMany should return queued datagrams in arrival order, up to the limit."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1:
+            with UnetSocket(NODE_B_HOST, NODE_B_PORT) as sock2:
+                assert sock2.bind(Protocol.USER)
+                sock2.setTimeout(3000)
+
+                assert sock1.sendMany([[88, i] for i in range(5)], NODE_B_ADDRESS, Protocol.USER) == [True] * 5
+                time.sleep(0.5)
+
+                batch = sock2.receiveMany(3)
+                assert [ntf.data for ntf in batch] == [[88, 0], [88, 1], [88, 2]]
+                batch = sock2.receiveMany(10)
+                assert [ntf.data for ntf in batch] == [[88, 3], [88, 4]]
+                assert sock2.receiveMany(10, 200) == []
+                assert sock2.receiveMany(0) == []
+
+    def test_datagram_stream_filters_and_buffer_policy(self):
+        """datagrams() should filter, bound its buffer and stop after the idle timeout."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1:
+            with UnetSocket(NODE_B_HOST, NODE_B_PORT) as sock2:
+                def burst(tag):
+                    assert sock1.sendMany([[tag, i] for i in range(5)], NODE_B_ADDRESS, Protocol.USER) == [True] * 5
+                    assert sock1.send([tag, 9], NODE_B_ADDRESS, Protocol.USER + 1)
+                    time.sleep(0.5)
+
+                burst(89)
+                stream = sock2.datagrams(timeout=300, protocol=Protocol.USER)
+                assert [ntf.data[1] for ntf in stream] == [0, 1, 2, 3, 4]
+
+                burst(90)
+                stream = sock2.datagrams(timeout=300, maxBuffer=2)
+                assert [ntf.data[1] for ntf in stream] == [4, 9]
+
+                burst(91)
+                stream = sock2.datagrams(timeout=300, maxBuffer=2, dropPolicy=UnetSocket.DROP_NEWEST)
+                assert [ntf.data[1] for ntf in stream] == [0, 1]
+
+                burst(92)
+                assert list(sock2.datagrams(timeout=300, source=NODE_B_ADDRESS)) == []
+                assert list(sock2.datagrams(maxBuffer=0)) == []
+
+    def test_send_async_resolves_per_datagram(self):
+        """sendAsync futures should resolve in the background for each datagram."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock1:
+            with UnetSocket(NODE_B_HOST, NODE_B_PORT) as sock2:
+                assert sock2.bind(Protocol.USER)
+                sock2.setTimeout(3000)
+
+                futures = [sock1.sendAsync([82, i], NODE_B_ADDRESS, Protocol.USER) for i in range(5)]
+                assert [f.result(timeout=5) for f in futures] == [True] * 5
+                for _ in futures:
+                    assert isinstance(sock2.receive(), DatagramNtf)
+
+                assert sock1.sendAsync([83], NODE_B_ADDRESS, 5).result(timeout=5) is False
+
+    def test_reliable_send_async_tracks_delivery(self):
+        """Reliable sendAsync futures should resolve on delivery or failure."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+            sock.setReliability(True)
+            ok = [sock.sendAsync([84, i], NODE_B_ADDRESS, Protocol.USER) for i in range(3)]
+            failed = sock.sendAsync([85], NODE_B_ADDRESS + 1, Protocol.USER)
+            assert [f.result(timeout=10) for f in ok] == [True] * 3
+            assert failed.result(timeout=10) is False
+
+    def test_reliable_send_many_reports_delivery_per_item(self):
+        """Reliable sendMany should wait for delivery/failure of each datagram."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+            sock.setReliability(True)
+            sock.connect(NODE_B_ADDRESS, Protocol.USER)
+            assert sock.sendMany([[93], [94]]) == [True, True]
+            sock.connect(NODE_B_ADDRESS + 1, Protocol.USER)
+            assert sock.sendMany([[95], [96]]) == [False, False]
+
+
 class TestUnetSocketParamChange:
     """Tests for dynamic parameter change handling."""
 
@@ -589,4 +1188,77 @@ class TestUnetSocketParamChange:
 
             time.sleep(0.3)
 
-            assert sock.localAddress == initial_addr
\ No newline at end of file
+            assert sock.localAddress == initial_addr
+
+    def test_parameter_change_listeners_wildcards_and_coalescing(self):
+        """Several listeners and wildcards should be called without a slow or failing one holding up the rest."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+            node = sock.agent("node")
+            heading = node.heading
+            seen = []
+            slow = []
+            release = threading.Event()
+
+            def failing(value):
+                raise RuntimeError("callback error")
+
+            def blocked(value):
+                slow.append(value)
+                release.wait(5)
+
+            sock.onParamChange("node", "heading", failing)
+            sock.onParamChange("node", "heading", blocked)
+            sock.onParamChange("node", "heading", lambda value: seen.append(("exact", value)))
+            sock.onParamChange("node", "*", lambda value, agent, param: seen.append((param, value)))
+            sock.onParamChange("*", "heading", lambda value, agent, param: seen.append((agent, value)))
+            try:
+                for value in (10.0, 20.0, 30.0):
+                    node.heading = value
+                deadline = time.time() + 3
+                while ("exact", 30.0) not in seen and time.time() < deadline:
+                    time.sleep(0.05)
+                assert [v for k, v in seen if k == "exact"] == [10.0, 20.0, 30.0]
+                assert [v for k, v in seen if k == "heading"] == [10.0, 20.0, 30.0]
+                assert [v for k, v in seen if k == "node"] == [10.0, 20.0, 30.0]
+                assert slow == [10.0]
+            finally:
+                release.set()
+            deadline = time.time() + 3
+            while len(slow) < 2 and time.time() < deadline:
+                time.sleep(0.05)
+            # the changes made while the callback was busy are coalesced into one call
+            assert slow == [10.0, 30.0]
+
+            sock.removeParamChangeCallback("node", "heading", blocked)
+            sock.removeParamChangeCallback("node", "heading")
+            assert "node:heading" not in sock._param_change_callbacks
+            node.heading = heading
+
+    def test_parameter_mirror_follows_changes(self, monkeypatch):
+        """A parameter mirror should serve reads locally and follow parameter change notifications."""
+        with UnetSocket(NODE_A_HOST, NODE_A_PORT) as sock:
+            node = sock.params("node")
+            assert sock.params("node") is node
+            assert node.address == NODE_A_ADDRESS
+            assert node.nodeName == "A"
+
+            requests = []
+            send = sock.gw.send
+            monkeypatch.setattr(sock.gw, "send", lambda req: requests.append(req) or send(req))
+            for _ in range(10):
+                assert node.address == NODE_A_ADDRESS
+            assert requests == []
+
+            with UnetSocket(NODE_A_HOST, NODE_A_PORT) as other:
+                other.agent("node").address = 9
+            deadline = time.time() + 3
+            while node.address != 9 and time.time() < deadline:
+                time.sleep(0.05)
+            assert node.address == 9
+            assert requests == []
+
+            node.address = NODE_A_ADDRESS
+            assert node.snapshot()["address"] == NODE_A_ADDRESS
+            node.setMaxAge(0)
+            assert node.address == NODE_A_ADDRESS
+            assert len(requests) == 2